@@ -0,0 +1,405 @@
+"""
+核心引擎基准测试：构建可复现的合成数据集，分别运行MD5扫描、文件产生、文件校验、文件对比和各文件内容引擎，
+记录 文件数/秒、MB/秒、读写系统调用次数、峰值内存(RSS) 和耗时，保存为JSON基线；
+再次运行时与基线比较，超过阈值的退化会被标出，并以退出码1结束。
+只依赖 src/core，可在没有图形界面的Linux上运行。
+数据集：small_files 大量小文件、huge_files 少量大文件、deep_nesting 深层嵌套目录、wide_dirs 单个目录中大量文件，
+内容由固定种子生成，同一 --scale 下每次构建的数据完全相同，构建结果缓存在工作目录中。
+每个用例在独立的子进程中运行，峰值内存和系统调用次数互不影响。
+用法（在 windows-tools-suite 目录下）：
+    python benchmarks/bench_engines.py --save benchmarks/baseline.json
+    python benchmarks/bench_engines.py --baseline benchmarks/baseline.json [--threshold 0.15]
+    python benchmarks/bench_engines.py --cases scan_small_files,verify --scale 0.1
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.core.content_engine import available_content_modes, create_content_engine  # noqa: E402
+
+KIB = 1024
+MIB = 1024 * 1024
+# 数据集文件的修改时间固定为较早的时间，不会被时间排除过滤
+DATASET_MTIME = 1577836800  # 2020-01-01
+
+# 数据集规格（scale=1时）：文件数、大小范围、目录结构
+DATASETS = {
+    'small_files': {'files': 20000, 'size': (1 * KIB, 16 * KIB), 'layout': 'spread', 'dirs': 100},
+    'huge_files': {'files': 3, 'size': (256 * MIB, 256 * MIB), 'layout': 'flat'},
+    'deep_nesting': {'files': 2560, 'size': (1 * KIB, 8 * KIB), 'layout': 'deep', 'depth': 128},
+    'wide_dirs': {'files': 30000, 'size': (0, 2 * KIB), 'layout': 'flat'},
+    'md5files': {'files': 2000, 'size': (4 * KIB, 256 * KIB), 'layout': 'flat', 'md5_names': True},
+}
+
+# 用例：(引擎, 数据集)
+CASES = {
+    'scan_small_files': ('scan', 'small_files'),
+    'scan_huge_files': ('scan', 'huge_files'),
+    'scan_deep_nesting': ('scan', 'deep_nesting'),
+    'scan_wide_dirs': ('scan', 'wide_dirs'),
+    'generate': ('generate', None),
+    'generate_writers4': ('generate', None),
+    'generate_small_files': ('generate', None),
+    'generate_fsync': ('generate', None),
+    'verify': ('verify', 'md5files'),
+    'compare': ('compare', None),
+}
+# 文件内容引擎的纯生成速度（不写盘），用例名 content_引擎名
+for _mode in available_content_modes():
+    CASES[f'content_{_mode}'] = ('content', None)
+
+# 指标方向：True表示越大越好
+METRICS = {
+    'files_per_sec': True,
+    'mb_per_sec': True,
+    'wall_seconds': False,
+    'syscalls': False,
+    'peak_rss_mb': False,
+}
+
+
+def scaled(count, scale):
+    return max(1, int(count * scale))
+
+
+def dataset_dir(workdir, name, scale):
+    return os.path.join(workdir, 'datasets', f"{name}-{scale:g}")
+
+
+def random_bytes(rng, size):
+    """与 random.Random.randbytes 相同用途，兼容Python 3.9以前的版本"""
+    return rng.getrandbits(size * 8).to_bytes(size, 'little') if size else b''
+
+
+def file_content(rng, size):
+    """由种子确定的文件内容，大文件按块生成"""
+    remaining = size
+    while remaining > 0:
+        chunk = min(remaining, 4 * MIB)
+        yield random_bytes(rng, chunk)
+        remaining -= chunk
+
+
+def dataset_paths(name, spec, scale, root):
+    """数据集中各文件的相对目录"""
+    count = scaled(spec['files'], scale)
+    layout = spec['layout']
+    for i in range(count):
+        if layout == 'spread':
+            yield i, os.path.join(root, f"dir_{i % spec['dirs']:03d}")
+        elif layout == 'deep':
+            depth = spec['depth']
+            level = i * depth // count
+            yield i, os.path.join(root, *[f"level_{n:03d}" for n in range(level + 1)])
+        else:
+            yield i, root
+
+
+def build_dataset(workdir, name, scale):
+    """构建数据集，已按相同规格构建过时直接复用"""
+    spec = DATASETS[name]
+    root = dataset_dir(workdir, name, scale)
+    marker = os.path.join(workdir, 'datasets', f"{name}-{scale:g}.json")
+    if os.path.exists(marker):
+        with open(marker, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        if info['spec'] == spec:
+            return info
+    shutil.rmtree(root, ignore_errors=True)
+    rng = random.Random(f"{name}-{scale:g}")
+    min_size, max_size = spec['size']
+    total_bytes = 0
+    files = 0
+    for i, directory in dataset_paths(name, spec, scale, root):
+        os.makedirs(directory, exist_ok=True)
+        size = rng.randint(min_size, max_size)
+        if spec.get('md5_names'):
+            md5_hash = hashlib.md5()
+            temp_path = os.path.join(directory, f"temp_{i}")
+            with open(temp_path, 'wb') as f:
+                for chunk in file_content(rng, size):
+                    md5_hash.update(chunk)
+                    f.write(chunk)
+            path = os.path.join(directory, f"{i + 1}.{md5_hash.hexdigest()}.md5file")
+            os.replace(temp_path, path)
+        else:
+            path = os.path.join(directory, f"file_{i:06d}.dat")
+            with open(path, 'wb') as f:
+                for chunk in file_content(rng, size):
+                    f.write(chunk)
+        os.utime(path, (DATASET_MTIME, DATASET_MTIME))
+        total_bytes += size
+        files += 1
+    info = {'spec': spec, 'files': files, 'bytes': total_bytes}
+    with open(marker, 'w', encoding='utf-8') as f:
+        json.dump(info, f)
+    return info
+
+
+def build_compare_inputs(workdir, scale):
+    """对比用例的两个输入：md5日志格式的文本，右侧约1%的行被修改、删除或插入"""
+    lines = scaled(20000, scale)
+    left_file = os.path.join(workdir, 'datasets', f"compare-{scale:g}-left.log")
+    right_file = os.path.join(workdir, 'datasets', f"compare-{scale:g}-right.log")
+    if os.path.exists(left_file) and os.path.exists(right_file):
+        return left_file, right_file
+    os.makedirs(os.path.dirname(left_file), exist_ok=True)
+    rng = random.Random(f"compare-{scale:g}")
+    left = [f"C:\\Windows\\System32\\file_{i:06d}.dll\t{random_bytes(rng, 16).hex()}" for i in range(lines)]
+    right = []
+    for line in left:
+        roll = rng.random()
+        if roll < 0.004:
+            continue
+        if roll < 0.008:
+            right.append(line.rsplit('\t', 1)[0] + '\t' + random_bytes(rng, 16).hex())
+            continue
+        right.append(line)
+        if roll < 0.01:
+            right.append(f"C:\\Windows\\Temp\\new_{rng.randrange(10 ** 6):06d}.dll\t{random_bytes(rng, 16).hex()}")
+    with open(left_file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(left) + '\n')
+    with open(right_file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(right) + '\n')
+    return left_file, right_file
+
+
+def read_syscalls():
+    """当前进程的读写系统调用次数（Linux /proc/self/io），不可用时返回None"""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            values = dict(line.split(':', 1) for line in f if ':' in line)
+        return int(values['syscr']) + int(values['syscw'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def peak_rss_mb():
+    """当前进程的峰值内存。优先读取 VmHWM：ru_maxrss 在exec后保留父进程的峰值，会把构建数据集的内存算进来"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / KIB
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux单位为KB，macOS为字节
+    return peak / (MIB if sys.platform == 'darwin' else KIB)
+
+
+def run_case(case, workdir, scale):
+    """在当前（子）进程中运行一个用例，返回 (文件数, 字节数)"""
+    engine, dataset = CASES[case]
+    out_dir = os.path.join(workdir, 'out', case)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.makedirs(out_dir)
+    os.chdir(out_dir)  # skipped日志等写入当前目录的output
+
+    if engine == 'scan':
+        from src.core.md5_calculator import MD5Calculator
+        info = dataset_info(workdir, dataset, scale)
+        calculator = MD5Calculator()
+        calculator.output_dir = out_dir
+        calculator.scan_directory([dataset_dir(workdir, dataset, scale)], ['*'], 0, [], 'modified')
+        return info['files'], info['bytes']
+
+    if engine == 'generate':
+        from src.core.file_generator import FileGenerator
+        writers = 4 if case == 'generate_writers4' else 1
+        if case == 'generate_small_files':
+            # 小文件元数据风暴：对数正态分布的小文件，自动分层目录
+            generator = FileGenerator(out_dir, 1, 1, 'KB', scaled(20000, scale), interval=0, content_mode='prng',
+                                      seed=0, workload='small_files')
+        elif case == 'generate_fsync':
+            # 每个文件写完后fsync，测得的是存储的持久写入速度而不是系统缓存
+            generator = FileGenerator(out_dir, 4, 64, 'KB', scaled(2000, scale), interval=0, write_policy='fsync_file')
+        else:
+            generator = FileGenerator(out_dir, 4, 64, 'KB', scaled(2000, scale), interval=0, writers=writers)
+        result = {}
+        generator.generate_files(finished_callback=lambda files_dir, files, size: result.update(files=files, size=size))
+        return result['files'], result['size']
+
+    if engine == 'verify':
+        from src.core.file_verifier import FileVerifier
+        info = dataset_info(workdir, dataset, scale)
+        verifier = FileVerifier(dataset_dir(workdir, dataset, scale))
+        verifier.verify(out_dir)
+        if verifier.error_files:
+            raise RuntimeError(f"校验数据集存在不一致文件: {len(verifier.error_files)}")
+        return info['files'], info['bytes']
+
+    if engine == 'compare':
+        from src.core.file_compare import compare_files
+        left_file, right_file = build_compare_inputs(workdir, scale)
+        compare_files(left_file, right_file)
+        size = os.path.getsize(left_file) + os.path.getsize(right_file)
+        return 2, size
+
+    if engine == 'content':
+        content_engine = create_content_engine(case[len('content_'):], seed=0)
+        chunk_size = 10 * MIB
+        chunks = scaled(200, scale)
+        for _ in range(chunks):
+            content_engine.read(chunk_size)
+        return chunks, chunks * chunk_size
+
+    raise ValueError(f"未知用例: {case}")
+
+
+def dataset_info(workdir, name, scale):
+    with open(os.path.join(workdir, 'datasets', f"{name}-{scale:g}.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def measure_case(case, workdir, scale):
+    """子进程入口：运行用例并输出指标JSON"""
+    import logging
+    logging.disable(logging.INFO)  # 引擎的逐文件日志不计入测量
+    syscalls_before = read_syscalls()
+    start = time.perf_counter()
+    files, nbytes = run_case(case, workdir, scale)
+    wall = time.perf_counter() - start
+    syscalls_after = read_syscalls()
+    peak_rss = peak_rss_mb()
+    return {
+        'files': files,
+        'bytes': nbytes,
+        'wall_seconds': round(wall, 4),
+        'files_per_sec': round(files / wall, 2) if wall else None,
+        'mb_per_sec': round(nbytes / MIB / wall, 2) if wall else None,
+        'syscalls': syscalls_after - syscalls_before if syscalls_before is not None else None,
+        'peak_rss_mb': round(peak_rss, 1) if peak_rss is not None else None,
+    }
+
+
+def drop_caches():
+    """清空页缓存，使扫描读取真实磁盘（需要root，失败时忽略）"""
+    try:
+        os.sync()
+        with open('/proc/sys/vm/drop_caches', 'w') as f:
+            f.write('3\n')
+        return True
+    except OSError:
+        return False
+
+
+def run_in_child(case, workdir, scale):
+    command = [sys.executable, os.path.abspath(__file__), '--run-case', case, '--workdir', workdir, '--scale', str(scale)]
+    completed = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=ROOT_DIR)
+    if completed.returncode != 0:
+        raise RuntimeError(f"用例 {case} 运行失败:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """返回退化列表 [(用例, 指标, 基线值, 本次值, 变化比例)]"""
+    regressions = []
+    for case, metrics in results.items():
+        base = baseline.get('cases', {}).get(case)
+        if not base:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = base.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+                regressions.append((case, metric, old, new, change))
+    return regressions
+
+
+def format_value(value):
+    if value is None:
+        return '-'
+    return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="核心引擎基准测试")
+    parser.add_argument('--cases', help=f"逗号分隔的用例，默认全部: {','.join(CASES)}")
+    parser.add_argument('--scale', type=float, default=1.0, help="数据集规模系数（默认1）")
+    parser.add_argument('--repeat', type=int, default=1, help="每个用例运行次数，取耗时最短的一次")
+    parser.add_argument('--workdir', default=os.path.join(os.environ.get('TMPDIR', '/tmp'), 'wts-bench'),
+                        help="数据集和输出目录")
+    parser.add_argument('--save', help="把结果保存为JSON基线")
+    parser.add_argument('--baseline', help="与JSON基线比较")
+    parser.add_argument('--threshold', type=float, default=0.15, help="退化阈值（相对变化，默认0.15）")
+    parser.add_argument('--drop-caches', action='store_true', help="每个用例前清空页缓存（需要root）")
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    workdir = os.path.abspath(args.workdir)
+
+    if args.run_case:
+        print(json.dumps(measure_case(args.run_case, workdir, args.scale)))
+        return 0
+
+    cases = [case.strip() for case in args.cases.split(',')] if args.cases else list(CASES)
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error(f"未知用例: {', '.join(unknown)}")
+
+    for case in cases:
+        dataset = CASES[case][1]
+        if dataset:
+            print(f"准备数据集 {dataset} ...", flush=True)
+            build_dataset(workdir, dataset, args.scale)
+    if 'compare' in cases:
+        build_compare_inputs(workdir, args.scale)
+
+    results = {}
+    for case in cases:
+        runs = []
+        for _ in range(max(1, args.repeat)):
+            if args.drop_caches and not drop_caches():
+                print("无法清空页缓存（需要root），结果包含页缓存的影响", flush=True)
+                args.drop_caches = False
+            runs.append(run_in_child(case, workdir, args.scale))
+        results[case] = min(runs, key=lambda run: run['wall_seconds'])
+        print(f"{case:20s} " + "  ".join(f"{metric}={format_value(results[case][metric])}" for metric in METRICS), flush=True)
+
+    report = {
+        'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'host': platform.node(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'scale': args.scale,
+        'cases': results,
+    }
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存到: {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('scale') != args.scale:
+            print(f"警告：基线的规模系数为 {baseline.get('scale')}，本次为 {args.scale}，结果不可直接比较")
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"发现 {len(regressions)} 项超过 {args.threshold:.0%} 的退化：")
+            for case, metric, old, new, change in regressions:
+                print(f"  {case} {metric}: {format_value(old)} -> {format_value(new)} ({change:+.1%})")
+            return 1
+        print(f"与基线 {args.baseline} 相比没有超过 {args.threshold:.0%} 的退化")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
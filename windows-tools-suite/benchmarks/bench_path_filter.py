@@ -0,0 +1,99 @@
+"""
+扩展名/排除关键字过滤的单文件开销对比。
+旧实现：逐个扩展名 lower().endswith()，再逐个关键字 lower() 后查找并格式化debug日志；
+新实现：PathFilter 预编译的后缀集合和关键字正则。
+用法（在 windows-tools-suite 目录下）：python benchmarks/bench_path_filter.py [文件数]
+"""
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.md5_calculator import MD5Calculator
+from src.core.path_filter import PathFilter
+
+EXCLUDE_KEYWORDS = ["WinSxS", "Temp", "SoftwareDistribution", "Prefetch", "Logs", "$Recycle.Bin"]
+DIR_NAMES = ["System32", "SysWOW64", "Fonts", "WinSxS", "drivers", "en-US", "zh-CN", "assembly", "Microsoft.NET", "Temp"]
+FILE_EXTS = [".dll", ".exe", ".sys", ".mui", ".txt", ".log", ".xml", ".dat", ".ini", ".TTF", ".manifest", ".cat"]
+
+
+def make_paths(count):
+    """生成类似 C:\\Windows 目录结构的文件路径"""
+    rng = random.Random(0)
+    paths = []
+    for i in range(count):
+        depth = rng.randint(1, 5)
+        parts = [rng.choice(DIR_NAMES) for _ in range(depth)]
+        name = f"file_{i}{rng.choice(FILE_EXTS)}"
+        paths.append((name, "C:\\Windows\\" + "\\".join(parts) + "\\" + name))
+    return paths
+
+
+def legacy_filter(paths, extensions, exclude_keywords, logger):
+    """旧版scan_directory中的逐文件过滤逻辑"""
+    kept = 0
+    for file, file_path in paths:
+        if not any(file.lower().endswith(ext.lower()) for ext in extensions):
+            continue
+        matched_keyword = None
+        for keyword in exclude_keywords:
+            if keyword.lower() in file_path.lower():
+                matched_keyword = keyword
+                logger.debug(f"文件[{file_path}]包含排除关键字[{keyword}]，将被排除。")
+                break
+            else:
+                logger.debug(f"文件[{file_path}]未包含排除关键字[{keyword}]。")
+        if matched_keyword:
+            continue
+        kept += 1
+    return kept
+
+
+def compiled_filter(paths, extensions, exclude_keywords):
+    """PathFilter的逐文件过滤"""
+    path_filter = PathFilter(extensions, exclude_keywords)
+    kept = 0
+    for file, file_path in paths:
+        if not path_filter.match_extension(file):
+            continue
+        if path_filter.match_keyword(file_path):
+            continue
+        kept += 1
+    return kept
+
+
+def measure(func, *args):
+    """取三次运行中最快的一次"""
+    best = None
+    result = None
+    for _ in range(3):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    extensions = MD5Calculator().default_extensions
+    logger = logging.getLogger("bench_path_filter")
+    logger.setLevel(logging.INFO)
+    paths = make_paths(count)
+
+    legacy_time, legacy_kept = measure(legacy_filter, paths, extensions, EXCLUDE_KEYWORDS, logger)
+    compiled_time, compiled_kept = measure(compiled_filter, paths, extensions, EXCLUDE_KEYWORDS)
+    if legacy_kept != compiled_kept:
+        raise SystemExit(f"过滤结果不一致: 旧实现 {legacy_kept}，PathFilter {compiled_kept}")
+
+    print(f"文件数: {count}，扩展名: {len(extensions)} 个，排除关键字: {len(EXCLUDE_KEYWORDS)} 个，通过过滤: {compiled_kept}")
+    print(f"旧实现:     {legacy_time * 1e9 / count:8.0f} ns/文件")
+    print(f"PathFilter: {compiled_time * 1e9 / count:8.0f} ns/文件")
+    print(f"加速比:     {legacy_time / compiled_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -441,10 +441,42 @@ class MainWindow(QMainWindow):
                             dialog = AutoExecDialog(self, modules_to_exec)
                             if dialog.exec_() == QDialog.Accepted:
                                 self.execute_auto_modules(modules_to_exec)
+                                self.apply_scan_rate_limit(config)
+                                self.watch_scan_rate_limit(config_file)
                                 
             except Exception as e:
                 logger.error(f"读取自动执行配置失败: {str(e)}")
 
+    def apply_scan_rate_limit(self, config):
+        """把自动执行配置中的读取限速应用到MD5计算和文件校验，正在进行的扫描立即生效"""
+        mb_per_sec = config.get('scan_rate_limit_mbps', 0) or 0
+        files_per_sec = config.get('scan_rate_limit_files', 0) or 0
+        if self.md5_calculator_window:
+            self.md5_calculator_window.set_rate_limit(mb_per_sec, files_per_sec)
+        if self.file_verify_window:
+            self.file_verify_window.set_rate_limit(mb_per_sec, files_per_sec)
+        logger.info(f"自动执行读取限速: {mb_per_sec or '不限'}MB/秒，{files_per_sec or '不限'}个/秒")
+
+    def watch_scan_rate_limit(self, config_file):
+        """自动执行的模块运行期间定期检查配置文件，修改限速后无需重启即可生效"""
+        self.rate_limit_config_mtime = os.path.getmtime(config_file)
+        self.rate_limit_timer = QTimer(self)
+        self.rate_limit_timer.timeout.connect(lambda: self.reload_scan_rate_limit(config_file))
+        self.rate_limit_timer.start(5000)
+
+    def reload_scan_rate_limit(self, config_file):
+        """配置文件修改时间变化后重新读取读取限速"""
+        try:
+            mtime = os.path.getmtime(config_file)
+            if mtime == self.rate_limit_config_mtime:
+                return
+            self.rate_limit_config_mtime = mtime
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+            self.apply_scan_rate_limit(config)
+        except Exception as e:
+            logger.error(f"重新读取自动执行限速配置失败: {str(e)}")
+
     def execute_auto_modules(self, modules):
         """执行自动模块"""
         for module in modules:
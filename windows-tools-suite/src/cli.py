@@ -0,0 +1,260 @@
+"""
+命令行入口，只依赖 src/core，不导入PyQt5、paramiko、pysmb和winreg，可在Linux服务器和定时任务中使用。
+在 windows-tools-suite 目录下运行：
+    python -m src.cli scan DIR [DIR ...] [--extensions .exe,.dll] [--exclude-hours 4] ...
+    python -m src.cli generate DIR --size-min 1 --size-max 10 --unit MB --count 1000
+    python -m src.cli verify DIR
+    python -m src.cli replay DIR/轮次目录 [--target DIR] [--hashes-only]
+输出文件的格式和位置与图形界面一致。核心模块在子命令中按需导入，启动时间只有几十毫秒。
+退出码：0 成功，1 校验发现不一致文件或扫描被中断，2 参数或运行错误。
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+
+
+def parse_device_workers(items):
+    """解析 路径=线程数 形式的按设备线程数设置"""
+    device_workers = {}
+    for item in items or []:
+        path, _, workers = item.rpartition("=")
+        if not path or not workers.isdigit() or int(workers) < 1:
+            raise argparse.ArgumentTypeError(f"磁盘线程数格式错误: {item}，应为 路径=线程数")
+        device_workers[path] = int(workers)
+    return device_workers
+
+
+def split_list(value):
+    """逗号分隔的列表，去掉空白项"""
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def install_stop_handler(stop):
+    """Ctrl+C 或 SIGTERM 时协作式停止，已完成的结果照常写出"""
+    def handler(signum, frame):
+        stop()
+    signal.signal(signal.SIGINT, handler)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, handler)
+
+
+def install_generator_stop_handler(generator):
+    """
+    文件生成的停止处理：停止请求会唤醒正在等待的线程，不能在信号处理函数中直接设置事件
+    （主线程可能正持有同一个事件的锁），交给一个短暂的线程去做
+    """
+    install_stop_handler(lambda: threading.Thread(target=generator.request_stop, daemon=True).start())
+
+
+def run_scan(args):
+    from .core.md5_calculator import MD5Calculator
+
+    calculator = MD5Calculator()
+    calculator.output_dir = args.output_dir
+    if args.workers:
+        calculator.set_max_workers(args.workers)
+    calculator.device_parallel = not args.no_device_parallel
+    calculator.set_device_workers(parse_device_workers(args.device_workers))
+    calculator.set_rate_limit(args.rate_mb, args.rate_files)
+    extensions = split_list(args.extensions) if args.extensions else calculator.default_extensions
+    install_stop_handler(calculator.request_stop)
+    output_file = calculator.scan_directory(
+        args.directories, extensions, args.exclude_hours, split_list(args.exclude_keywords), args.time_type,
+        cache_mode=args.cache, aggregate_mode=args.aggregate, resume=args.resume, streaming=args.streaming,
+        prune_dirs=args.prune_dirs, fingerprint=args.fingerprint, fingerprint_reference=args.fingerprint_reference
+    )
+    if output_file:
+        print(output_file)
+    # 停止后保留断点文件，用 --resume 继续
+    return 1 if calculator.checkpoint_file else 0
+
+
+def load_workload_profiles(path):
+    """读取自定义负载模型：YAML或JSON文件中的 workload_profiles 项，与 filegen_config.yaml 格式相同"""
+    if not path:
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            import json
+            config = json.load(f)
+        else:
+            import yaml
+            config = yaml.safe_load(f)
+    return (config or {}).get('workload_profiles') or {}
+
+
+def run_generate(args):
+    from .core.file_generator import FileGenerator, format_throughput, format_cleanup, format_schedule
+
+    def progress(stage, files_dir, files_created, max_files, total_size, round_number, throughput=None):
+        if stage == 'start':
+            print(f"第{round_number}轮：开始文件生成，目录：{files_dir}", flush=True)
+            if args.loop:
+                print(f"第{round_number}轮：{format_schedule(stage, throughput)}", flush=True)
+        elif stage == 'loop_wait':
+            print(f"第{round_number}轮：{format_schedule(stage, throughput)}", flush=True)
+        elif stage == 'rate':
+            print(format_throughput(throughput), flush=True)
+        elif stage == 'cleanup':
+            print(format_cleanup(files_dir, files_created, max_files, throughput), flush=True)
+        elif stage == 'finished':
+            print(f"第{round_number}轮：共生成了 {files_created} 个文件，总大小 {total_size} 字节", flush=True)
+            print(format_throughput(throughput), flush=True)
+            print(generator.stats_message(), flush=True)
+
+    def on_stopped(files_dir, files_created, max_files, total_size, round_number):
+        print(f"第{round_number}轮：已停止，已生成 {files_created}/{max_files} 个文件，目录：{files_dir}", flush=True)
+
+    generator = FileGenerator(
+        args.target_dir, args.size_min, args.size_max, args.unit, args.count,
+        is_loop=args.loop, interval=args.interval, repeat_interval=args.repeat_interval,
+        delete_after=args.delete_after, max_repeat_count=args.repeat_count,
+        content_mode=args.content or ('prng' if args.seed is not None else 'urandom'), seed=args.seed, writers=args.writers,
+        rate_mb=args.rate_mb, rate_files=args.rate_files, burst_active=args.burst_active, burst_idle=args.burst_idle,
+        workload=args.profile, workload_profiles=load_workload_profiles(args.profiles_file),
+        write_policy=args.write_policy, preallocate=args.preallocate,
+        cleanup_backlog=args.cleanup_backlog, cleanup_rate_files=args.cleanup_rate, schedule_mode=args.schedule
+    )
+    install_generator_stop_handler(generator)
+    generator.generate_files(progress_callback=progress, stopped_callback=on_stopped)
+    return 1 if generator.control.stop_requested() else 0
+
+
+def run_replay(args):
+    from .core.file_generator import FileGenerator, load_dataset_manifest
+
+    manifest = load_dataset_manifest(args.manifest)
+    generator = FileGenerator.from_manifest(manifest, args.target, writers=args.writers)
+    install_generator_stop_handler(generator)
+    stop_requested = generator.control.stop_requested
+    if args.hashes_only:
+        # 只重新计算期望的文件名和MD5，不写文件
+        for file_name, size in generator.expected_files(stop_flag=stop_requested):
+            print(f"{file_name}\t{size}", flush=True)
+        return 1 if stop_requested() else 0
+
+    def on_stopped(files_dir, files_created, max_files, total_size, round_number):
+        print(f"已停止，已生成 {files_created}/{max_files} 个文件，目录：{files_dir}", flush=True)
+
+    def on_finished(files_dir, files_created, total_size):
+        print(f"已重新生成 {files_created} 个文件，总大小 {total_size} 字节，目录：{files_dir}", flush=True)
+
+    generator.generate_files(finished_callback=on_finished, stopped_callback=on_stopped)
+    return 1 if stop_requested() else 0
+
+
+def run_verify(args):
+    from .core.file_verifier import FileVerifier
+    from .core.rate_limiter import RateLimiter
+
+    stopped = []
+    install_stop_handler(lambda: stopped.append(True))
+    verifier = FileVerifier(args.target_dir, RateLimiter(args.rate_mb, args.rate_files))
+    verifier.verify(
+        args.output_dir or os.path.join(os.getcwd(), 'output'),
+        message_callback=lambda message: print(message, flush=True),
+        stop_flag=lambda: bool(stopped)
+    )
+    return 1 if verifier.error_files or stopped else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Windows工具集命令行：MD5扫描、文件产生、文件校验")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rate_parent = argparse.ArgumentParser(add_help=False)
+    rate_parent.add_argument("--rate-mb", type=float, default=0, help="读取限速（MB/秒），0为不限")
+    rate_parent.add_argument("--rate-files", type=float, default=0, help="读取限速（个/秒），0为不限")
+
+    scan = subparsers.add_parser("scan", parents=[rate_parent], help="扫描目录并计算MD5，输出md5-N.log和record.log")
+    scan.add_argument("directories", nargs="+", help="扫描目录")
+    scan.add_argument("--extensions", help="文件扩展名，逗号分隔，*表示所有文件（默认与界面相同）")
+    scan.add_argument("--exclude-hours", type=float, default=4, help="排除最近N小时内的文件（默认4）")
+    scan.add_argument("--exclude-keywords", default="", help="排除关键字，逗号分隔")
+    scan.add_argument("--time-type", choices=["modified", "created", "accessed"], default="modified")
+    cache = scan.add_mutually_exclusive_group()
+    cache.add_argument("--cache", choices=["off", "trust", "verify"], default="off", help="增量哈希缓存模式")
+    cache.add_argument("--trust-cache", dest="cache", action="store_const", const="trust", help="同 --cache trust")
+    cache.add_argument("--verify-cache", dest="cache", action="store_const", const="verify", help="同 --cache verify")
+    scan.add_argument("--aggregate", choices=["ordered", "unordered"], default="ordered", help="record.log中的总值")
+    scan.add_argument("--resume", action="store_true", help="从参数一致的断点继续")
+    scan.add_argument("--streaming", action="store_true", help="低内存模式")
+    scan.add_argument("--prune-dirs", action="store_true", help="路径包含排除关键字的子目录整体跳过")
+    scan.add_argument("--fingerprint", action="store_true", help="快速指纹模式")
+    scan.add_argument("--fingerprint-reference", help="参考指纹清单，默认为最新的指纹清单")
+    scan.add_argument("--workers", type=int, help="并发计算线程数")
+    scan.add_argument("--device-workers", nargs="*", metavar="PATH=N", help="按磁盘设置线程数")
+    scan.add_argument("--no-device-parallel", action="store_true", help="多个磁盘不同时扫描")
+    scan.add_argument("--output-dir", help="md5-N.log、record.log等结果目录，默认与界面相同")
+    scan.set_defaults(func=run_scan)
+
+    generate = subparsers.add_parser("generate", help="生成 编号.MD5.md5file 测试文件")
+    generate.add_argument("target_dir", help="文件生成目录")
+    generate.add_argument("--size-min", type=float, default=1, help="最小文件大小（默认1）")
+    generate.add_argument("--size-max", type=float, default=10, help="最大文件大小（默认10）")
+    generate.add_argument("--unit", choices=["KB", "MB", "GB"], default="MB")
+    generate.add_argument("--count", type=int, default=1000, help="每轮文件数（默认1000）")
+    generate.add_argument("--interval", type=float, default=0.01, help="文件间隔秒数（默认0.01）")
+    generate.add_argument("--loop", action="store_true", help="重复模式")
+    generate.add_argument("--repeat-count", type=int, help="重复次数，默认无限")
+    generate.add_argument("--repeat-interval", type=float, default=0, help="每轮间隔秒数")
+    generate.add_argument("--schedule", choices=["fixed_delay", "fixed_rate"], default="fixed_delay",
+                          help="重复模式的轮次调度：fixed_delay 上一轮结束后等待间隔，fixed_rate 按开始时间每隔固定秒数一轮（默认fixed_delay）")
+    generate.add_argument("--delete-after", action="store_true", help="生成后删除文件（后台删除，不阻塞下一轮）")
+    generate.add_argument("--cleanup-backlog", type=int, default=2, help="后台删除最多积压的轮次目录数，积压已满时下一轮等待（默认2）")
+    generate.add_argument("--cleanup-rate", type=float, default=0, help="后台删除限速（个/秒），0为不限")
+    generate.add_argument("--content", choices=["urandom", "prng", "aes", "pattern"],
+                          help="文件内容引擎：系统随机数、快速伪随机、AES-CTR密钥流、重复模式（默认urandom，设置种子时为prng）")
+    generate.add_argument("--seed", help="确定性模式的种子：相同种子和参数生成完全相同的文件大小、文件名和内容")
+    generate.add_argument("--writers", type=int, default=1, help="每轮同时写文件的线程数（默认1）")
+    generate.add_argument("--rate-mb", type=float, default=0, help="写入限速（MB/秒），0为不限")
+    generate.add_argument("--rate-files", type=float, default=0, help="写入限速（个/秒），0为不限")
+    generate.add_argument("--burst-active", type=float, default=0, help="突发模式：每个周期写入的秒数")
+    generate.add_argument("--burst-idle", type=float, default=0, help="突发模式：每个周期空闲的秒数")
+    generate.add_argument("--profile", default="uniform",
+                          help="负载模型：uniform、small_files、mixed、pareto、deep_tree 或自定义模型名（默认uniform）")
+    generate.add_argument("--profiles-file", help="自定义负载模型文件（YAML/JSON中的workload_profiles，可直接使用filegen_config.yaml）")
+    generate.add_argument("--write-policy", choices=["buffered", "fsync_file", "fsync_round", "dsync", "direct"], default="buffered",
+                          help="写入策略：只写系统缓存、每个文件fsync、每轮结束fsync、O_DSYNC、O_DIRECT（默认buffered，后两种Windows不支持）")
+    generate.add_argument("--preallocate", action="store_true", help="写入前按文件大小预分配空间")
+    generate.set_defaults(func=run_generate)
+
+    replay = subparsers.add_parser("replay", help="按轮次目录中的dataset_manifest.json重新生成确定性数据集")
+    replay.add_argument("manifest", help="数据集清单文件或轮次目录")
+    replay.add_argument("--target", help="生成目录，默认为原来的目标目录")
+    replay.add_argument("--hashes-only", action="store_true", help="只输出期望的文件名和大小，不写文件")
+    replay.add_argument("--writers", type=int, default=1, help="同时写文件的线程数（默认1）")
+    replay.set_defaults(func=run_replay)
+
+    verify = subparsers.add_parser("verify", parents=[rate_parent], help="校验.md5file文件，输出verify_result_时间.txt")
+    verify.add_argument("target_dir", help="校验目录")
+    verify.add_argument("--output-dir", help="结果目录，默认为当前目录下的output")
+    verify.set_defaults(func=run_verify)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "scan":
+        try:
+            parse_device_workers(args.device_workers)
+        except argparse.ArgumentTypeError as e:
+            parser.error(str(e))
+    if args.command == "generate" and args.size_min > args.size_max:
+        parser.error("最小文件大小不能大于最大文件大小")
+    if args.command in ("generate", "replay") and args.writers < 1:
+        parser.error("写入线程数至少为1")
+    if args.command == "generate" and args.cleanup_backlog < 1:
+        parser.error("后台删除积压数至少为1")
+    try:
+        return args.func(args)
+    except Exception as e:
+        print(f"执行出错: {str(e)}", file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
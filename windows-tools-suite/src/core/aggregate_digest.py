@@ -0,0 +1,64 @@
+import hashlib
+
+
+class AggregateDigest:
+    """
+    与处理顺序无关的聚合摘要。
+    每个 (路径, MD5) 先计算SHA256，再以 2^256 为模累加，累加满足交换律和结合律，
+    因此结果与遍历顺序、并发计算顺序、目录输入顺序无关；
+    多个分片（多台机器或多个目录）的结果可以直接相加合并后再比较。
+    """
+    MODULUS = 1 << 256
+
+    def __init__(self, value=0, count=0):
+        self.value = value % self.MODULUS
+        self.count = count
+
+    def update(self, path, md5):
+        """加入一个文件的MD5结果"""
+        digest = hashlib.sha256(f"{path}\t{md5}".encode('utf-8', errors='surrogateescape')).digest()
+        self.value = (self.value + int.from_bytes(digest, 'big')) % self.MODULUS
+        self.count += 1
+
+    def merge(self, other):
+        """合并另一个分片的聚合结果"""
+        self.value = (self.value + other.value) % self.MODULUS
+        self.count += other.count
+        return self
+
+    def hexdigest(self):
+        return f"{self.value:064x}"
+
+    def get_state(self):
+        """导出可序列化的中间状态，用于断点保存"""
+        return {'value': self.hexdigest(), 'count': self.count}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(int(state['value'], 16), state.get('count', 0))
+
+    @classmethod
+    def from_hexdigest(cls, hexdigest):
+        """从record.log中记录的摘要恢复，用于合并多个分片的结果"""
+        return cls(int(hexdigest, 16))
+
+    @classmethod
+    def combine(cls, hexdigests):
+        """合并多个分片的摘要，返回合并后的十六进制摘要"""
+        total = cls()
+        for hexdigest in hexdigests:
+            total.merge(cls.from_hexdigest(hexdigest))
+        return total.hexdigest()
+
+    @classmethod
+    def from_manifest(cls, manifest_file):
+        """从md5-N.log结果文件计算聚合摘要，用于与历史结果比较"""
+        aggregate = cls()
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if not line:
+                    continue
+                file_path, _, md5 = line.rpartition('\t')
+                aggregate.update(file_path, md5)
+        return aggregate
@@ -0,0 +1,253 @@
+import os
+import time
+import random
+import hashlib
+
+BLOCK_SIZE = 4 * 1024 * 1024  # 必须是2的幂
+SEGMENT_SIZE = 256 * 1024
+PRNG_TABLES = 256
+PATTERN_SIZE = 4096
+# read_into 的缓冲区比请求的大小多出的字节，AES的update_into要求输出缓冲区多出一个分组
+BUFFER_SLACK = 16
+
+# 内容引擎：名称 -> 显示名称
+CONTENT_MODES = {
+    'urandom': '系统随机数(os.urandom)',
+    'prng': '快速伪随机',
+    'aes': 'AES-CTR密钥流',
+    'pattern': '重复模式',
+}
+
+
+def available_content_modes():
+    """当前环境可用的内容引擎，AES-CTR需要cryptography包"""
+    modes = []
+    for mode in CONTENT_MODES:
+        if mode == 'aes':
+            try:
+                import cryptography.hazmat.primitives.ciphers  # noqa: F401
+            except ImportError:
+                continue
+        modes.append(mode)
+    return modes
+
+
+def create_content_engine(mode='urandom', seed=None):
+    """按名称创建内容引擎，seed为None时每次运行内容不同"""
+    engines = {
+        'urandom': UrandomEngine,
+        'prng': PRNGEngine,
+        'aes': AESCTREngine,
+        'pattern': PatternEngine,
+    }
+    if mode not in engines:
+        raise ValueError(f"未知的内容引擎: {mode}，可选: {', '.join(CONTENT_MODES)}")
+    if mode == 'urandom':
+        return UrandomEngine()
+    return engines[mode](seed)
+
+
+def allocate_buffer(size):
+    """分配可重复用于 read_into 的缓冲区，能容纳 size 字节"""
+    return bytearray(size + BUFFER_SLACK)
+
+
+def seed_bytes(seed, size):
+    """把任意种子展开为固定长度的字节"""
+    return hashlib.sha256(str(seed).encode('utf-8')).digest()[:size]
+
+
+class ContentEngine:
+    """
+    测试文件内容引擎的基类：read(size) 按顺序返回内容流中的下一段数据，并统计自身的生成速度。
+    返回值可能是引擎内部缓冲区的memoryview，只保证在下一次调用read之前有效。
+    read_into(buffer, size) 把同样的内容直接写入调用方的缓冲区（由 allocate_buffer 分配），缓冲区可循环复用；
+    内容本身是不可变bytes的引擎不复制，直接返回这些数据的视图。
+    """
+    mode = None
+    reproducible = True
+
+    def __init__(self):
+        self.bytes_generated = 0
+        self.seconds = 0.0
+
+    @property
+    def display_name(self):
+        return CONTENT_MODES[self.mode]
+
+    def read(self, size):
+        start = time.perf_counter()
+        data = self._generate(size)
+        self.seconds += time.perf_counter() - start
+        self.bytes_generated += size
+        return data
+
+    def read_into(self, buffer, size):
+        """返回内容流下一段的memoryview，通常是写入内容后的 buffer[:size]，在缓冲区被再次使用之前有效"""
+        start = time.perf_counter()
+        view = self._generate_into(buffer, size)
+        self.seconds += time.perf_counter() - start
+        self.bytes_generated += size
+        return view
+
+    def _generate(self, size):
+        raise NotImplementedError
+
+    def _generate_into(self, buffer, size):
+        # read 的返回值可能是引擎内部会被复用的缓冲区，必须复制
+        buffer[:size] = self._generate(size)
+        return memoryview(buffer)[:size]
+
+    def reseed(self, seed):
+        """从种子重新开始内容流，同一引擎的相同种子得到相同内容；用于按文件复现内容"""
+        raise NotImplementedError(f"{self.display_name}无法按种子复现内容")
+
+    def throughput(self):
+        """生成速度 MB/秒，尚未生成时为0"""
+        if self.seconds <= 0:
+            return 0.0
+        return self.bytes_generated / (1024 * 1024) / self.seconds
+
+    def stats_message(self):
+        return (f"内容引擎 {self.display_name}: 共生成 {self.bytes_generated / (1024 * 1024):.1f}MB，"
+                f"生成速度 {self.throughput():.1f}MB/秒")
+
+
+class UrandomEngine(ContentEngine):
+    """操作系统的密码学安全随机数，速度受限于系统熵源，不可复现"""
+    mode = 'urandom'
+    reproducible = False
+
+    def _generate(self, size):
+        return os.urandom(size)
+
+    def _generate_into(self, buffer, size):
+        # os.urandom 每次返回新的bytes，不必复制到缓冲区
+        return memoryview(self._generate(size))
+
+
+class PRNGEngine(ContentEngine):
+    """
+    可设种子的快速伪随机内容：用种子生成一个4MB的随机基础块和256张随机的字节置换表，
+    之后每256KB内容随机选取基础块中的一个循环起点和一张置换表，用bytes.translate映射得到，全部在C层完成，
+    速度是os.urandom的数倍。各段内容互不相同且不可压缩，足以避免存储的去重和压缩；不具备密码学强度。
+    相同种子产生完全相同的内容流，与每次读取的大小无关；reseed只重置段选取序列，不重新生成基础块，开销很小。
+    """
+    mode = 'prng'
+
+    def __init__(self, seed=None):
+        super().__init__()
+        rng = random.Random(seed)
+        base = rng.getrandbits(BLOCK_SIZE * 8).to_bytes(BLOCK_SIZE, 'little')
+        self._doubled = base + base
+        self._tables = []
+        for _ in range(PRNG_TABLES):
+            table = list(range(256))
+            rng.shuffle(table)
+            self._tables.append(bytes(table))
+        self.reseed(rng.getrandbits(64))
+
+    def reseed(self, seed):
+        self.rng = random.Random(seed)
+        self._position = SEGMENT_SIZE
+
+    def _next_segment(self):
+        choice = self.rng.getrandbits(30)
+        self._offset = choice & (BLOCK_SIZE - 1)
+        self._table = self._tables[choice >> 22]
+        self._position = 0
+
+    def _generate(self, size):
+        parts = []
+        remaining = size
+        while remaining > 0:
+            if self._position >= SEGMENT_SIZE:
+                self._next_segment()
+            # 逐字节映射，段内任意一段的映射结果等于整段映射后的对应部分，不必生成整段
+            n = min(remaining, SEGMENT_SIZE - self._position)
+            start = self._offset + self._position
+            parts.append(self._doubled[start:start + n].translate(self._table))
+            self._position += n
+            remaining -= n
+        if len(parts) == 1:
+            return parts[0]
+        return b''.join(parts)
+
+    def _generate_into(self, buffer, size):
+        view = memoryview(buffer)
+        filled = 0
+        while filled < size:
+            if self._position >= SEGMENT_SIZE:
+                self._next_segment()
+            n = min(size - filled, SEGMENT_SIZE - self._position)
+            start = self._offset + self._position
+            view[filled:filled + n] = self._doubled[start:start + n].translate(self._table)
+            self._position += n
+            filled += n
+        return view[:size]
+
+
+class AESCTREngine(ContentEngine):
+    """
+    AES-256-CTR密钥流：对全零缓冲区加密得到密码学强度的伪随机内容，有AES-NI时可达数GB/秒。
+    密钥由种子经SHA-256得到，未设种子时使用随机密钥；依赖cryptography包。
+    """
+    mode = 'aes'
+
+    def __init__(self, seed=None):
+        super().__init__()
+        try:
+            from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        except ImportError:
+            raise RuntimeError("AES-CTR内容引擎需要cryptography包，请先安装: pip install cryptography")
+        self._cipher_factory = lambda key: Cipher(algorithms.AES(key), modes.CTR(b'\0' * 16)).encryptor()
+        self._encryptor = self._cipher_factory(os.urandom(32) if seed is None else seed_bytes(seed, 32))
+        self._zeros = b''
+        self._buffer = bytearray()
+
+    def reseed(self, seed):
+        self._encryptor = self._cipher_factory(seed_bytes(seed, 32))
+
+    def _generate(self, size):
+        if len(self._zeros) < size:
+            self._zeros = bytes(size)
+            # update_into要求输出缓冲区比输入多出一个分组减一的长度
+            self._buffer = bytearray(size + 15)
+        written = self._encryptor.update_into(memoryview(self._zeros)[:size], self._buffer)
+        return memoryview(self._buffer)[:written]
+
+    def _generate_into(self, buffer, size):
+        # 直接加密到调用方的缓冲区，省去一次复制
+        if len(self._zeros) < size:
+            self._zeros = bytes(size)
+        self._encryptor.update_into(memoryview(self._zeros)[:size], buffer)
+        return memoryview(buffer)[:size]
+
+
+class PatternEngine(ContentEngine):
+    """
+    重复模式：同一个4KB块（由种子生成）首尾相接循环重复，几乎不占用CPU，只测试纯写入带宽。
+    内容高度可去重、可压缩，启用了去重或压缩的存储上测得的速度会偏高。
+    """
+    mode = 'pattern'
+
+    def __init__(self, seed=None):
+        super().__init__()
+        self.reseed(seed)
+
+    def reseed(self, seed):
+        self.pattern = random.Random(seed).getrandbits(PATTERN_SIZE * 8).to_bytes(PATTERN_SIZE, 'little')
+        self._buffer = self.pattern
+        self._position = 0
+
+    def _generate(self, size):
+        # 缓冲区至少比请求多一个块，任意起始位置都能直接切片，不复制数据
+        if len(self._buffer) < size + PATTERN_SIZE:
+            self._buffer = self.pattern * (size // PATTERN_SIZE + 2)
+        start = self._position
+        self._position = (start + size) % PATTERN_SIZE
+        return memoryview(self._buffer)[start:start + size]
+
+    def _generate_into(self, buffer, size):
+        # 重复块是不可变的bytes，返回的视图一直有效，不必复制
+        return self._generate(size)
@@ -0,0 +1,199 @@
+import os
+import pickle
+import tempfile
+import threading
+from .scan_pipeline import ScanPipeline
+from ..utils.logger import get_logger
+
+
+class RootEnd:
+    """设备流水线中标记一个扫描根目录结束的任务，直接透传到暂存文件"""
+    def __init__(self, root_index):
+        self.root_index = root_index
+
+
+def group_by_device(directories):
+    """
+    按所在物理设备（st_dev）对扫描根目录分组，返回 [(设备号, [根目录序号, ...])]，按首次出现的顺序排列。
+    无法获取设备号的目录（例如不存在，遍历时不会产生任务）归入第一个设备的分组
+    """
+    devices = []
+    for directory in directories:
+        try:
+            devices.append(os.stat(directory).st_dev)
+        except OSError:
+            devices.append(None)
+    fallback = next((device for device in devices if device is not None), None)
+    groups = {}
+    for index, device in enumerate(devices):
+        groups.setdefault(fallback if device is None else device, []).append(index)
+    return list(groups.items())
+
+
+def resolve_device_workers(device_workers):
+    """把 {设备上的任意路径或设备号: 线程数} 转换为 {设备号: 线程数}，无法访问的路径忽略"""
+    resolved = {}
+    for key, workers in (device_workers or {}).items():
+        if isinstance(key, int):
+            resolved[key] = int(workers)
+            continue
+        try:
+            resolved[os.stat(key).st_dev] = int(workers)
+        except OSError:
+            continue
+    return resolved
+
+
+class DeviceLane:
+    """
+    一个设备上的独立流水线：遍历该设备上的根目录并计算，结果按遍历顺序序列化到磁盘暂存文件，
+    写入线程再按顺序读取，因此其他设备的结果尚未轮到写入时，本设备也不会因内存限制而停顿
+    """
+    # 暂存数据达到该大小或计算结果暂时处理完时写入磁盘
+    FLUSH_BYTES = 64 * 1024
+
+    def __init__(self, device, root_indexes, walk_root, process, hash_workers, queue_size, stop_event, spool_dir):
+        self.device = device
+        self.root_indexes = root_indexes
+        self.walk_root = walk_root
+        self.hash_workers = hash_workers
+        fd, self.spool_file = tempfile.mkstemp(prefix="scan-spool-", suffix=".tmp", dir=spool_dir)
+        self._writer = os.fdopen(fd, 'wb')
+        self._reader = open(self.spool_file, 'rb')
+        self._pending = bytearray()
+        self._pending_count = 0
+        self._available = 0
+        self._consumed = 0
+        self._condition = threading.Condition()
+        self.finished = False
+        self.error = None
+        self.pipeline = ScanPipeline(
+            self._walk, lambda task: task if isinstance(task, RootEnd) else process(task), self._spool,
+            hash_workers=hash_workers, queue_size=queue_size, stop_event=stop_event
+        )
+        self.thread = threading.Thread(target=self._run, name=f"scan-device-{device}", daemon=True)
+
+    def _walk(self, emit):
+        for root_index in self.root_indexes:
+            self.walk_root(root_index, emit)
+            emit(RootEnd(root_index))
+
+    def _spool(self, task, result):
+        self._pending += pickle.dumps((task, result), protocol=pickle.HIGHEST_PROTOCOL)
+        self._pending_count += 1
+        if len(self._pending) >= self.FLUSH_BYTES or self.pipeline.result_queue.empty():
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._writer.write(self._pending)
+            self._writer.flush()
+            self._pending = bytearray()
+        with self._condition:
+            self._available += self._pending_count
+            self._pending_count = 0
+            self._condition.notify_all()
+
+    def _run(self):
+        try:
+            self.pipeline.run()
+        except Exception as e:
+            self.error = e
+        finally:
+            try:
+                self._flush()
+            finally:
+                with self._condition:
+                    self.finished = True
+                    self._condition.notify_all()
+
+    def next_record(self):
+        """按顺序读取下一条 (任务, 结果)，流水线已结束且没有更多记录时返回None"""
+        with self._condition:
+            while self._consumed >= self._available and not self.finished:
+                self._condition.wait(0.5)
+            if self._consumed >= self._available:
+                return None
+            self._consumed += 1
+        return pickle.load(self._reader)
+
+    def close(self):
+        self._writer.close()
+        self._reader.close()
+        if os.path.exists(self.spool_file):
+            os.remove(self.spool_file)
+
+
+class DeviceScheduler:
+    """
+    按物理设备调度的多目录扫描，接口与ScanPipeline一致（run、cancelled、stats_message）。
+    每个设备一条独立的 遍历 -> 计算 流水线，计算线程数可按设备单独设置，不同磁盘同时满速读取，
+    同一磁盘上的目录仍由同一组线程处理，避免多组线程争抢同一块磁盘。
+    写入阶段在调用 run() 的线程中按目录输入顺序依次读取各设备的结果并调用 consume(task, result)，
+    输出与逐个目录顺序扫描完全一致。
+    walk_root(根目录序号, emit) 遍历单个根目录，process(task) 计算单个任务。
+    """
+    def __init__(self, directories, walk_root, process, consume, device_workers=None, hash_workers=1, queue_size=1000,
+                 stop_event=None, spool_dir=None):
+        self.logger = get_logger(__name__)
+        self.consume = consume
+        self.directories = directories
+        self.cancelled = False
+        self.stop_event = stop_event or threading.Event()
+        workers = resolve_device_workers(device_workers)
+        self.lanes = []
+        self.lane_of_root = {}
+        for device, root_indexes in group_by_device(directories):
+            lane_workers = max(1, workers.get(device, hash_workers))
+            lane = DeviceLane(device, root_indexes, walk_root, process, lane_workers, queue_size, self.stop_event,
+                              spool_dir or tempfile.gettempdir())
+            self.lanes.append(lane)
+            for root_index in root_indexes:
+                self.lane_of_root[root_index] = lane
+            self.logger.info(
+                f"设备 {device}: {lane_workers} 个计算线程，目录: {', '.join(directories[i] for i in root_indexes)}"
+            )
+
+    def stop(self):
+        """请求协作式停止"""
+        self.stop_event.set()
+
+    def stats_message(self):
+        """各设备流水线的吞吐量汇总"""
+        return " || ".join(f"[设备{lane.device}] {lane.pipeline.stats_message()}" for lane in self.lanes)
+
+    def run(self):
+        """启动全部设备流水线，按目录顺序写入，全部写入或停止后返回"""
+        for lane in self.lanes:
+            lane.thread.start()
+        try:
+            for root_index in range(len(self.directories)):
+                lane = self.lane_of_root[root_index]
+                while True:
+                    record = None if self.stop_event.is_set() else lane.next_record()
+                    if record is None:
+                        # 收到停止请求，或设备流水线在该目录结束前退出（停止请求或出错）：
+                        # 已暂存但未写入的结果丢弃，与ScanPipeline停止时一致
+                        self.cancelled = True
+                        break
+                    task, result = record
+                    if isinstance(task, RootEnd):
+                        break
+                    self.consume(task, result)
+                if self.cancelled:
+                    break
+        except Exception as e:
+            self.logger.error(f"写入阶段出错: {str(e)}")
+            for lane in self.lanes:
+                lane.pipeline.abort_event.set()
+            raise
+        finally:
+            if self.cancelled:
+                self.stop_event.set()
+            for lane in self.lanes:
+                lane.thread.join()
+            for lane in self.lanes:
+                lane.close()
+        for lane in self.lanes:
+            if lane.error:
+                raise lane.error
@@ -0,0 +1,117 @@
+import os
+
+
+def walk_key(root, path):
+    """
+    计算文件在遍历顺序中的排序键：同一目录下文件排在子目录之前，文件和子目录各自按名称排序。
+    两个文件的排序键比较结果与 walk_directory 的产出先后一致。
+    以分隔符结尾的路径表示目录（如被剪枝的子目录），排在该目录中所有文件之后。
+    """
+    parts = os.path.relpath(path, root).split(os.sep)
+    if path.endswith(os.sep):
+        return tuple((1, name) for name in parts)
+    return tuple((1, name) for name in parts[:-1]) + ((0, parts[-1]),)
+
+
+def walk_directory(directory, resume_after=None, prune=None):
+    """
+    基于os.scandir的目录遍历，遍历顺序与 os.walk + dirs.sort() + files.sort() 一致。
+    每个目录产出 (root, file_entries)，file_entries 为按文件名排序的 DirEntry 列表，
+    调用方可直接复用 DirEntry 缓存的类型信息和 stat 结果，避免对每个文件重复发起系统调用。
+    与 os.walk 一样不进入指向目录的符号链接，无法读取的目录直接跳过。
+    resume_after 为上次处理到的文件路径时，跳过遍历顺序中位于该文件及之前的所有文件，
+    已完成的子目录整体剪枝，不再读取，用于断点续扫。
+    prune(子目录路径) 返回真时不进入该子目录，用于按目录排除整个子树。
+    """
+    cursor = None
+    if resume_after:
+        cursor = os.path.relpath(resume_after, directory).split(os.sep)
+
+    # 栈元素：(目录路径, 深度, 是否位于断点路径上)
+    stack = [(directory, 0, cursor is not None)]
+    while stack:
+        root, depth, on_cursor_path = stack.pop()
+        try:
+            with os.scandir(root) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        dirs = []
+        files = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                try:
+                    if not entry.is_symlink():
+                        dirs.append(entry.name)
+                except OSError:
+                    pass
+            else:
+                files.append(entry)
+
+        files.sort(key=lambda e: e.name)
+        dirs.sort()
+        next_dir = None
+        if on_cursor_path:
+            if depth == len(cursor) - 1:
+                # 断点文件所在目录：只处理断点之后的文件，子目录全部未处理
+                files = [e for e in files if e.name > cursor[-1]]
+            else:
+                # 断点文件在更深的子目录中：本目录文件已处理完，跳过断点路径之前的子目录
+                files = []
+                next_dir = cursor[depth]
+                dirs = [name for name in dirs if name >= next_dir]
+        yield root, files
+
+        # 在本目录文件处理完之后再判断剪枝，保证剪枝记录的先后与遍历顺序一致
+        if prune:
+            dirs = [name for name in dirs if not prune(os.path.join(root, name))]
+
+        # 逆序压栈，保证子目录按名称顺序出栈
+        for name in reversed(dirs):
+            stack.append((os.path.join(root, name), depth + 1, name == next_dir))
+
+
+def covered_subtrees(directories):
+    """
+    计算多个扫描根目录之间的重叠，返回与directories等长的列表，
+    第i项为根目录i中已被之前的根目录完整遍历过的子树（按根目录i遍历时的路径拼写）。
+    walk_directory不进入符号链接目录，单个根目录内不会重复产出同一文件，
+    只有根目录相互包含时才会出现重复文件，因此按子树判断即可，无需记录每个已处理的文件路径。
+    """
+    normalized = [os.path.normpath(d) for d in directories]
+    result = []
+    for i, directory in enumerate(normalized):
+        covered = []
+        for j in range(i):
+            other = normalized[j]
+            if directory == other or directory.startswith(os.path.join(other, '')):
+                # 当前根目录位于之前的根目录中，路径上没有符号链接时已被整体遍历
+                parts = os.path.relpath(directory, other).split(os.sep) if directory != other else []
+                path = other
+                linked = False
+                for name in parts:
+                    path = os.path.join(path, name)
+                    if os.path.islink(path):
+                        linked = True
+                        break
+                if not linked:
+                    covered = [directories[i]]
+                    break
+            elif other.startswith(os.path.join(directory, '')):
+                # 之前的根目录位于当前根目录中，该子树已遍历过
+                covered.append(os.path.join(directories[i], os.path.relpath(other, directory)))
+        result.append(covered)
+    return result
+
+
+def is_covered(root, subtrees):
+    """判断遍历到的目录是否位于covered_subtrees返回的某个子树中"""
+    for subtree in subtrees:
+        if root == subtree or root.startswith(os.path.join(subtree, '')):
+            return True
+    return False
@@ -0,0 +1,102 @@
+from difflib import SequenceMatcher
+
+
+def compare_files(left_file, right_file, progress_callback=None, logger=None):
+    """
+    按行对比两个文本文件，返回对齐后的结果，不依赖任何UI：
+    left_lines/right_lines 为对齐后两侧显示的行（缺失的一侧为空行），
+    left_diff_types/right_diff_types 为 {行号: 差异类型}，≠ 内容不同、- 左侧独有、+ 右侧独有。
+    progress_callback(消息) 报告进度文字
+    """
+    def report(message):
+        if progress_callback:
+            progress_callback(message)
+
+    if logger:
+        logger.info(f"开始对比文件: {left_file} 和 {right_file}")
+    report("正在读取文件...")
+
+    # 读取文件内容
+    with open(left_file, 'r', encoding='utf-8') as f:
+        left_lines = [line.rstrip('\n') for line in f.readlines()]
+    if logger:
+        logger.info(f"已读取左侧文件，共 {len(left_lines)} 行")
+
+    with open(right_file, 'r', encoding='utf-8') as f:
+        right_lines = [line.rstrip('\n') for line in f.readlines()]
+    if logger:
+        logger.info(f"已读取右侧文件，共 {len(right_lines)} 行")
+
+    report("正在对比差异...")
+
+    # 使用序列匹配器找出相似行
+    matcher = SequenceMatcher(None, left_lines, right_lines)
+
+    # 准备结果数据
+    aligned_left_lines = []   # 左侧显示的行
+    aligned_right_lines = []  # 右侧显示的行
+    left_diff_types = {}      # 左侧差异类型 {行号: 类型}
+    right_diff_types = {}     # 右侧差异类型 {行号: 类型}
+
+    # 处理每个匹配块
+    for tag, alo, ahi, blo, bhi in matcher.get_opcodes():
+        report(f"正在处理差异块: {tag}")
+
+        if tag == 'equal':
+            # 完全相同的部分
+            for i in range(alo, ahi):
+                aligned_left_lines.append(left_lines[i])
+                aligned_right_lines.append(right_lines[blo + (i - alo)])
+
+        elif tag == 'replace':
+            # 替换的部分（内容不同）
+            max_lines = max(ahi - alo, bhi - blo)
+            for i in range(max_lines):
+                left_pos = alo + i
+                right_pos = blo + i
+
+                if left_pos < ahi and right_pos < bhi:
+                    # 两边都有内容，但不同
+                    aligned_left_lines.append(left_lines[left_pos])
+                    aligned_right_lines.append(right_lines[right_pos])
+                    left_diff_types[len(aligned_left_lines)] = "≠"
+                    right_diff_types[len(aligned_right_lines)] = "≠"
+                elif left_pos < ahi:
+                    # 只有左边有内容
+                    aligned_left_lines.append(left_lines[left_pos])
+                    aligned_right_lines.append("")
+                    left_diff_types[len(aligned_left_lines)] = "-"
+                else:
+                    # 只有右边有内容
+                    aligned_left_lines.append("")
+                    aligned_right_lines.append(right_lines[right_pos])
+                    right_diff_types[len(aligned_right_lines)] = "+"
+
+        elif tag == 'delete':
+            # 删除的部分（左边独有）
+            for i in range(alo, ahi):
+                aligned_left_lines.append(left_lines[i])
+                aligned_right_lines.append("")
+                left_diff_types[len(aligned_left_lines)] = "-"
+
+        elif tag == 'insert':
+            # 插入的部分（右边独有）
+            for i in range(blo, bhi):
+                aligned_left_lines.append("")
+                aligned_right_lines.append(right_lines[i])
+                right_diff_types[len(aligned_right_lines)] = "+"
+
+    # 添加换行符
+    aligned_left_lines = [line + "\n" for line in aligned_left_lines]
+    aligned_right_lines = [line + "\n" for line in aligned_right_lines]
+
+    if logger:
+        logger.info(f"对比完成，找到 {len(left_diff_types) + len(right_diff_types)} 处差异")
+
+    return {
+        'left_lines': aligned_left_lines,
+        'right_lines': aligned_right_lines,
+        'left_diff_types': left_diff_types,
+        'right_diff_types': right_diff_types,
+        'total_lines': len(aligned_left_lines)
+    }
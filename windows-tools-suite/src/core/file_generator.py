@@ -1,103 +1,783 @@
 import os
+import json
 import hashlib
+import mmap
 import random
 import time
-import shutil
+import queue
+import threading
+from datetime import datetime
+from .hash_engine import MultiHasher
+from .content_engine import create_content_engine, allocate_buffer
+from .rate_limiter import RateLimiter
+from .workload_profile import resolve_workload
+from .latency_histogram import LatencyHistogram
+from .round_cleaner import RoundCleaner
+from .round_scheduler import RunControl, RoundScheduler
+
+MIB = 1024 * 1024
+RATE_SAMPLE_SECONDS = 1.0
+# 限速时每次写入不超过0.1秒的配额，速率更平稳；但不小于64KB，避免系统调用过多
+SHAPING_MIN_PIECE = 64 * 1024
+RATE_HISTORY_NAME = 'rate_history.csv'
+MANIFEST_NAME = 'dataset_manifest.json'
+MANIFEST_VERSION = 1
+# 每个写入线程的块缓冲区个数：一块在后台写入时生成并哈希下一块
+PIPELINE_BUFFERS = 2
+LATENCY_STATS_NAME = 'latency_stats.json'
+SCHEDULE_LOG_NAME = 'round_schedule.csv'
+# O_DIRECT 要求缓冲区地址、写入长度和文件偏移都按此对齐
+DIRECT_IO_ALIGNMENT = 4096
+
+# 写入策略：名称 -> 显示名称
+WRITE_POLICIES = {
+    'buffered': '缓存写入',
+    'fsync_file': '每个文件fsync',
+    'fsync_round': '每轮结束fsync',
+    'dsync': 'O_DSYNC同步写入',
+    'direct': 'O_DIRECT绕过缓存',
+}
+# 需要操作系统支持的打开标志，Windows没有
+POLICY_OPEN_FLAGS = {'dsync': 'O_DSYNC', 'direct': 'O_DIRECT'}
+
+
+def available_write_policies():
+    """当前系统支持的写入策略"""
+    return [policy for policy in WRITE_POLICIES
+            if policy not in POLICY_OPEN_FLAGS or hasattr(os, POLICY_OPEN_FLAGS[policy])]
+
+
+def allocate_aligned_buffer(size):
+    """按页对齐的缓冲区（匿名内存映射），用于O_DIRECT写入，末尾留出补齐到对齐长度的空间"""
+    return mmap.mmap(-1, size + DIRECT_IO_ALIGNMENT)
+
+
+def align_up(size, alignment=DIRECT_IO_ALIGNMENT):
+    return (size + alignment - 1) // alignment * alignment
+
+
+def load_dataset_manifest(path):
+    """读取轮次目录中的数据集清单，path 可以是清单文件或轮次目录"""
+    if os.path.isdir(path):
+        path = os.path.join(path, MANIFEST_NAME)
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"不支持的数据集清单版本: {manifest.get('version')}")
+    return manifest
+
+
+def format_timestamp(timestamp):
+    """精确到毫秒的本地时间"""
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+
+def format_schedule(stage, info):
+    """把 start 阶段的调度记录或 loop_wait 阶段的等待信息格式化为一行文字"""
+    if not info:
+        return ""
+    if stage == 'loop_wait':
+        return f"等待{info['wait_seconds']:.3f}秒，下一轮计划于 {format_timestamp(info['next_start_time'])} 开始"
+    message = f"计划开始 {format_timestamp(info['planned_time'])}，实际开始 {format_timestamp(info['start_time'])}，偏差 {info['slip'] * 1000:.1f}ms"
+    if info['missed']:
+        message += f"，上一轮超时跳过了{info['missed']}个周期"
+    return message
+
+
+def format_cleanup(path, deleted, pending, stats):
+    """把后台删除的进度格式化为一行文字"""
+    errors = f"，{stats['errors']}个删除失败" if stats['errors'] else ""
+    if stats['done']:
+        return (f"后台删除完成：{path}，{deleted}个文件，用时{stats['elapsed']:.1f}秒，"
+                f"删除线程忙碌{stats['busy_ratio']:.0%}{errors}")
+    return (f"后台删除中：{path}，已删除{deleted}个文件（{stats['files_per_sec']:.0f}个/秒，忙碌{stats['busy_ratio']:.0%}），"
+            f"共{pending}个目录等待删除{errors}")
+
+
+def format_throughput(throughput):
+    """把进度回调中的吞吐量统计格式化为一行文字，多个写入线程时附带每个线程的速度"""
+    if not throughput:
+        return ""
+    message = f"本轮吞吐量：{throughput['mb_per_sec']:.1f}MB/秒，{throughput['files_per_sec']:.1f}个/秒"
+    if len(throughput['writers']) > 1:
+        message += "（" + "，".join(
+            f"线程{writer['writer']} {writer['mb_per_sec']:.1f}MB/秒" for writer in throughput['writers']) + "）"
+    sample = throughput.get('rate_sample')
+    if sample:
+        mb_target = f"{sample['target_mb_per_sec']:.1f}MB/秒" if sample['target_mb_per_sec'] > 0 else "不限"
+        files_target = f"{sample['target_files_per_sec']:.0f}个/秒" if sample['target_files_per_sec'] > 0 else "不限"
+        message += (f"\n第{sample['elapsed']:.0f}秒 实际 {sample['mb_per_sec']:.1f}MB/秒（目标 {mb_target}），"
+                    f"{sample['files_per_sec']:.1f}个/秒（目标 {files_target}）")
+    latency = throughput.get('latency') or {}
+    parts = [f"{label}延迟 p50 {stats['p50_ms']:.2f}ms / p99 {stats['p99_ms']:.2f}ms（{stats['count']}次）"
+             for label, stats in (("写入", latency.get('write')), ("fsync", latency.get('fsync'))) if stats and stats['count']]
+    if parts:
+        message += "\n" + "，".join(parts)
+    return message
+
+
+class GeneratorWriter:
+    """一个写入线程的内容引擎和写入统计，round_* 为本轮数据"""
+    def __init__(self, index, content_engine):
+        self.index = index
+        self.content_engine = content_engine
+        self.bytes_written = 0
+        self.write_seconds = 0.0
+        self.round_files = 0
+        self.round_bytes = 0
+        self.pipeline = None
+
+
+class ChunkPipeline:
+    """
+    一个写入线程的双缓冲流水线：后台线程写入上一块的同时，调用方生成并哈希下一块。
+    缓冲区在整个生成过程中循环复用，不再为每一块分配新的内存；write 回调返回False表示停止，之后提交的块不再写入。
+    """
+    def __init__(self, chunk_size, buffers=PIPELINE_BUFFERS, aligned=False):
+        self.chunk_size = chunk_size
+        self.buffers = buffers
+        self.aligned = aligned
+        self.free = queue.Queue()
+        for _ in range(buffers):
+            self.free.put(allocate_aligned_buffer(chunk_size) if aligned else allocate_buffer(chunk_size))
+        self.pending = queue.Queue()
+        self.failed = False
+        self.error = None
+        self.thread = None
+
+    def acquire(self):
+        """取一个空闲缓冲区，两个都在写入时等待其中一个写完"""
+        return self.free.get()
+
+    def release(self, buffer):
+        self.free.put(buffer)
+
+    def submit(self, buffer, write):
+        """交给后台线程执行 write()，完成后缓冲区自动归还"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="FileGeneratorChunkWriter", daemon=True)
+            self.thread.start()
+        self.pending.put((buffer, write))
+
+    def _run(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            buffer, write = item
+            try:
+                if not self.failed and not write():
+                    self.failed = True
+            except BaseException as e:
+                self.error = e
+                self.failed = True
+            finally:
+                self.free.put(buffer)
+
+    def finish(self):
+        """等待已提交的块全部写完，返回是否全部写入；后台写入出错时在这里抛出异常"""
+        buffers = [self.free.get() for _ in range(self.buffers)]
+        for buffer in buffers:
+            self.free.put(buffer)
+        failed, error = self.failed, self.error
+        self.failed, self.error = False, None
+        if error is not None:
+            raise error
+        return not failed
+
+    def close(self):
+        if self.thread is not None:
+            self.pending.put(None)
+            self.thread.join()
+            self.thread = None
+
 
 class FileGenerator:
     """
     负责生成指定数量、大小、内容的测试文件，不依赖任何UI。
+    content_mode 选择文件内容引擎（urandom/prng/aes/pattern，见content_engine），seed 为伪随机引擎的种子。
+    writers 为每轮同时写文件的线程数，共同分担 max_files 个文件，用于产生足够的I/O队列深度；
+    每个线程使用各自的内容引擎，interval 是每个线程写完一个文件后的间隔。
+    设置 seed 后为确定性模式：每个文件的大小和内容只由 (种子, 轮次, 编号) 决定，与线程数和调度顺序无关，
+    轮次目录名也由种子决定；参数写入轮次目录的 dataset_manifest.json，可用 from_manifest 重新生成，
+    或用 expected_files 在不读取文件的情况下重新算出期望的文件名和MD5。系统随机数无法复现，不能与种子同时使用。
+    rate_mb/rate_files 为所有写入线程合计的写入速率上限（MB/秒、个/秒，0为不限），在分块写入循环中按令牌桶整形；
+    burst_active/burst_idle 为突发模式的工作/空闲秒数。整形时每秒采样一次实际速率，与目标一起记录在 rate_history
+    和轮次目录的 rate_history.csv 中。
+    workload 为负载模型的名称或定义（见workload_profile），决定文件大小分布和目录分层，workload_profiles 为自定义模型；
+    默认的 uniform 模型按 file_size_min/file_size_max 均匀分布，所有文件在轮次目录下。
+    write_policy 为写入策略（见WRITE_POLICIES）：buffered 只写入系统缓存，测得的是内存带宽；fsync_file 每个文件写完后fsync，
+    fsync_round 每轮写完后对所有文件fsync；dsync 以O_DSYNC打开，每次写入都等待落盘；direct 以O_DIRECT绕过系统缓存，
+    使用页对齐的缓冲区，文件末尾补齐到4KB写入后再截断。fsync 模式在轮次结束时还会fsync新建的目录（Windows除外）。
+    preallocate 为True时写入前按文件大小预分配空间（posix_fallocate，不支持时改为设置文件长度）。
+    每次写入和每次fsync的耗时记录在延迟直方图中，p50/p99 随吞吐量一起提供，并写入轮次目录的 latency_stats.json。
+    不超过 chunk_size 的文件在内存中生成并算出MD5后直接以最终文件名写入；更大的文件先写临时文件 temp_编号，写完后重命名。
+    delete_after 的轮次目录交给后台线程删除（见RoundCleaner），下一轮照常开始；最多积压 cleanup_backlog 个目录，
+    cleanup_rate_files 为删除速率上限（个/秒，0为不限）。generate_files 结束前取消限速，等待积压的目录删除完成。
+    schedule_mode 为重复模式的轮次调度（见RoundScheduler）：fixed_delay 每轮结束后等待 repeat_interval 秒，
+    fixed_rate 每 repeat_interval 秒准时开始一轮；每轮的计划/实际开始时间和偏差追加到目标目录的 round_schedule.csv。
+    暂停/继续/停止使用 pause/resume/request_stop（基于事件，毫秒级响应），也兼容 generate_files 的轮询式回调。
     """
-    def __init__(self, target_dir, file_size_min, file_size_max, size_unit, max_files, is_loop=False, interval=0, repeat_interval=0, delete_after=False, max_repeat_count=None):
+    def __init__(self, target_dir, file_size_min, file_size_max, size_unit, max_files, is_loop=False, interval=0, repeat_interval=0, delete_after=False, max_repeat_count=None,
+                 content_mode='urandom', seed=None, writers=1, rate_mb=0, rate_files=0, burst_active=0, burst_idle=0,
+                 workload=None, workload_profiles=None, write_policy='buffered', preallocate=False,
+                 cleanup_backlog=2, cleanup_rate_files=0, schedule_mode='fixed_delay'):
         self.target_dir = target_dir
         self.file_size_min = file_size_min
         self.file_size_max = file_size_max
         self.size_unit = size_unit
         self.max_files = max_files
+        self.number_width = len(str(max_files))  # 文件名中编号的位数
         self.is_loop = is_loop
         self.interval = interval
         self.repeat_interval = repeat_interval
         self.delete_after = delete_after
         self.max_repeat_count = max_repeat_count  # None表示无限
         self.chunk_size = 10 * 1024 * 1024
+        # 生成和写入重叠需要至少两个CPU核心，单核时后台写入线程只会增加切换开销
+        self.overlap_writes = (os.cpu_count() or 1) > 1
+        self.content_mode = content_mode
+        self.seed = None if seed is None else str(seed)
+        self.first_round = 1
+        self.content_engine = create_content_engine(content_mode, self.seed)
+        if self.seed is not None and not self.content_engine.reproducible:
+            raise ValueError(f"{self.content_engine.display_name}无法按种子复现，请选择其他内容引擎")
+        # 确定性模式下各线程的引擎相同，每个文件开始前按文件种子重置；否则各线程使用各自的随机内容流
+        self.writers = [GeneratorWriter(0, self.content_engine)] + [
+            GeneratorWriter(index, create_content_engine(content_mode, self.seed))
+            for index in range(1, max(1, int(writers)))
+        ]
+        self.rate_limiter = RateLimiter(rate_mb, rate_files)
+        self.rate_limiter.set_burst_profile(burst_active, burst_idle)
+        self.rate_history = []
+        self.workload = resolve_workload(
+            workload, workload_profiles,
+            self.convert_to_bytes(file_size_min, size_unit), self.convert_to_bytes(file_size_max, size_unit)
+        )
+        if write_policy not in WRITE_POLICIES:
+            raise ValueError(f"未知的写入策略: {write_policy}，可选: {', '.join(WRITE_POLICIES)}")
+        if write_policy not in available_write_policies():
+            raise ValueError(f"当前系统不支持写入策略 {WRITE_POLICIES[write_policy]}")
+        self.write_policy = write_policy
+        self.preallocate = preallocate
+        self.write_latency = LatencyHistogram()
+        self.fsync_latency = LatencyHistogram()
+        self.cleaner = RoundCleaner(cleanup_backlog, cleanup_rate_files)
+        self.control = RunControl()
+        self.scheduler = RoundScheduler(schedule_mode, repeat_interval)
+
+    def request_stop(self):
+        """停止生成，正在等待（暂停、轮次间隔、积压的删除）的线程立即响应"""
+        self.control.request_stop()
+
+    def pause(self):
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    def set_rate_limit(self, mb_per_sec=0, files_per_sec=0):
+        """运行中修改写入速率上限，0为不限"""
+        self.rate_limiter.set_limits(mb_per_sec, files_per_sec)
+
+    @classmethod
+    def from_manifest(cls, manifest, target_dir=None, writers=1):
+        """按数据集清单重新生成同一轮的文件，target_dir 默认为原来的目标目录"""
+        if isinstance(manifest, str):
+            manifest = load_dataset_manifest(manifest)
+        generator = cls(
+            target_dir or manifest['target_dir'], manifest['file_size_min'], manifest['file_size_max'], manifest['size_unit'],
+            manifest['max_files'], content_mode=manifest['content_mode'], seed=manifest['seed'], writers=writers,
+            workload=manifest.get('workload')
+        )
+        generator.first_round = manifest['round_number']
+        return generator
+
+    def round_dir_name(self, round_number):
+        """轮次目录名：轮次_8位十六进制后缀，确定性模式下后缀由种子决定"""
+        rng = random if self.seed is None else random.Random(f"{self.seed}/{round_number}/dir")
+        return f"{round_number}_{''.join(rng.choices('0123456789ABCDEF', k=8))}"
+
+    def file_plan(self, round_number, index):
+        """第 index 个文件（从0开始）的大小和内容种子，非确定性模式下内容种子为None"""
+        if self.seed is None:
+            return self.workload.sample_size(random), None
+        rng = random.Random(f"{self.seed}/{round_number}/{index}")
+        return self.workload.sample_size(rng), rng.getrandbits(64)
+
+    def file_name(self, index, md5):
+        """第 index 个文件相对于轮次目录的路径：负载模型的分层目录/编号.MD5.md5file"""
+        file_number = str(index+1).zfill(self.number_width)
+        return os.path.join(self.workload.directory_for(index, self.max_files), f"{file_number}.{md5}.md5file")
+
+    def write_manifest(self, files_dir, round_number):
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'seed': self.seed,
+            'round_number': round_number,
+            'target_dir': os.path.abspath(self.target_dir),
+            'dir_name': os.path.basename(files_dir),
+            'content_mode': self.content_mode,
+            'file_size_min': self.file_size_min,
+            'file_size_max': self.file_size_max,
+            'size_unit': self.size_unit,
+            'max_files': self.max_files,
+            'workload': self.workload.to_dict(),
+            'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        with open(os.path.join(files_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    def expected_files(self, round_number=None, stop_flag=None):
+        """
+        确定性模式下逐个返回 (相对于轮次目录的文件路径, 大小)，文件名中的MD5由内容引擎重新计算，不读取磁盘上的文件。
+        round_number 默认为 first_round（from_manifest 时为清单中的轮次）
+        """
+        if self.seed is None:
+            raise ValueError("只有设置了种子的数据集才能重新计算期望的MD5")
+        round_number = round_number or self.first_round
+        engine = self.content_engine
+        for i in range(self.max_files):
+            if stop_flag and stop_flag():
+                return
+            file_size, content_seed = self.file_plan(round_number, i)
+            engine.reseed(content_seed)
+            hasher = MultiHasher(('md5',))
+            remaining = file_size
+            while remaining > 0:
+                n = min(self.chunk_size, remaining)
+                hasher.update(engine.read(n))
+                remaining -= n
+            yield self.file_name(i, hasher.hexdigests()['md5']), file_size
+
+    @property
+    def bytes_written(self):
+        return sum(writer.bytes_written for writer in self.writers)
+
+    @property
+    def write_seconds(self):
+        return sum(writer.write_seconds for writer in self.writers)
 
     def convert_to_bytes(self, size, unit):
         multipliers = {'KB': 1024, 'MB': 1024*1024, 'GB': 1024*1024*1024}
         return int(size * multipliers[unit])
 
-    def generate_file_content(self, file_path, total_size, pause_flag=None, stop_flag=None):
-        hasher = hashlib.md5()
+    def shaping_piece_size(self, size):
+        """限速时每次写入的大小"""
+        rate = self.rate_limiter.mb_per_sec * MIB
+        if rate <= 0:
+            return size
+        piece = max(SHAPING_MIN_PIECE, min(size, int(rate / 10)))
+        if self.write_policy == 'direct':
+            piece -= piece % DIRECT_IO_ALIGNMENT
+        return piece
+
+    def chunk_pipeline(self, writer):
+        """写入线程的块流水线，第一次使用时创建，块大小或对齐要求改变后重新创建"""
+        aligned = self.write_policy == 'direct'
+        pipeline = writer.pipeline
+        if pipeline is None or pipeline.chunk_size != self.chunk_size or pipeline.aligned != aligned:
+            if pipeline is not None:
+                pipeline.close()
+            writer.pipeline = ChunkPipeline(self.chunk_size, aligned=aligned)
+        return writer.pipeline
+
+    def close_pipelines(self):
+        for writer in self.writers:
+            if writer.pipeline is not None:
+                writer.pipeline.close()
+                writer.pipeline = None
+
+    def write_chunk(self, f, view, writer, stop_flag=None):
+        """按限速配额分段写入一块，返回False表示等待配额时被停止"""
+        limiter = self.rate_limiter
+        size = len(view)
+        piece = self.shaping_piece_size(size)
+        for offset in range(0, size, piece):
+            part = view[offset:offset + piece]
+            if limiter.enabled and not limiter.acquire_bytes(len(part), stop_flag):
+                return False
+            # 不带缓冲的文件对象可能只写入一部分
+            while len(part):
+                start = time.perf_counter()
+                written = f.write(part)
+                elapsed = time.perf_counter() - start
+                writer.write_seconds += elapsed
+                self.write_latency.record(elapsed)
+                part = part[written:]
+        writer.bytes_written += size
+        return True
+
+    def open_for_write(self, file_path):
+        """按写入策略打开文件；dsync/direct 使用不带缓冲的文件对象，每次写入直接成为一次系统调用"""
+        if self.write_policy not in POLICY_OPEN_FLAGS:
+            return open(file_path, 'wb')
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0) | getattr(os, POLICY_OPEN_FLAGS[self.write_policy])
+        return open(file_path, 'wb', buffering=0, opener=lambda path, _: os.open(path, flags, 0o666))
+
+    @staticmethod
+    def preallocate_file(f, size):
+        """预分配文件空间；文件系统不支持 posix_fallocate 时改为设置文件长度"""
+        if size <= 0:
+            return
+        if hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+                return
+            except OSError:
+                pass
+        f.truncate(size)
+
+    def sync_fd(self, fd):
+        start = time.perf_counter()
+        os.fsync(fd)
+        self.fsync_latency.record(time.perf_counter() - start)
+
+    def sync_paths(self, paths, dirs=()):
+        """fsync_round 模式在轮次结束时逐个fsync本轮的文件，fsync模式都再fsync新建的目录，使重命名和创建也落盘"""
+        for path in paths:
+            fd = os.open(path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+            try:
+                self.sync_fd(fd)
+            finally:
+                os.close(fd)
+        if os.name == 'nt':
+            return  # Windows无法打开目录进行fsync
+        for path in dirs:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                self.sync_fd(fd)
+            finally:
+                os.close(fd)
+
+    @staticmethod
+    def aligned_view(buffer, view, size):
+        """O_DIRECT写入用的视图：引擎返回的可能是自身不对齐的数据，复制到对齐的缓冲区；末尾的零头补齐到对齐长度"""
+        if view.obj is not buffer:
+            buffer[:size] = view
+        return memoryview(buffer)[:align_up(size)]
+
+    def finish_file(self, f, total_size):
+        """数据全部写入后：O_DIRECT截掉补齐的部分，fsync_file 模式fsync"""
+        if self.write_policy == 'direct' and total_size % DIRECT_IO_ALIGNMENT:
+            f.truncate(total_size)
+        if self.write_policy == 'fsync_file':
+            f.flush()
+            self.sync_fd(f.fileno())
+
+    def write_small_file(self, files_dir, index, total_size, stop_flag=None, writer=None):
+        """
+        不超过一块的小文件：内容先在内存中生成并算出MD5，直接以最终文件名写入，省去临时文件和重命名。
+        返回文件路径，被停止时返回None；被停止或出错时删除写了一半的文件，不会留下名称完整而内容不完整的文件
+        """
+        writer = writer or self.writers[0]
+        limiter = self.rate_limiter
+        if limiter.enabled and not limiter.acquire_file(stop_flag):
+            return None
+        pipeline = self.chunk_pipeline(writer)
+        buffer = pipeline.acquire()
+        try:
+            view = writer.content_engine.read_into(buffer, total_size)
+            md5 = hashlib.md5(view).hexdigest()
+            if self.write_policy == 'direct':
+                view = self.aligned_view(buffer, view, total_size)
+            file_path = os.path.join(files_dir, self.file_name(index, md5))
+            completed = False
+            try:
+                with self.open_for_write(file_path) as f:
+                    if self.preallocate:
+                        self.preallocate_file(f, total_size)
+                    completed = self.write_chunk(f, view, writer, stop_flag)
+                    if completed:
+                        self.finish_file(f, total_size)
+            finally:
+                if not completed:
+                    try:
+                        os.remove(file_path)
+                    except OSError:
+                        pass
+        finally:
+            pipeline.release(buffer)
+        return file_path if completed else None
+
+    def generate_file_content(self, file_path, total_size, stop_flag=None, writer=None):
+        """
+        生成一个文件，返回内容的MD5，被停止时返回None；一轮中只用于超过一块的大文件，写入临时文件后由调用方重命名。
+        内容引擎直接生成到复用的缓冲区；多块的文件由后台线程写入上一块，同时生成并哈希下一块，
+        只有一块的文件或 overlap_writes 为False（单核）时直接写入。写入前后按 write_policy 预分配、截断和fsync
+        """
+        writer = writer or self.writers[0]
+        limiter = self.rate_limiter
+        if limiter.enabled and not limiter.acquire_file(stop_flag):
+            return None
+        pipeline = self.chunk_pipeline(writer)
+        direct = self.write_policy == 'direct'
+        hasher = MultiHasher(('md5',))
         written_size = 0
-        with open(file_path, 'wb') as f:
-            while written_size < total_size:
-                if stop_flag and stop_flag():
-                    return None
-                while pause_flag and pause_flag():
-                    if stop_flag and stop_flag():
+        with self.open_for_write(file_path) as f:
+            if self.preallocate:
+                self.preallocate_file(f, total_size)
+            try:
+                while written_size < total_size:
+                    # 暂停期间收到的停止请求由 stop_flag 检查到，调用方据此区分停止和出错
+                    self.control.wait_while_paused()
+                    if pipeline.failed or (stop_flag and stop_flag()):
                         return None
-                    time.sleep(0.1)
-                remaining = total_size - written_size
-                current_chunk_size = min(self.chunk_size, remaining)
-                chunk = os.urandom(current_chunk_size)
-                hasher.update(chunk)
-                f.write(chunk)
-                written_size += current_chunk_size
-        return hasher.hexdigest()
+                    current_chunk_size = min(self.chunk_size, total_size - written_size)
+                    buffer = pipeline.acquire()
+                    try:
+                        view = writer.content_engine.read_into(buffer, current_chunk_size)
+                        hasher.update(view)
+                        if direct:
+                            view = self.aligned_view(buffer, view, current_chunk_size)
+                    except BaseException:
+                        pipeline.release(buffer)
+                        raise
+                    if current_chunk_size == total_size or not self.overlap_writes:
+                        try:
+                            if not self.write_chunk(f, view, writer, stop_flag):
+                                return None
+                        finally:
+                            pipeline.release(buffer)
+                    else:
+                        pipeline.submit(buffer, lambda view=view: self.write_chunk(f, view, writer, stop_flag))
+                    written_size += current_chunk_size
+            finally:
+                # 关闭文件之前等待后台写完，缓冲区全部归还；后台写入出错时抛出异常
+                all_written = pipeline.finish()
+            if not all_written:
+                return None
+            self.finish_file(f, total_size)
+        return hasher.hexdigests()['md5']
+
+    def stats_message(self):
+        """内容生成速度与写入速度的对比，生成速度远高于写入速度说明瓶颈在磁盘；多线程时为单个线程的平均速度"""
+        engines = [writer.content_engine for writer in self.writers]
+        generated = sum(engine.bytes_generated for engine in engines)
+        generate_seconds = sum(engine.seconds for engine in engines)
+        generate_rate = generated / MIB / generate_seconds if generate_seconds > 0 else 0.0
+        write_rate = self.bytes_written / MIB / self.write_seconds if self.write_seconds > 0 else 0.0
+        per_thread = f"（{len(self.writers)}个线程，每线程）" if len(self.writers) > 1 else ""
+        return (f"内容引擎 {self.content_engine.display_name}: 共生成 {generated / MIB:.1f}MB，"
+                f"生成速度{per_thread} {generate_rate:.1f}MB/秒，写入速度 {write_rate:.1f}MB/秒")
+
+    def round_throughput(self, round_start):
+        """本轮从开始到现在的总吞吐量和每个写入线程的吞吐量"""
+        elapsed = max(time.monotonic() - round_start, 1e-6)
+        files = sum(writer.round_files for writer in self.writers)
+        nbytes = sum(writer.round_bytes for writer in self.writers)
+        return {
+            'elapsed': elapsed,
+            'files_per_sec': files / elapsed,
+            'mb_per_sec': nbytes / MIB / elapsed,
+            'writers': [{
+                'writer': writer.index + 1,
+                'files': writer.round_files,
+                'bytes': writer.round_bytes,
+                'mb_per_sec': writer.round_bytes / MIB / elapsed,
+            } for writer in self.writers],
+            'rate_sample': self.rate_history[-1] if self.rate_history else None,
+            'latency': {'write': self.write_latency.summary(), 'fsync': self.fsync_latency.summary()},
+        }
+
+    def record_rate_sample(self, round_start):
+        """记录上次采样以来的实际写入速率和当时的目标速率"""
+        mb_rate, files_rate = self.rate_limiter.sample()
+        sample = {
+            'elapsed': time.monotonic() - round_start,
+            'mb_per_sec': mb_rate,
+            'files_per_sec': files_rate,
+            'target_mb_per_sec': self.rate_limiter.mb_per_sec,
+            'target_files_per_sec': self.rate_limiter.files_per_sec,
+        }
+        self.rate_history.append(sample)
+        return sample
+
+    def write_rate_history(self, files_dir):
+        with open(os.path.join(files_dir, RATE_HISTORY_NAME), 'w', encoding='utf-8') as f:
+            f.write("elapsed_seconds,mb_per_sec,target_mb_per_sec,files_per_sec,target_files_per_sec\n")
+            for sample in self.rate_history:
+                f.write(f"{sample['elapsed']:.2f},{sample['mb_per_sec']:.2f},{sample['target_mb_per_sec']:.2f},"
+                        f"{sample['files_per_sec']:.2f},{sample['target_files_per_sec']:.2f}\n")
+
+    def write_latency_stats(self, files_dir, round_number):
+        """本轮写入和fsync的延迟统计及完整分布（[桶上界毫秒, 次数]）"""
+        stats = {
+            'round_number': round_number,
+            'write_policy': self.write_policy,
+            'preallocate': self.preallocate,
+        }
+        for name, histogram in (('write', self.write_latency), ('fsync', self.fsync_latency)):
+            stats[name] = histogram.summary()
+            stats[name]['buckets'] = [[round(upper, 4), count] for upper, count in histogram.nonzero_buckets()]
+        with open(os.path.join(files_dir, LATENCY_STATS_NAME), 'w', encoding='utf-8') as f:
+            json.dump(stats, f, ensure_ascii=False, indent=2)
+
+    def generate_round(self, files_dir, round_number, progress_callback=None):
+        """
+        生成一轮文件，返回 (已生成文件数, 总大小, 按编号排序的文件路径, 是否被停止, 吞吐量)。
+        各写入线程从共享的编号计数器领取文件编号，文件名编号与单线程时一致；
+        任一线程出错时其余线程尽快停止，异常在所有线程结束后抛出。暂停和停止由 self.control 控制。
+        """
+        lock = threading.Lock()
+        halt = threading.Event()
+        stopped = threading.Event()
+        errors = []
+        created_file_paths = [None] * self.max_files
+        state = {'next': 0, 'files_created': 0, 'total_size': 0}
+        round_start = time.monotonic()
+        for writer in self.writers:
+            writer.round_files = 0
+            writer.round_bytes = 0
+        self.rate_history = []
+        self.rate_limiter.reset_stats()
+        self.write_latency.reset()
+        self.fsync_latency.reset()
+        sampling_done = threading.Event()
+        # 分层目录在开始前一次性创建；文件路径直接拼接绝对路径，不必逐个调用abspath
+        round_dir = os.path.abspath(files_dir)
+        created_dirs = [os.path.join(round_dir, directory) for directory in self.workload.directories(self.max_files)]
+        for directory in created_dirs:
+            os.makedirs(directory, exist_ok=True)
+
+        control = self.control
+
+        def should_stop():
+            if control.stop_requested():
+                stopped.set()
+            return stopped.is_set() or halt.is_set()
+
+        def claim():
+            with lock:
+                if state['next'] >= self.max_files:
+                    return None
+                index = state['next']
+                state['next'] += 1
+                return (index,) + self.file_plan(round_number, index)
+
+        def write_files(writer):
+            while True:
+                control.wait_while_paused()
+                if should_stop():
+                    return
+                claimed = claim()
+                if claimed is None:
+                    return
+                i, file_size, content_seed = claimed
+                if content_seed is not None:
+                    writer.content_engine.reseed(content_seed)
+                if file_size <= self.chunk_size:
+                    final_path = self.write_small_file(round_dir, i, file_size, stop_flag=should_stop, writer=writer)
+                    if final_path is None:
+                        return
+                else:
+                    # 大文件写完才知道MD5，先写临时文件再重命名
+                    temp_file = os.path.join(round_dir, self.workload.directory_for(i, self.max_files), f"temp_{i}")
+                    md5 = self.generate_file_content(temp_file, file_size, stop_flag=should_stop, writer=writer)
+                    if md5 is None:
+                        return
+                    final_path = os.path.join(round_dir, self.file_name(i, md5))
+                    os.rename(temp_file, final_path)
+                with lock:
+                    writer.round_files += 1
+                    writer.round_bytes += file_size
+                    state['files_created'] += 1
+                    state['total_size'] += file_size
+                    created_file_paths[i] = final_path
+                    if progress_callback:
+                        progress_callback('progress', files_dir, state['files_created'], self.max_files, state['total_size'],
+                                          round_number, self.round_throughput(round_start))
+                if self.interval > 0:
+                    control.sleep(self.interval)
+
+        def sample_rate():
+            # 独立线程定时采样，突发模式的空闲期间写入线程都在等待，也能记录到速率为0
+            while not sampling_done.wait(RATE_SAMPLE_SECONDS):
+                if not self.rate_limiter.enabled:
+                    continue
+                with lock:
+                    self.record_rate_sample(round_start)
+                    if progress_callback:
+                        progress_callback('rate', files_dir, state['files_created'], self.max_files, state['total_size'],
+                                          round_number, self.round_throughput(round_start))
+
+        def run_writer(writer):
+            try:
+                write_files(writer)
+            except BaseException as e:
+                errors.append(e)
+                halt.set()
+
+        sampler = threading.Thread(target=sample_rate, name="FileGeneratorRateSampler", daemon=True)
+        sampler.start()
+        try:
+            if len(self.writers) == 1:
+                write_files(self.writers[0])
+            else:
+                threads = [threading.Thread(target=run_writer, args=(writer,), name=f"FileGeneratorWriter-{writer.index + 1}", daemon=True)
+                           for writer in self.writers]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                if errors:
+                    raise errors[0]
+        finally:
+            sampling_done.set()
+            sampler.join()
+            self.close_pipelines()
+        paths = [path for path in created_file_paths if path]
+        if self.write_policy in ('fsync_file', 'fsync_round') and not stopped.is_set():
+            dirs = {os.path.normpath(path) for path in created_dirs + [round_dir, os.path.abspath(self.target_dir)]}
+            self.sync_paths(paths if self.write_policy == 'fsync_round' else (), sorted(dirs))
+        if self.rate_limiter.enabled:
+            self.record_rate_sample(round_start)
+            self.write_rate_history(files_dir)
+        self.write_latency_stats(files_dir, round_number)
+        return state['files_created'], state['total_size'], paths, stopped.is_set(), self.round_throughput(round_start)
 
     def generate_files(self, progress_callback=None, finished_callback=None, stop_flag=None, pause_flag=None, stopped_callback=None):
         """
         生成文件主流程。progress_callback: 进度回调，finished_callback: 完成回调，stop_flag: 停止标志，pause_flag: 暂停标志，stopped_callback: 停止回调。
+        stop_flag/pause_flag 为轮询式回调，可以不传而改用 request_stop/pause/resume。
+        progress_callback(阶段, 目录, 已生成数, 文件总数, 总大小, 轮次, 吞吐量)，吞吐量为 round_throughput 的结果，
+        在 progress、rate 和 finished 阶段提供，可用 format_throughput 格式化；start 阶段为本轮的调度记录，
+        loop_wait 阶段为下一轮的等待时间（见 format_schedule），其余阶段为None；
+        rate 阶段只在限速时每秒出现一次，吞吐量中的 rate_sample 为最近一秒的实际速率和目标速率。
+        cleanup 阶段来自后台删除线程，约每秒一次：目录为正在删除的轮次目录，已生成数为已删除的文件数，
+        文件总数为等待删除的目录数，吞吐量为删除统计（见RoundCleaner），可用 format_cleanup 格式化。
         """
-        round_number = 1
-        last_files_dir = None
+        state = {'round': self.first_round}
+        self.control.attach(stop_flag, pause_flag)
+        if progress_callback:
+            self.cleaner.progress_callback = lambda path, deleted, pending, stats: progress_callback(
+                'cleanup', path, deleted, pending, 0, state['round'], stats)
+        try:
+            self._generate_rounds(state, progress_callback, finished_callback, stopped_callback)
+        finally:
+            self.cleaner.close(wait=True)
+            self.cleaner.progress_callback = None
+
+    def _generate_rounds(self, state, progress_callback, finished_callback, stopped_callback):
+        control = self.control
+        scheduler = self.scheduler
+        round_number = self.first_round
         while True:
-            random_suffix = ''.join(random.choices('0123456789ABCDEF', k=8))
-            parent_dir_name = f"{round_number}_{random_suffix}"
-            files_dir = os.path.join(self.target_dir, parent_dir_name)
-            # 清理上一次的目录（仅在重复模式且设置了生成后删除时）
-            if self.is_loop and self.delete_after and last_files_dir and os.path.exists(last_files_dir):
-                try:
-                    shutil.rmtree(last_files_dir)
-                except Exception:
-                    pass
-            last_files_dir = files_dir
+            state['round'] = round_number
+            schedule = scheduler.round_started(round_number)
+            files_dir = os.path.join(self.target_dir, self.round_dir_name(round_number))
             os.makedirs(files_dir, exist_ok=True)
-            files_created = 0
-            total_size = 0
-            created_file_paths = []
-            min_bytes = self.convert_to_bytes(self.file_size_min, self.size_unit)
-            max_bytes = self.convert_to_bytes(self.file_size_max, self.size_unit)
+            if self.seed is not None:
+                self.write_manifest(files_dir, round_number)
             if progress_callback:
-                progress_callback('start', files_dir, files_created, self.max_files, total_size, round_number)
-            for i in range(self.max_files):
-                if stop_flag and stop_flag():
-                    if stopped_callback:
-                        stopped_callback(files_dir, files_created, self.max_files, total_size, round_number)
-                    return
-                while pause_flag and pause_flag():
-                    if stop_flag and stop_flag():
-                        if stopped_callback:
-                            stopped_callback(files_dir, files_created, self.max_files, total_size, round_number)
-                        return
-                    time.sleep(0.1)
-                file_size = random.randint(min_bytes, max_bytes)
-                temp_file = os.path.join(files_dir, f"temp_{i}")
-                md5 = self.generate_file_content(temp_file, file_size, pause_flag=pause_flag, stop_flag=stop_flag)
-                if md5 is None:
-                    if stopped_callback:
-                        stopped_callback(files_dir, files_created, self.max_files, total_size, round_number)
-                    return
-                num_width = len(str(self.max_files))
-                file_number = str(i+1).zfill(num_width)
-                final_path = os.path.join(files_dir, f"{file_number}.{md5}.md5file")
-                os.rename(temp_file, final_path)
-                total_size += file_size
-                files_created += 1
-                created_file_paths.append(os.path.abspath(final_path))
-                if progress_callback:
-                    progress_callback('progress', files_dir, files_created, self.max_files, total_size, round_number)
-                if self.interval > 0:
-                    time.sleep(self.interval)
+                progress_callback('start', files_dir, 0, self.max_files, 0, round_number, schedule)
+            files_created, total_size, created_file_paths, stopped, throughput = self.generate_round(
+                files_dir, round_number, progress_callback)
+            if stopped:
+                self.finish_round_schedule()
+                if stopped_callback:
+                    stopped_callback(files_dir, files_created, self.max_files, total_size, round_number)
+                return
             # 写入 all_created_files.txt
             all_files_txt = os.path.join(files_dir, "all_created_files.txt")
             with open(all_files_txt, "w", encoding="utf-8") as f:
@@ -106,15 +786,12 @@ class FileGenerator:
             if finished_callback:
                 finished_callback(files_dir, files_created, total_size)
             if progress_callback:
-                progress_callback('finished', files_dir, files_created, self.max_files, total_size, round_number)
+                progress_callback('finished', files_dir, files_created, self.max_files, total_size, round_number, throughput)
             
-            # 如果设置了生成后删除，则删除生成的文件
+            # 如果设置了生成后删除，交给后台线程删除，积压已满时等待；删除失败不影响主流程
             if self.delete_after:
-                try:
-                    shutil.rmtree(files_dir)
-                except Exception as e:
-                    # 删除失败不影响主流程，可以记录日志
-                    pass
+                self.cleaner.submit(files_dir, control.stop_requested)
+            self.finish_round_schedule()
             
             if not self.is_loop:
                 break
@@ -124,24 +801,33 @@ class FileGenerator:
                 break
             
             round_number += 1
+            deadline = scheduler.next_deadline()
             if progress_callback:
-                progress_callback('loop_wait', files_dir, files_created, self.max_files, total_size, round_number-1)
-            # 重复模式下等待指定间隔时间，期间可暂停和停止
-            if self.repeat_interval > 0:
-                waited = 0.0
-                while waited < self.repeat_interval:
-                    if stop_flag and stop_flag():
-                        if stopped_callback:
-                            stopped_callback(files_dir, files_created, self.max_files, total_size, round_number)
-                        return
-                    while pause_flag and pause_flag():
-                        if stop_flag and stop_flag():
-                            if stopped_callback:
-                                stopped_callback(files_dir, files_created, self.max_files, total_size, round_number)
-                            return
-                        time.sleep(0.1)
-                    time.sleep(0.1)
-                    waited += 0.1
-            
-            # 等待结束后，下一轮开始前发送start信号（在while循环开始处会再次发送，但这里确保等待结束后立即发送）
-            # 注意：start信号会在while循环开始处发送，所以这里不需要重复发送
+                wait_seconds = max(0.0, deadline - time.monotonic())
+                progress_callback('loop_wait', files_dir, files_created, self.max_files, total_size, round_number-1, {
+                    'mode': scheduler.mode,
+                    'wait_seconds': wait_seconds,
+                    'next_start_time': time.time() + wait_seconds,
+                })
+            # 等待到下一轮的计划时刻；到时处于暂停状态则等待继续，继续后立即开始，延迟计入下一轮的偏差
+            if not control.sleep_until(deadline) or not control.wait_while_paused():
+                # 下一轮尚未开始，停止记在已完成的这一轮上，目录和文件数与之对应
+                if stopped_callback:
+                    stopped_callback(files_dir, files_created, self.max_files, total_size, round_number - 1)
+                return
+
+    def finish_round_schedule(self):
+        """记录本轮耗时，重复模式下把调度记录追加到目标目录的 round_schedule.csv（轮次目录可能被删除）"""
+        record = self.scheduler.round_finished()
+        if not self.is_loop:
+            return
+        path = os.path.join(self.target_dir, SCHEDULE_LOG_NAME)
+        # 每次运行的第一轮重新写表头
+        first = len(self.scheduler.history) == 1
+        with open(path, 'w' if first else 'a', encoding='utf-8') as f:
+            if first:
+                f.write("round,planned_time,start_time,slip_ms,missed,duration_seconds,schedule_mode,interval_seconds\n")
+            f.write(f"{record['round']},{format_timestamp(record['planned_time'])},{format_timestamp(record['start_time'])},"
+                    f"{record['slip'] * 1000:.3f},{record['missed']},{record['duration']:.3f},"
+                    f"{self.scheduler.mode},{self.scheduler.interval:g}\n")
+
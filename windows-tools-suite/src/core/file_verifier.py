@@ -0,0 +1,129 @@
+import os
+import time
+from datetime import datetime
+from .hash_engine import HashEngine
+from .rate_limiter import RateLimiter
+from ..utils.logger import get_logger
+
+
+def expected_md5_from_name(file_name):
+    """从.md5file文件名中取出期望的MD5，兼容 编号.md5.md5file、md5.编号.md5file 和 md5.md5file"""
+    parts = file_name.split('.')
+    if len(parts) == 3 and parts[2] == 'md5file':
+        # 形如 编号.md5.md5file 或 md5.编号.md5file
+        if parts[0].isdigit():
+            return parts[1]
+        return parts[0]
+    return file_name[:-8]  # 兼容老格式
+
+
+class FileVerifier:
+    """
+    校验文件产生器生成的.md5file文件：重新计算内容MD5并与文件名中记录的MD5比对，不依赖任何UI。
+    不一致的文件写入 verify_result_时间.txt，全部一致时不生成结果文件。
+    """
+    def __init__(self, target_dir, rate_limiter=None):
+        self.logger = get_logger(__name__)
+        self.target_dir = target_dir
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.hash_engine = HashEngine(('md5',), rate_limiter=self.rate_limiter)
+        self.reset()
+
+    def reset(self):
+        """重置统计"""
+        self.total_files = 0
+        self.checked_files = 0
+        self.success_files = 0
+        self.error_files = []
+        self.output_file = None
+
+    def calculate_md5(self, file_path, stop_flag=None, pause_flag=None):
+        """计算文件的MD5值，计算过程中响应暂停和停止，停止时返回None"""
+        digests = self.hash_engine.hash_file(file_path, stop_flag=stop_flag, pause_flag=pause_flag)
+        return digests['md5'] if digests else None
+
+    def count_files(self):
+        """统计目录中.md5file文件总数"""
+        total = 0
+        for root, _, files in os.walk(self.target_dir):
+            for file in files:
+                if file.endswith('.md5file'):
+                    total += 1
+        return total
+
+    def verify(self, output_dir, message_callback=None, stats_callback=None, stop_flag=None, pause_flag=None):
+        """
+        校验目录中全部.md5file文件，返回结果文件路径（全部一致或没有可校验文件时为None）。
+        message_callback(消息) 报告进度文字，stats_callback(已检查数, 总数, 成功数, 失败数) 每检查一个文件调用一次；
+        stop_flag/pause_flag 为返回布尔值的可调用对象，停止后已检查部分的结果照常写出
+        """
+        def report(message):
+            if message_callback:
+                message_callback(message)
+
+        self.reset()
+        self.logger.info(f"开始校验目录: {self.target_dir}")
+        self.total_files = self.count_files()
+        if self.total_files == 0:
+            self.logger.info("所选目录中无可校验的.md5file文件")
+            report("所选目录中无可校验的.md5file文件")
+            return None
+
+        self.logger.info(f"找到 {self.total_files} 个.md5file文件，开始校验...")
+        report(f"找到 {self.total_files} 个.md5file文件，开始校验...")
+        self.rate_limiter.reset_stats()
+        last_rate_report = 0
+
+        os.makedirs(output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_file = os.path.join(output_dir, f'verify_result_{timestamp}.txt')
+
+        stopped = False
+        for root, _, files in os.walk(self.target_dir):
+            for file in files:
+                if stop_flag and stop_flag():
+                    stopped = True
+                    break
+                while pause_flag and pause_flag() and not (stop_flag and stop_flag()):
+                    time.sleep(0.1)
+                if not file.endswith('.md5file'):
+                    continue
+
+                file_path = os.path.join(root, file)
+                expected_md5 = expected_md5_from_name(file)
+                actual_md5 = self.calculate_md5(file_path, stop_flag, pause_flag)
+                if actual_md5 is None:
+                    stopped = True
+                    break
+
+                self.checked_files += 1
+                if expected_md5 != actual_md5:
+                    self.error_files.append(f"文件: {file_path} 实际MD5: {actual_md5}\n")
+                    report(f"发现不一致文件: {file_path}")
+                else:
+                    self.success_files += 1
+                if stats_callback:
+                    stats_callback(self.checked_files, self.total_files, self.success_files, len(self.error_files))
+
+                # 限速时每秒报告一次实际与设定的速率
+                now = time.time()
+                if self.rate_limiter.enabled and now - last_rate_report >= 1:
+                    report(f"已校验 {self.checked_files}/{self.total_files} 个文件\n{self.rate_limiter.stats_message()}")
+                    last_rate_report = now
+            if stopped:
+                break
+
+        if self.error_files:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(f"校验时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write(f"目标目录: {self.target_dir}\n")
+                f.write(f"共检查 {self.checked_files} 个文件，发现 {len(self.error_files)} 个不一致文件\n\n")
+                f.write("不一致文件列表:\n")
+                f.writelines(self.error_files)
+            self.output_file = output_file
+            report(f"校验完成，发现 {len(self.error_files)} 个不一致文件，结果已保存到: {output_file}")
+        else:
+            report("校验完成，所有文件MD5值一致")
+        if self.rate_limiter.enabled:
+            self.logger.info(self.rate_limiter.stats_message())
+        return self.output_file
@@ -0,0 +1,95 @@
+import os
+import hashlib
+
+
+# 指纹清单中每个文件的处理方式
+FINGERPRINT_FULL = "full"  # 完整计算了MD5
+FINGERPRINT_MATCHED = "matched"  # 指纹与参考清单一致，沿用参考清单中的MD5
+FINGERPRINT_CACHED = "cached"  # 使用了增量哈希缓存中的MD5
+
+
+def compute_fingerprint(file_path, file_size, sample_size):
+    """
+    计算文件的快速指纹：对文件开头、中间、结尾各 sample_size 字节计算MD5，
+    指纹带上采样大小前缀，采样大小不同的指纹不会被误判为一致。
+    读取失败时抛出OSError，由调用方决定是否改为完整计算
+    """
+    md5_hash = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for offset in (0, (file_size - sample_size) // 2, file_size - sample_size):
+            f.seek(max(offset, 0))
+            md5_hash.update(f.read(sample_size))
+    return f"{sample_size // 1024}k:{md5_hash.hexdigest()}"
+
+
+class FingerprintWriter:
+    """
+    按扫描顺序写出指纹清单，记录每个文件是完整计算还是指纹匹配，并统计各处理方式的文件数。
+    清单文件在写入第一条记录时才创建（与MerkleBuilder一致）
+    """
+    def __init__(self, manifest_path_factory):
+        self.manifest_path_factory = manifest_path_factory
+        self.manifest_file = None
+        self.counts = {}
+        self._fh = None
+        self._offset = 0
+        self._append = False
+
+    def add(self, file_path, file_size, mtime_ns, fingerprint, md5, mode):
+        if self._fh is None:
+            self.manifest_file = self.manifest_path_factory()
+            # 新扫描覆盖同名旧文件，续扫时在截断后的清单末尾追加
+            self._fh = open(self.manifest_file, 'a' if self._append else 'w', encoding='utf-8', errors='surrogateescape')
+        self._fh.write(f"{file_path}\t{file_size}\t{mtime_ns}\t{fingerprint}\t{md5}\t{mode}\n")
+        self.counts[mode] = self.counts.get(mode, 0) + 1
+
+    def offset(self):
+        """写入磁盘并返回当前清单长度，用于断点保存"""
+        if self._fh is None:
+            return self._offset
+        self._fh.flush()
+        return self._fh.tell()
+
+    def restore(self, offset, counts):
+        """断点续扫：截断到断点时的长度，之后的记录重新生成"""
+        self.counts = dict(counts)
+        self._offset = offset
+        self._append = True
+        manifest_file = self.manifest_path_factory()
+        if os.path.exists(manifest_file):
+            with open(manifest_file, 'r+b') as f:
+                f.truncate(offset)
+
+    def close(self):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+
+def load_fingerprint_manifest(manifest_file):
+    """
+    读取指纹清单，返回 {路径: (大小, 修改时间ns, 指纹, MD5)}。
+    清单每行格式：路径\t大小\t修改时间ns\t指纹\tMD5\t处理方式
+    """
+    manifest = {}
+    with open(manifest_file, 'r', encoding='utf-8', errors='surrogateescape') as f:
+        for line in f:
+            parts = line.rstrip('\n').rsplit('\t', 5)
+            if len(parts) != 6:
+                continue
+            file_path, size, mtime_ns, fingerprint, md5, _ = parts
+            manifest[file_path] = (int(size), int(mtime_ns), fingerprint, md5)
+    return manifest
+
+
+def find_latest_fingerprint_manifest(output_dir):
+    """返回output目录中序号最大的指纹清单，没有时返回None"""
+    latest = None
+    latest_index = 0
+    for name in os.listdir(output_dir):
+        if name.startswith("fingerprint-") and name.endswith(".log"):
+            index = name[len("fingerprint-"):-len(".log")]
+            if index.isdigit() and int(index) > latest_index:
+                latest_index = int(index)
+                latest = os.path.join(output_dir, name)
+    return latest
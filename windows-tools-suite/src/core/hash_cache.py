@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import threading
+from ..utils.logger import get_logger
+
+
+class HashCache:
+    """
+    持久化的增量MD5缓存，保存在output目录下的SQLite数据库中。
+    以路径为键，记录 (大小, 修改时间ns, inode/文件ID) 和对应的MD5，
+    元数据未变化的文件可以直接使用缓存结果，无需重新读取文件内容。
+    每次扫描分配一个扫描序号，扫描结束后未被确认的记录视为已消失并被清除。
+    查询（遍历线程）和写入（写入线程）可能来自不同线程，数据库访问由锁串行化。
+    """
+    # 未写入数据库的记录数达到该值时提交一次
+    FLUSH_THRESHOLD = 5000
+
+    def __init__(self, db_path):
+        self.logger = get_logger(__name__)
+        self.db_path = db_path
+        self.conn = None
+        self.scan_id = 0
+        self.pending_seen = []
+        self.pending_store = []
+        self._lock = threading.RLock()
+
+    def open(self, scan_id=None):
+        """打开缓存数据库并开始一次新的扫描，断点续扫时传入原扫描序号继续使用"""
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+            "file_id INTEGER, md5 TEXT, scan_id INTEGER)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'scan_id'").fetchone()
+        last_scan_id = row[0] if row else 0
+        self.scan_id = scan_id if scan_id is not None else last_scan_id + 1
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('scan_id', ?)", (max(self.scan_id, last_scan_id),))
+        self.conn.commit()
+        self.logger.info(f"哈希缓存已打开: {self.db_path}，扫描序号: {self.scan_id}")
+
+    def lookup(self, path, size, mtime_ns, file_id):
+        """
+        查询缓存的MD5，元数据全部一致时返回MD5并标记该记录在本次扫描中仍然存在，否则返回None
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT size, mtime_ns, file_id, md5 FROM files WHERE path = ?", (path,)
+            ).fetchone()
+            if row is None or row[0] != size or row[1] != mtime_ns or row[2] != file_id:
+                return None
+            self.pending_seen.append((self.scan_id, path))
+            self._flush_if_needed()
+            return row[3]
+
+    def store(self, path, size, mtime_ns, file_id, md5):
+        """写入或更新一个文件的MD5"""
+        with self._lock:
+            self.pending_store.append((path, size, mtime_ns, file_id, md5, self.scan_id))
+            self._flush_if_needed()
+
+    def _flush_if_needed(self):
+        if len(self.pending_seen) + len(self.pending_store) >= self.FLUSH_THRESHOLD:
+            self.flush()
+
+    def flush(self):
+        """提交尚未写入数据库的记录"""
+        with self._lock:
+            if not self.conn:
+                return
+            if self.pending_seen:
+                self.conn.executemany("UPDATE files SET scan_id = ? WHERE path = ?", self.pending_seen)
+                self.pending_seen = []
+            if self.pending_store:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO files (path, size, mtime_ns, file_id, md5, scan_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    self.pending_store
+                )
+                self.pending_store = []
+            self.conn.commit()
+
+    def evict_missing(self, directories):
+        """清除扫描目录下本次扫描未确认的记录（文件已删除或不再符合条件）"""
+        self.flush()
+        evicted = 0
+        with self._lock:
+            for directory in directories:
+                prefix = os.path.join(directory, '')
+                cursor = self.conn.execute(
+                    "DELETE FROM files WHERE scan_id <> ? AND substr(path, 1, ?) = ?",
+                    (self.scan_id, len(prefix), prefix)
+                )
+                evicted += cursor.rowcount
+            self.conn.commit()
+        self.logger.info(f"哈希缓存清除了 {evicted} 条失效记录")
+        return evicted
+
+    def close(self):
+        """提交剩余记录并关闭数据库"""
+        with self._lock:
+            if self.conn:
+                try:
+                    self.flush()
+                finally:
+                    self.conn.close()
+                    self.conn = None
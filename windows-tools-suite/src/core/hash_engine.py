@@ -0,0 +1,115 @@
+import os
+import mmap
+import hashlib
+import threading
+import time
+
+
+class MultiHasher:
+    """一次更新同时计算多个哈希算法，algorithms为hashlib支持的算法名"""
+    def __init__(self, algorithms=('md5',)):
+        self.hashers = {name: hashlib.new(name) for name in algorithms}
+        self._updates = [hasher.update for hasher in self.hashers.values()]
+
+    def update(self, data):
+        for update in self._updates:
+            update(data)
+
+    def hexdigests(self):
+        """返回 {算法: 十六进制摘要}"""
+        return {name: hasher.hexdigest() for name, hasher in self.hashers.items()}
+
+
+class HashEngine:
+    """
+    全套工具共用的文件哈希引擎。
+    普通文件用 readinto 读入每个线程复用的缓冲区，不再为每次读取分配新的bytes对象；
+    不小于 mmap_threshold 的大文件直接对内存映射分段计算，省去一次复制，映射失败时回退到 readinto；
+    一次读取同时计算多个算法。每处理一个缓冲区检查一次停止和暂停标志
+    （与FileGenerator一致，传入返回布尔值的可调用对象），停止时返回None。
+    设置 rate_limiter（RateLimiter）后每个文件和每个缓冲区读取前先取用令牌，限制读取带宽和文件数。
+    同一个引擎可以被多个线程同时使用。
+    """
+    DEFAULT_BUFFER_SIZE = 1024 * 1024
+    DEFAULT_MMAP_THRESHOLD = 64 * 1024 * 1024
+
+    def __init__(self, algorithms=('md5',), buffer_size=DEFAULT_BUFFER_SIZE, mmap_threshold=DEFAULT_MMAP_THRESHOLD,
+                 rate_limiter=None):
+        self.algorithms = tuple(algorithms)
+        self.buffer_size = buffer_size
+        self.mmap_threshold = mmap_threshold  # None表示不使用mmap
+        self.rate_limiter = rate_limiter  # 可选的I/O限速器，多个引擎可以共用
+        self._local = threading.local()
+
+    def _get_buffer(self):
+        """当前线程复用的读取缓冲区"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or len(buffer) != self.buffer_size:
+            buffer = bytearray(self.buffer_size)
+            self._local.buffer = buffer
+        return buffer
+
+    def _should_stop(self, stop_flag, pause_flag):
+        """暂停时在此等待；需要停止时返回True"""
+        while pause_flag and pause_flag():
+            if stop_flag and stop_flag():
+                return True
+            time.sleep(0.1)
+        return bool(stop_flag and stop_flag())
+
+    def hash_file(self, file_path, stop_flag=None, pause_flag=None, progress_callback=None):
+        """
+        计算文件的哈希值，返回 {算法: 十六进制摘要}，收到停止请求时返回None，读取失败时抛出OSError。
+        progress_callback(已处理字节数, 文件大小) 每处理一个缓冲区调用一次
+        """
+        hasher = MultiHasher(self.algorithms)
+        if self.rate_limiter and not self.rate_limiter.acquire_file(stop_flag):
+            return None
+        with open(file_path, 'rb', buffering=0) as f:
+            file_size = os.fstat(f.fileno()).st_size
+            completed = None
+            if self.mmap_threshold is not None and file_size >= max(self.mmap_threshold, 1):
+                completed = self._hash_mapped(f, file_size, hasher, stop_flag, pause_flag, progress_callback)
+            if completed is None:
+                completed = self._hash_buffered(f, file_size, hasher, stop_flag, pause_flag, progress_callback)
+        return hasher.hexdigests() if completed else None
+
+    def _hash_mapped(self, f, file_size, hasher, stop_flag, pause_flag, progress_callback):
+        """mmap方式计算，返回是否完成；无法映射时返回None由调用方回退"""
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        with mapped, memoryview(mapped) as view:
+            size = len(mapped)
+            for offset in range(0, size, self.buffer_size):
+                if self._should_stop(stop_flag, pause_flag):
+                    return False
+                if self.rate_limiter and not self.rate_limiter.acquire_bytes(min(self.buffer_size, size - offset), stop_flag):
+                    return False
+                with view[offset:offset + self.buffer_size] as chunk:
+                    hasher.update(chunk)
+                if progress_callback:
+                    progress_callback(min(offset + self.buffer_size, size), file_size)
+        return True
+
+    def _hash_buffered(self, f, file_size, hasher, stop_flag, pause_flag, progress_callback):
+        """readinto方式计算，返回是否完成"""
+        buffer = self._get_buffer()
+        processed = 0
+        with memoryview(buffer) as view:
+            while True:
+                if self._should_stop(stop_flag, pause_flag):
+                    return False
+                size = f.readinto(buffer)
+                if not size:
+                    break
+                # 按实际读取的字节数取用令牌，令牌不足时在下一次读取之前等待
+                if self.rate_limiter and not self.rate_limiter.acquire_bytes(size, stop_flag):
+                    return False
+                with view[:size] as chunk:
+                    hasher.update(chunk)
+                processed += size
+                if progress_callback:
+                    progress_callback(processed, file_size)
+        return True
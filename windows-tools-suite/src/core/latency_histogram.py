@@ -0,0 +1,98 @@
+import math
+import bisect
+import itertools
+import threading
+
+# 每个2倍区间分为8个桶，相对误差约9%；最小1微秒，最大约 2^30 微秒（约18分钟），超出的计入最后一个桶
+SUB_BUCKETS = 8
+MAX_BUCKET = 30 * SUB_BUCKETS
+
+
+class LatencyHistogram:
+    """
+    对数分桶的延迟直方图：记录任意多次耗时只占用固定内存，可随时取分位数，多个直方图可以合并。
+    分位数取桶的上界，略偏保守；min/max/平均值为精确值。多线程同时记录时加锁。
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (MAX_BUCKET + 1)
+            self.count = 0
+            self.total = 0.0
+            self.min = None
+            self.max = 0.0
+
+    @staticmethod
+    def bucket_of(seconds):
+        micros = seconds * 1e6
+        if micros <= 1:
+            return 0
+        return min(MAX_BUCKET, int(math.ceil(math.log2(micros) * SUB_BUCKETS)))
+
+    @staticmethod
+    def bucket_upper(bucket):
+        """桶的上界（秒）"""
+        return 2 ** (bucket / SUB_BUCKETS) / 1e6
+
+    def record(self, seconds):
+        bucket = self.bucket_of(seconds)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.count += 1
+            self.total += seconds
+            if self.min is None or seconds < self.min:
+                self.min = seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def merge(self, other):
+        """把另一个直方图的记录并入本直方图"""
+        with other._lock:
+            counts, count, total, low, high = list(other.counts), other.count, other.total, other.min, other.max
+        with self._lock:
+            for bucket, n in enumerate(counts):
+                self.counts[bucket] += n
+            self.count += count
+            self.total += total
+            if low is not None and (self.min is None or low < self.min):
+                self.min = low
+            self.max = max(self.max, high)
+
+    def percentiles(self, *ps):
+        """多个百分位（0-100）的延迟（秒），没有记录时为0，不超过实际最大值"""
+        with self._lock:
+            if self.count == 0:
+                return [0.0] * len(ps)
+            # 累计次数和二分查找都在C层完成
+            cumulative = list(itertools.accumulate(self.counts))
+            results = []
+            for p in ps:
+                rank = max(1, int(math.ceil(self.count * p / 100.0)))
+                bucket = bisect.bisect_left(cumulative, rank)
+                results.append(min(self.bucket_upper(bucket), self.max))
+            return results
+
+    def percentile(self, p):
+        """第 p 百分位（0-100）的延迟（秒）"""
+        return self.percentiles(p)[0]
+
+    def summary(self):
+        """次数和以毫秒为单位的 p50/p90/p99/最大/平均值；进度回调中每个文件都会调用，保持轻量"""
+        p50, p90, p99 = self.percentiles(50, 90, 99)
+        mean = self.total / self.count if self.count else 0.0
+        return {
+            'count': self.count,
+            'p50_ms': p50 * 1000,
+            'p90_ms': p90 * 1000,
+            'p99_ms': p99 * 1000,
+            'max_ms': self.max * 1000,
+            'mean_ms': mean * 1000,
+        }
+
+    def nonzero_buckets(self):
+        """[(桶上界毫秒, 次数)]，只包含有记录的桶，用于写出完整分布"""
+        with self._lock:
+            return [(self.bucket_upper(bucket) * 1000, n) for bucket, n in enumerate(self.counts) if n]
@@ -1,7 +1,22 @@
 import os
 import hashlib
+import json
+import logging
 import sys
+import threading
 import multiprocessing
+from .aggregate_digest import AggregateDigest
+from .fingerprint import (FingerprintWriter, compute_fingerprint, load_fingerprint_manifest, find_latest_fingerprint_manifest,
+                          FINGERPRINT_FULL, FINGERPRINT_MATCHED, FINGERPRINT_CACHED)
+from .dir_walker import walk_directory, walk_key, covered_subtrees, is_covered
+from .hash_cache import HashCache
+from .hash_engine import HashEngine
+from .merkle_manifest import MerkleBuilder
+from .path_filter import PathFilter
+from .rate_limiter import RateLimiter
+from .scan_pipeline import ScanPipeline, PipelineAborted, CANCELLED
+from .device_scheduler import DeviceScheduler, group_by_device
+from .skip_log import SkipLog
 from ..utils.logger import get_logger
 import time
 
@@ -18,12 +33,27 @@ class MD5Calculator:
             '.chm'
         ]
         self.progress_callback = None
+        self.rate_limiter = RateLimiter()  # 后台扫描的读取限速，默认不限制
+        self.hash_engine = HashEngine(('md5',), rate_limiter=self.rate_limiter)  # 共用的文件哈希引擎，计算线程之间共享
         # 根据CPU核心数动态设置线程数
         self.max_workers = min(multiprocessing.cpu_count(), 4)
+        self.queue_size = 1000  # 流水线路径队列长度，用于限制内存占用
+        self.device_parallel = True  # 扫描目录分布在多个物理设备上时，每个设备使用独立的线程组同时扫描
+        self.device_workers = {}  # 按设备设置计算线程数：{设备上的任意路径: 线程数}，未设置的设备使用max_workers
         self.batch_size = 10000  # 每批写入的文件数
         self.output_file = None  # 当前输出文件
+        self.output_dir = None  # 输出目录，None时为exe所在目录下的output
         self.total_md5 = hashlib.md5()  # 用于计算总MD5值
+        self.aggregate_digest = AggregateDigest()  # 与处理顺序无关的聚合摘要
+        self.aggregate_mode = 'ordered'  # record.log中记录的总值：ordered顺序相关（兼容旧版），unordered顺序无关
         self.current_directory = ""  # 当前正在处理的目录
+        self.merkle_file = None  # 与输出文件对应的目录级Merkle清单
+        self.fingerprint_file = None  # 快速指纹模式下与输出文件对应的指纹清单
+        self.fingerprint_sample_kib = 64  # 快速指纹在文件开头、中间、结尾各读取的大小（KiB）
+        self.cache_file_name = "hash_cache.db"  # 增量哈希缓存文件，位于output目录
+        self.checkpoint_interval = 60  # 断点保存间隔（秒），每写入一批结果时也会保存
+        self.checkpoint_file = None  # 当前扫描的断点文件：md5-N.log 对应 md5-N.ckpt
+        self.stop_event = threading.Event()  # 协作式停止请求
     
     def set_progress_callback(self, callback):
         """设置进度回调函数"""
@@ -34,6 +64,24 @@ class MD5Calculator:
         if self.progress_callback:
             self.progress_callback(current, total, message)
     
+    def set_max_workers(self, max_workers):
+        """设置并发计算MD5的线程数"""
+        self.max_workers = max(1, int(max_workers))
+    
+    def set_rate_limit(self, mb_per_sec=0, files_per_sec=0):
+        """设置读取限速（MB/秒、个/秒，0表示不限制），扫描过程中调用立即生效"""
+        self.rate_limiter.set_limits(mb_per_sec, files_per_sec)
+        self.logger.info(f"读取限速: {mb_per_sec or '不限'}MB/秒，{files_per_sec or '不限'}个/秒")
+    
+    def set_device_workers(self, device_workers):
+        """设置各设备的计算线程数，键为设备上的任意路径（如 'D:\\'）"""
+        self.device_workers = {path: max(1, int(workers)) for path, workers in (device_workers or {}).items()}
+    
+    def request_stop(self):
+        """请求停止扫描：正在读取的文件在1MB内放弃，已完成的结果写入文件并保存断点后返回"""
+        self.logger.info("收到停止请求，正在保存断点...")
+        self.stop_event.set()
+    
     def is_link_file(self, file_path):
         """检查文件是否是链接文件"""
         try:
@@ -54,6 +102,23 @@ class MD5Calculator:
             self.logger.error(f"检查链接文件失败: {file_path}, 错误: {str(e)}")
             return False
     
+    def is_link_entry(self, entry):
+        """检查DirEntry是否是链接文件，使用遍历时缓存的类型信息"""
+        try:
+            # 检查是否是符号链接
+            if entry.is_symlink():
+                return True
+            
+            # 检查是否是Windows快捷方式
+            if entry.name.lower().endswith('.lnk'):
+                return True
+            
+            # Junction Point和Mount Point只可能是目录，遍历时已经排除
+            return False
+        except Exception as e:
+            self.logger.error(f"检查链接文件失败: {entry.path}, 错误: {str(e)}")
+            return False
+    
     def calculate_file_md5(self, file_path):
         """计算单个文件的MD5值"""
         try:
@@ -67,15 +132,24 @@ class MD5Calculator:
             file_size_mb = file_size / (1024 * 1024)  # 转换为MB
             
             self.logger.debug(f"正在处理: {file_path} (大小: {file_size_mb:.2f}MB)")
-                
-            with open(file_path, 'rb') as f:
-                md5_hash = hashlib.md5()
-                # 使用分块读取以处理大文件
-                for chunk in iter(lambda: f.read(4096), b''):
-                    md5_hash.update(chunk)
-                md5_value = md5_hash.hexdigest()
-                self.logger.debug(f"MD5计算完成: {file_path} = {md5_value}")
-                return md5_value
+        except Exception as e:
+            self.logger.error(f"计算文件MD5失败: {file_path}, 错误: {str(e)}")
+            return None
+        return self.read_file_md5(file_path)
+    
+    def read_file_md5(self, file_path, stop_event=None):
+        """
+        读取文件内容计算MD5值，不做链接和大小检查（调用方已完成过滤）。
+        stop_event被设置时每处理一个缓冲区检查一次，放弃计算并返回CANCELLED
+        """
+        try:
+            digests = self.hash_engine.hash_file(file_path, stop_flag=stop_event.is_set if stop_event else None)
+            if digests is None:
+                self.logger.debug(f"停止请求，放弃计算: {file_path}")
+                return CANCELLED
+            md5_value = digests['md5']
+            self.logger.debug(f"MD5计算完成: {file_path} = {md5_value}")
+            return md5_value
         except Exception as e:
             self.logger.error(f"计算文件MD5失败: {file_path}, 错误: {str(e)}")
             return None
@@ -88,17 +162,26 @@ class MD5Calculator:
                 return file_path, md5
         return None
     
-    def prepare_output_file(self):
-        """准备输出文件"""
-        try:
+    def get_output_dir(self):
+        """获取输出目录（默认为exe所在目录下的output），不存在时自动创建"""
+        if self.output_dir:
+            output_dir = self.output_dir
+        else:
             # 使用exe所在目录作为基准目录
             base_dir = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.path.dirname(os.path.abspath(__file__))
             output_dir = os.path.join(base_dir, "output")
-            os.makedirs(output_dir, exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
+        return output_dir
+    
+    def prepare_output_file(self):
+        """准备输出文件"""
+        try:
+            output_dir = self.get_output_dir()
             
-            # 查找下一个可用的文件序号
+            # 查找下一个可用的文件序号（已被未完成扫描的断点占用的序号同样跳过）
             index = 1
-            while os.path.exists(os.path.join(output_dir, f"md5-{index}.log")):
+            while (os.path.exists(os.path.join(output_dir, f"md5-{index}.log"))
+                   or os.path.exists(os.path.join(output_dir, f"md5-{index}.ckpt"))):
                 index += 1
             
             # 生成文件名
@@ -109,6 +192,22 @@ class MD5Calculator:
             self.logger.error(f"准备输出文件失败: {str(e)}")
             raise
     
+    def prepare_merkle_file(self):
+        """Merkle清单与输出文件同目录同序号：md5-N.log 对应 merkle-N.log"""
+        if not self.output_file:
+            self.prepare_output_file()
+        output_dir, output_name = os.path.split(self.output_file)
+        self.merkle_file = os.path.join(output_dir, output_name.replace("md5-", "merkle-", 1))
+        return self.merkle_file
+    
+    def prepare_fingerprint_file(self):
+        """指纹清单与输出文件同目录同序号：md5-N.log 对应 fingerprint-N.log"""
+        if not self.output_file:
+            self.prepare_output_file()
+        output_dir, output_name = os.path.split(self.output_file)
+        self.fingerprint_file = os.path.join(output_dir, output_name.replace("md5-", "fingerprint-", 1))
+        return self.fingerprint_file
+    
     def write_batch_results(self, results):
         """写入一批结果到文件"""
         try:
@@ -135,176 +234,551 @@ class MD5Calculator:
                 return
             
             # 统一用prepare_output_file的output目录
-            base_dir = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.path.dirname(os.path.abspath(__file__))
-            output_dir = os.path.join(base_dir, "output")
-            os.makedirs(output_dir, exist_ok=True)
+            output_dir = self.get_output_dir()
             record_file = os.path.join(output_dir, "record.log")
             
             with open(record_file, 'a', encoding='utf-8') as f:
-                f.write(f"{self.output_file}\t{self.total_md5.hexdigest()}\n")
+                if self.aggregate_mode == 'unordered':
+                    # 顺序无关模式额外标注模式，便于与旧格式区分
+                    f.write(f"{self.output_file}\t{self.aggregate_digest.hexdigest()}\tunordered\n")
+                else:
+                    f.write(f"{self.output_file}\t{self.total_md5.hexdigest()}\n")
             
             self.logger.info(f"结果已保存到: {record_file}")
         except Exception as e:
             self.logger.error(f"保存record记录失败: {str(e)}")
             raise
     
-    def scan_directory(self, directories, extensions, exclude_hours=4, exclude_keywords=[], time_type='modified'):
+    def open_hash_cache(self, scan_id=None):
+        """打开output目录下的增量哈希缓存，scan_id用于断点续扫时沿用原扫描序号"""
+        cache = HashCache(os.path.join(self.get_output_dir(), self.cache_file_name))
+        cache.open(scan_id)
+        return cache
+    
+    def checkpoint_params(self, directories, extensions, exclude_hours, exclude_keywords, time_type, cache_mode, aggregate_mode,
+                          streaming=False, prune_dirs=False, fingerprint=False, fingerprint_reference=None):
+        """断点对应的扫描参数，续扫时参数必须完全一致"""
+        return {
+            'directories': list(directories),
+            'extensions': list(extensions),
+            'exclude_hours': exclude_hours,
+            'exclude_keywords': list(exclude_keywords),
+            'time_type': time_type,
+            'cache_mode': cache_mode,
+            'aggregate_mode': aggregate_mode,
+            'streaming': streaming,
+            'prune_dirs': prune_dirs,
+            'fingerprint': fingerprint,
+            'fingerprint_reference': fingerprint_reference,
+            'fingerprint_sample_kib': self.fingerprint_sample_kib,
+            'batch_size': self.batch_size,
+        }
+    
+    def write_checkpoint(self, state):
+        """保存断点：先写临时文件再替换，保证断点文件始终完整"""
+        if not self.output_file:
+            self.prepare_output_file()
+        self.checkpoint_file = os.path.splitext(self.output_file)[0] + ".ckpt"
+        # 只记录文件名，输出目录随程序位置确定
+        state['output_file'] = os.path.basename(self.output_file)
+        temp_file = self.checkpoint_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.checkpoint_file)
+    
+    def find_checkpoint(self, params):
+        """在output目录中查找参数一致的最新断点，返回断点内容，没有时返回None"""
+        output_dir = self.get_output_dir()
+        latest = None
+        for name in os.listdir(output_dir):
+            if not (name.startswith("md5-") and name.endswith(".ckpt")):
+                continue
+            checkpoint_file = os.path.join(output_dir, name)
+            try:
+                with open(checkpoint_file, 'r', encoding='utf-8') as f:
+                    checkpoint = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"读取断点文件失败: {checkpoint_file}, 错误: {str(e)}")
+                continue
+            if checkpoint.get('params') != params:
+                continue
+            output_file = os.path.join(output_dir, checkpoint['output_file'])
+            output_size = os.path.getsize(output_file) if os.path.exists(output_file) else 0
+            if output_size < checkpoint['log_offset']:
+                self.logger.warning(f"断点与输出文件不一致，忽略: {checkpoint_file}")
+                continue
+            if latest is None or checkpoint['saved_time'] > latest['saved_time']:
+                checkpoint['checkpoint_file'] = checkpoint_file
+                latest = checkpoint
+        return latest
+    
+    def restore_checkpoint(self, checkpoint, directories, results, merkle):
+        """
+        从断点恢复扫描状态：输出文件截断到最后一次完整写入的位置，
+        重放已写入的结果以恢复总MD5（hashlib的中间状态无法保存）和Merkle清单，
+        未写入的部分结果放回results
+        """
+        self.output_file = os.path.join(self.get_output_dir(), checkpoint['output_file'])
+        self.checkpoint_file = checkpoint['checkpoint_file']
+        
+        def replay(entries):
+            root_index = 0
+            for file_path, md5 in entries:
+                # 结果按遍历顺序写入，依次推进所属的扫描根目录
+                while (root_index < len(directories) - 1
+                       and not file_path.startswith(os.path.join(directories[root_index], ''))):
+                    root_index += 1
+                self.total_md5.update(md5.encode())
+                merkle.add_file(directories[root_index], file_path, md5)
+        
+        if os.path.exists(self.output_file):
+            with open(self.output_file, 'r+b') as f:
+                f.truncate(checkpoint['log_offset'])
+            # 与write_batch_results一致：每批结果写入时总MD5再按批更新一次
+            with open(self.output_file, 'r', encoding='utf-8') as f:
+                batch = []
+                for line in f:
+                    file_path, _, md5 = line.rstrip('\n').rpartition('\t')
+                    batch.append((file_path, md5))
+                    if len(batch) >= self.batch_size:
+                        replay(batch)
+                        for _, md5 in batch:
+                            self.total_md5.update(md5.encode())
+                        batch = []
+                replay(batch)
+        tail = [tuple(item) for item in checkpoint['tail']]
+        replay(tail)
+        results.update(tail)
+        
+        if self.total_md5.hexdigest() != checkpoint['total_md5']:
+            raise ValueError(f"断点校验失败，输出文件已被修改: {self.output_file}")
+        self.aggregate_digest = AggregateDigest.from_state(checkpoint['aggregate'])
+        self.logger.info(
+            f"已从断点恢复: {self.checkpoint_file}，已写入 {checkpoint['flushed_count']} 个结果，"
+            f"未写入 {len(tail)} 个结果"
+        )
+    
+    def scan_directory(self, directories, extensions, exclude_hours=4, exclude_keywords=[], time_type='modified', cache_mode='off',
+                       aggregate_mode='ordered', resume=False, streaming=False, prune_dirs=False, fingerprint=False,
+                       fingerprint_reference=None):
+        """
+        扫描目录并计算MD5。cache_mode: 'off' 不使用缓存，'trust' 元数据未变化的文件直接使用缓存结果，
+        'verify' 全部重新计算并与缓存比对，报告元数据未变但内容变化的文件。
+        aggregate_mode: 'ordered' record.log记录按遍历顺序计算的总MD5（兼容旧版），
+        'unordered' 记录与处理顺序无关、可跨分片合并的聚合摘要。
+        扫描过程中定期保存断点（遍历位置、已写入结果数和总值状态），request_stop()停止后
+        或程序异常退出后，以相同参数和resume=True调用即可从断点处继续，结果与不中断的扫描一致。
+        streaming=True 为低内存模式：被排除的文件直接写入临时文件，只在内存中保留按原因汇总的计数，
+        skipped日志按遍历顺序输出（多个设备同时扫描时各设备的记录相互交错），峰值内存与目录树大小无关，适用于千万级文件的目录。
+        prune_dirs=True 时路径包含排除关键字的子目录整体跳过，skipped日志中只记录该目录。
+        fingerprint=True 为快速指纹模式：大小、修改时间和文件开头/中间/结尾采样的MD5都与参考指纹清单
+        （fingerprint_reference，默认为output目录中最新的指纹清单）一致的文件直接沿用清单中的MD5，
+        其余文件完整计算。fingerprint-N.log 中逐个文件标明完整计算(full)还是指纹匹配(matched)。
+        目录分布在多个物理设备上时（device_parallel），每个设备使用独立的遍历和计算线程同时扫描，
+        线程数可用set_device_workers()按设备设置，结果按目录输入顺序合并，输出与逐个目录扫描一致。
+        """
         start_time = time.time()
+        self.aggregate_mode = aggregate_mode
+        self.rate_limiter.reset_stats()
         results = {}
         total_scanned = 0
         processed_files = 0
         excluded_files = 0
+        failed_files = 0
         total_size = 0
-        skipped_files = []
-        current_time = time.time()
-        processed_paths = set()
+        cache_hits = 0
+        cache_mismatches = 0
+        merkle = MerkleBuilder(self.prepare_merkle_file)
         
-        # 检查是否包含通配符
-        match_all = '*' in [ext.strip() for ext in extensions]
-
-        for directory in directories:
+        # 断点状态：flushed_count/log_offset为最后一次完整写入批次后的结果数和文件长度，cursor为最后处理的文件
+        params = self.checkpoint_params(directories, extensions, exclude_hours, exclude_keywords, time_type, cache_mode, aggregate_mode,
+                                        streaming, prune_dirs, fingerprint, fingerprint_reference)
+        flushed_count = 0
+        log_offset = 0
+        cursor = None
+        last_checkpoint_time = time.time()
+        checkpoint = self.find_checkpoint(params) if resume else None
+        if resume and checkpoint is None:
+            self.logger.warning("没有找到参数一致的断点，重新开始扫描")
+        skip_log = SkipLog(streaming, checkpoint['skip_part'] if checkpoint else None)
+        if streaming and not checkpoint:
+            # 与断点文件放在同一输出目录，从其他工作目录续扫时也能找到
+            skip_log.part_file = os.path.abspath(os.path.join(self.get_output_dir(), f"skipped-{int(start_time)}.part"))
+            if os.path.exists(skip_log.part_file):
+                os.remove(skip_log.part_file)
+        
+        def before_cursor(file_path, root_index):
+            """文件在遍历顺序中是否位于断点及之前"""
+            if not cursor:
+                return False
+            cursor_key = (cursor[0], walk_key(directories[cursor[0]], cursor[1]))
+            return (root_index, walk_key(directories[root_index], file_path)) <= cursor_key
+        
+        if checkpoint:
+            self.restore_checkpoint(checkpoint, directories, results, merkle)
+            flushed_count = checkpoint['flushed_count']
+            log_offset = checkpoint['log_offset']
+            cursor = tuple(checkpoint['cursor']) if checkpoint['cursor'] else None
+            skip_log.restore([tuple(item) for item in checkpoint['skipped'] or []], before_cursor)
+            processed_files = checkpoint['processed_files']
+            total_size = checkpoint['total_size']
+            cache_hits = checkpoint['cache_hits']
+            cache_mismatches = checkpoint['cache_mismatches']
+            failed_files = skip_log.counters.get("MD5计算失败", 0)
+            excluded_files = skip_log.count - failed_files
+            total_scanned = processed_files + skip_log.count
+        
+        # 快速指纹：参考清单在首次扫描开始时确定，续扫时沿用断点中记录的清单
+        fingerprint_writer = FingerprintWriter(self.prepare_fingerprint_file) if fingerprint else None
+        fingerprint_manifest = {}
+        sample_size = self.fingerprint_sample_kib * 1024
+        if fingerprint:
+            if checkpoint:
+                fingerprint_reference = checkpoint['fingerprint_reference']
+                fingerprint_writer.restore(checkpoint['fingerprint_offset'], checkpoint['fingerprint_counts'])
+            elif fingerprint_reference is None:
+                fingerprint_reference = find_latest_fingerprint_manifest(self.get_output_dir())
+            if fingerprint_reference:
+                fingerprint_manifest = load_fingerprint_manifest(fingerprint_reference)
+                self.logger.info(f"快速指纹参考清单: {fingerprint_reference}，共 {len(fingerprint_manifest)} 个文件")
+            else:
+                self.logger.warning("没有找到参考指纹清单，全部文件完整计算")
+        
+        hash_cache = None
+        if cache_mode in ('trust', 'verify'):
+            hash_cache = self.open_hash_cache(checkpoint['scan_id'] if checkpoint else None)
+        resume_cursor = cursor
+        # 根目录相互包含时，已被之前的根目录遍历过的子树中的文件均为重复文件
+        duplicate_subtrees = covered_subtrees(directories)
+        
+        # 扩展名和排除关键字过滤器，每次扫描编译一次
+        path_filter = PathFilter(extensions, exclude_keywords, prune_dirs)
+        # 逐文件的调试日志只在DEBUG级别下格式化
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        
+        # 时间排除使用的stat字段
+        if time_type == 'modified':
+            time_attr, time_desc = 'st_mtime', "修改时间"
+        elif time_type == 'created':
+            time_attr, time_desc = 'st_ctime', "创建时间"
+        else:  # accessed
+            time_attr, time_desc = 'st_atime', "访问时间"
+        exclude_seconds = exclude_hours * 3600
+        
+        # 遍历 -> 计算 -> 写入 流水线：遍历线程把待计算文件放入有界队列，
+        # 计算线程并发读取文件，写入阶段按遍历顺序汇总结果，保证输出与顺序扫描一致。
+        # 目录分布在多个设备上时每个设备各有一组遍历和计算线程，遍历计数按根目录分别累计
+        self.logger.info(f"MD5计算线程数: {self.max_workers}")
+        walk_scanned = [0] * len(directories)
+        walk_excluded = [0] * len(directories)
+        stage_msg = ""
+        last_stage_time = 0.0
+        
+        def save_checkpoint():
+            """保存断点，只记录遍历顺序位于cursor及之前的排除文件，之后的文件续扫时会重新遍历"""
+            skipped = skip_log.snapshot(before_cursor)
+            if hash_cache:
+                hash_cache.flush()
+            self.write_checkpoint({
+                'params': params,
+                'saved_time': time.time(),
+                'flushed_count': flushed_count,
+                'log_offset': log_offset,
+                'tail': list(results.items()),
+                'cursor': cursor,
+                'skipped': skipped,
+                'skip_part': skip_log.part_file,
+                'processed_files': processed_files,
+                'total_size': total_size,
+                'cache_hits': cache_hits,
+                'cache_mismatches': cache_mismatches,
+                'aggregate': self.aggregate_digest.get_state(),
+                'total_md5': self.total_md5.hexdigest(),
+                'scan_id': hash_cache.scan_id if hash_cache else None,
+                'fingerprint_reference': fingerprint_reference,
+                'fingerprint_offset': fingerprint_writer.offset() if fingerprint_writer else 0,
+                'fingerprint_counts': fingerprint_writer.counts if fingerprint_writer else {},
+            })
+        
+        def walk_root(root_index, emit):
+            """遍历阶段：遍历一个扫描根目录，过滤文件并提交待计算任务"""
+            directory = directories[root_index]
+            
+            def prune(dir_path):
+                """包含排除关键字的子目录整体跳过，只记录目录本身"""
+                keyword = path_filter.prune_directory(dir_path)
+                if keyword is None:
+                    return False
+                if debug:
+                    self.logger.debug(f"目录[{dir_path}]包含排除关键字[{keyword}]，跳过整个目录")
+                skip_log.add(os.path.join(dir_path, ''), f"目录关键字排除({keyword})", root_index)
+                return True
+            
+            resume_after = None
+            if resume_cursor:
+                # 断点之前的扫描根目录已全部完成
+                if root_index < resume_cursor[0]:
+                    return
+                if root_index == resume_cursor[0]:
+                    resume_after = resume_cursor[1]
             self.current_directory = directory
             self.logger.info(f"开始扫描目录: {directory}")
-            self.logger.info(f"文件扩展名过滤: {'所有文件' if match_all else ', '.join(extensions)}")
+            self.logger.info(f"文件扩展名过滤: {'所有文件' if path_filter.match_all else ', '.join(extensions)}")
             self.logger.info(exclude_keywords)
         
-            # 遍历目录并处理文件
-            for root, dirs, files in os.walk(directory):
-                dirs.sort()
-                files.sort()
-                
+            # 遍历目录并处理文件：先做扩展名、关键字等纯字符串过滤，
+            # 通过后才读取DirEntry缓存的stat结果做时间和链接检查
+            for root, entries in walk_directory(directory, resume_after, prune if path_filter.prune_dirs else None):
                 # 更新当前处理的子目录
                 self.current_directory = root
-                if len(files) > 0:
-                    self.logger.debug(f"正在处理子目录: {root}，包含 {len(files)} 个文件")
+                if debug and len(entries) > 0:
+                    self.logger.debug(f"正在处理子目录: {root}，包含 {len(entries)} 个文件")
+                # 每个目录刷新一次当前时间，避免逐文件调用time.time()
+                current_time = int(time.time())
+                duplicate_dir = is_covered(root, duplicate_subtrees[root_index])
                 
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    total_scanned += 1
-                    self.logger.debug(f"扫描文件: {file_path}")
-                    
-                    try:
-                        file_size = os.path.getsize(file_path)
-                    except OSError:
-                        self.logger.error(f"获取文件大小失败: {file_path}")
-                        excluded_files += 1
-                        skipped_files.append((file_path, "无法获取文件大小"))
-                        continue
+                for entry in entries:
+                    if self.stop_event.is_set():
+                        raise PipelineAborted()
+                    file_path = entry.path
+                    walk_scanned[root_index] += 1
+                    if debug:
+                        self.logger.debug(f"扫描文件: {file_path}")
                     
                     # 检查是否已经处理过这个文件
-                    if file_path in processed_paths:
-                        self.logger.debug(f"文件已处理过，跳过: {file_path}")  # 改为 debug 级别
-                        excluded_files += 1
-                        skipped_files.append((file_path, "文件已处理过"))
+                    if duplicate_dir:
+                        if debug:
+                            self.logger.debug(f"文件已处理过，跳过: {file_path}")
+                        walk_excluded[root_index] += 1
+                        skip_log.add(file_path, "文件已处理过", root_index)
                         continue
-                    processed_paths.add(file_path)
                     
                     # 检查文件扩展名（如果不是匹配所有文件的情况）
-                    if not match_all and not any(file.lower().endswith(ext.lower()) for ext in extensions):
-                        self.logger.debug(f"跳过文件（扩展名不匹配）: {file_path}")  # 改为 debug 级别
-                        excluded_files += 1
-                        skipped_files.append((file_path, "扩展名不匹配"))
+                    if not path_filter.match_extension(entry.name):
+                        if debug:
+                            self.logger.debug(f"跳过文件（扩展名不匹配）: {file_path}")
+                        walk_excluded[root_index] += 1
+                        skip_log.add(file_path, "扩展名不匹配", root_index)
                         continue
                         
-                    # 检查是否包含排除关键字（增强日志）
-                    matched_keyword = None
-                    for keyword in exclude_keywords:
-                        if keyword.lower() in file_path.lower():
-                            matched_keyword = keyword
-                            self.logger.debug(
-                                f"文件[{file_path}]包含排除关键字[{keyword}]，将被排除。"
-                            )
-                            break
-                        else:
-                            self.logger.debug(
-                                f"文件[{file_path}]未包含排除关键字[{keyword}]。"
-                            )
+                    # 检查是否包含排除关键字
+                    matched_keyword = path_filter.match_keyword(file_path)
                     if matched_keyword:
-                        skipped_files.append((file_path, f"关键字排除({matched_keyword})"))
-                        excluded_files += 1
+                        if debug:
+                            self.logger.debug(f"文件[{file_path}]包含排除关键字[{matched_keyword}]，将被排除。")
+                        skip_log.add(file_path, f"关键字排除({matched_keyword})", root_index)
+                        walk_excluded[root_index] += 1
                         continue
                     
-                    # 检查文件时间
+                    # 获取文件属性（DirEntry会缓存stat结果，大小和时间检查共用一次系统调用）
                     try:
-                        if time_type == 'modified':
-                            file_time = int(os.path.getmtime(file_path))
-                            time_desc = "修改时间"
-                        elif time_type == 'created':
-                            file_time = int(os.path.getctime(file_path))
-                            time_desc = "创建时间"
-                        else:  # accessed
-                            file_time = int(os.path.getatime(file_path))
-                            time_desc = "访问时间"
-                        
-                        current_time = int(time.time())
-                        time_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(file_time))
-                        seconds_since = current_time - file_time
-                        hours_since = seconds_since / 3600
-                        
-                        if seconds_since < exclude_hours * 3600:
-                            self.logger.debug(f"跳过文件（时间排除）: {file_path}, {time_desc}: {time_str}")  # 改为 debug 级别
-                            skipped_files.append((file_path, f"时间排除 ({time_desc}: {time_str})"))
-                            excluded_files += 1
-                            continue
-                    except OSError as e:
-                        self.logger.error(f"获取文件时间失败: {file_path}, 错误: {str(e)}")
-                        excluded_files += 1
-                        skipped_files.append((file_path, f"无法获取文件时间: {str(e)}"))
+                        file_stat = entry.stat()
+                    except OSError:
+                        self.logger.error(f"获取文件大小失败: {file_path}")
+                        walk_excluded[root_index] += 1
+                        skip_log.add(file_path, "无法获取文件大小", root_index)
                         continue
+                    file_size = file_stat.st_size
                     
-                    # 检查是否是链接文件
-                    if self.is_link_file(file_path):
-                        self.logger.debug(f"跳过链接文件: {file_path}")  # 改为 debug 级别
-                        excluded_files += 1
-                        skipped_files.append((file_path, "链接文件"))
+                    # 检查文件时间
+                    file_time = int(getattr(file_stat, time_attr))
+                    if current_time - file_time < exclude_seconds:
+                        time_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(file_time))
+                        if debug:
+                            self.logger.debug(f"跳过文件（时间排除）: {file_path}, {time_desc}: {time_str}")
+                        skip_log.add(file_path, f"时间排除 ({time_desc}: {time_str})", root_index)
+                        walk_excluded[root_index] += 1
                         continue
                     
-                    # 计算MD5
-                    md5 = self.calculate_file_md5(file_path)
-                    if md5:
-                        results[file_path] = md5
-                        self.total_md5.update(md5.encode())
-                        processed_files += 1
-                        total_size += file_size
-                        
-                        # 每处理100个文件输出一次日志
-                        if processed_files % 1000 == 0:
-                            self.logger.info(f"已成功处理 {processed_files} 个文件")
-                        
-                        # 如果结果达到批处理大小，写入文件
-                        if len(results) >= self.batch_size:
-                            self.write_batch_results(results)
-                            results.clear()
-                    else:
-                        self.logger.error(f"MD5计算失败: {file_path}")
-                        excluded_files += 1
-                        skipped_files.append((file_path, "MD5计算失败"))
+                    # 检查是否是链接文件（符号链接类型由DirEntry缓存，无需再次stat）
+                    if self.is_link_entry(entry):
+                        if debug:
+                            self.logger.debug(f"跳过链接文件: {file_path}")
+                        walk_excluded[root_index] += 1
+                        skip_log.add(file_path, "链接文件", root_index)
+                        continue
                     
-                    # 计算已用时间
-                    elapsed_time = time.time() - start_time
-                    elapsed_minutes = int(elapsed_time // 60)
-                    elapsed_seconds = int(elapsed_time % 60)
+                    # 查询增量哈希缓存，trust模式下命中的文件不再读取内容
+                    cache_info = None
+                    read_size = file_size
+                    if hash_cache:
+                        try:
+                            cache_key = (file_size, file_stat.st_mtime_ns, entry.inode())
+                        except OSError:
+                            cache_key = (file_size, file_stat.st_mtime_ns, 0)
+                        cached_md5 = hash_cache.lookup(file_path, *cache_key)
+                        from_cache = cache_mode == 'trust' and cached_md5 is not None
+                        cache_info = (cache_key, cached_md5, from_cache)
+                        if from_cache:
+                            read_size = 0
                     
-                    # 更新进度信息
-                    total_size_mb = total_size / (1024 * 1024)
-                    progress_msg = (
-                        f"已扫描{total_scanned}个文件，"
-                        f"符合条件{processed_files}个文件(总大小: {total_size_mb:.2f}MB)，"
-                        f"排除{excluded_files}个文件，"
-                        f"已用时间: {elapsed_minutes}分{elapsed_seconds}秒"
-                    )
-                    self.update_progress(total_scanned, 0, progress_msg)
+                    # 提交给计算线程，缓存命中的任务同样排队，保持遍历顺序
+                    emit((file_path, file_size, cache_info, root_index, file_stat.st_mtime_ns), read_size)
+        
+        def walk_files(emit):
+            """遍历阶段：依次遍历全部扫描根目录"""
+            for root_index in range(len(directories)):
+                walk_root(root_index, emit)
+        
+        def hash_file(task):
+            """计算阶段：读取文件内容计算MD5，缓存命中时直接返回缓存结果"""
+            file_path, file_size, cache_info, root_index, mtime_ns = task
+            if cache_info and cache_info[2]:
+                return cache_info[1]
+            return self.read_file_md5(file_path, self.stop_event)
+        
+        def fingerprint_file(task):
+            """
+            快速指纹模式的计算阶段，返回 (MD5, 指纹, 处理方式)。
+            不超过三个采样块的小文件采样与完整读取成本相当，直接完整计算，指纹记为"-"
+            """
+            file_path, file_size, cache_info, root_index, mtime_ns = task
+            file_fingerprint = "-"
+            if file_size > 3 * sample_size:
+                # 指纹采样读取同样计入限速
+                if not self.rate_limiter.acquire_bytes(3 * sample_size, self.stop_event.is_set):
+                    return CANCELLED
+                try:
+                    file_fingerprint = compute_fingerprint(file_path, file_size, sample_size)
+                except OSError as e:
+                    self.logger.error(f"计算文件指纹失败: {file_path}, 错误: {str(e)}")
+                reference = fingerprint_manifest.get(file_path)
+                if reference and reference[:3] == (file_size, mtime_ns, file_fingerprint):
+                    return reference[3], file_fingerprint, FINGERPRINT_MATCHED
+            md5 = hash_file(task)
+            if not md5 or md5 is CANCELLED:
+                return md5
+            mode = FINGERPRINT_CACHED if cache_info and cache_info[2] else FINGERPRINT_FULL
+            return md5, file_fingerprint, mode
+        
+        def collect_result(task, md5):
+            """写入阶段：按遍历顺序处理一个文件的MD5结果，cache_info为(缓存键, 缓存中的MD5, 是否直接使用缓存)"""
+            nonlocal processed_files, failed_files, total_size, cache_hits, cache_mismatches, stage_msg, last_stage_time
+            nonlocal flushed_count, log_offset, cursor, last_checkpoint_time
+            file_path, file_size, cache_info, root_index, mtime_ns = task
+            if md5 and fingerprint_writer:
+                md5, file_fingerprint, mode = md5
+                fingerprint_writer.add(file_path, file_size, mtime_ns, file_fingerprint, md5, mode)
+            if md5 and cache_info:
+                cache_key, cached_md5, from_cache = cache_info
+                if from_cache:
+                    cache_hits += 1
+                if cached_md5 and cached_md5 != md5:
+                    cache_mismatches += 1
+                    self.logger.warning(f"缓存校验不一致（元数据未变但内容变化）: {file_path}, 缓存: {cached_md5}, 实际: {md5}")
+                if not from_cache and cached_md5 != md5:
+                    hash_cache.store(file_path, *cache_key, md5)
+            cursor = (root_index, file_path)
+            if md5:
+                results[file_path] = md5
+                self.total_md5.update(md5.encode())
+                self.aggregate_digest.update(file_path, md5)
+                merkle.add_file(directories[root_index], file_path, md5)
+                processed_files += 1
+                total_size += file_size
+                
+                # 每处理100个文件输出一次日志
+                if processed_files % 1000 == 0:
+                    self.logger.info(f"已成功处理 {processed_files} 个文件")
+                    self.logger.info(f"流水线状态: {pipeline.stats_message()}")
+                
+                # 如果结果达到批处理大小，写入文件
+                if len(results) >= self.batch_size:
+                    self.write_batch_results(results)
+                    results.clear()
+                    flushed_count = processed_files
+                    log_offset = os.path.getsize(self.output_file)
+                    save_checkpoint()
+                    last_checkpoint_time = time.time()
+            else:
+                self.logger.error(f"MD5计算失败: {file_path}")
+                failed_files += 1
+                skip_log.add(file_path, "MD5计算失败", root_index)
+            
+            # 计算已用时间
+            now = time.time()
+            elapsed_time = now - start_time
+            elapsed_minutes = int(elapsed_time // 60)
+            elapsed_seconds = int(elapsed_time % 60)
+            
+            # 两次批量写入间隔较长时按时间保存断点
+            if now - last_checkpoint_time >= self.checkpoint_interval:
+                save_checkpoint()
+                last_checkpoint_time = now
+            
+            # 各阶段吞吐量每秒刷新一次
+            if now - last_stage_time >= 1:
+                stage_msg = pipeline.stats_message()
+                last_stage_time = now
+            
+            # 更新进度信息
+            total_size_mb = total_size / (1024 * 1024)
+            progress_msg = (
+                f"已扫描{total_scanned + sum(walk_scanned)}个文件，"
+                f"符合条件{processed_files}个文件(总大小: {total_size_mb:.2f}MB)，"
+                f"排除{excluded_files + sum(walk_excluded) + failed_files}个文件，"
+                f"已用时间: {elapsed_minutes}分{elapsed_seconds}秒"
+            )
+            if hash_cache:
+                progress_msg += f"，缓存命中{cache_hits}个"
+            progress_msg += f"\n{stage_msg}"
+            if self.rate_limiter.enabled:
+                progress_msg += f"\n{self.rate_limiter.stats_message()}"
+            self.update_progress(total_scanned + sum(walk_scanned), 0, progress_msg)
+        
+        if self.device_parallel and len(group_by_device(directories)) > 1:
+            # 结果按设备暂存到output目录，写入阶段按目录输入顺序合并，输出与顺序扫描一致
+            pipeline = DeviceScheduler(
+                directories, walk_root, fingerprint_file if fingerprint else hash_file, collect_result,
+                device_workers=self.device_workers, hash_workers=self.max_workers, queue_size=self.queue_size,
+                stop_event=self.stop_event, spool_dir=self.get_output_dir()
+            )
+        else:
+            pipeline = ScanPipeline(
+                walk_files, fingerprint_file if fingerprint else hash_file, collect_result,
+                hash_workers=self.max_workers, queue_size=self.queue_size, stop_event=self.stop_event
+            )
+        try:
+            pipeline.run()
+            self.logger.info(f"流水线状态: {pipeline.stats_message()}")
+            if pipeline.cancelled:
+                save_checkpoint()
+            elif hash_cache:
+                hash_cache.evict_missing(directories)
+        finally:
+            total_scanned += sum(walk_scanned)
+            excluded_files += sum(walk_excluded)
+            if pipeline.cancelled:
+                # 未完成的目录摘要没有意义，续扫时重新生成Merkle清单
+                merkle.abandon()
+            else:
+                merkle.close()
+            if hash_cache:
+                hash_cache.close()
+            if fingerprint_writer:
+                fingerprint_writer.close()
+        
+        if pipeline.cancelled:
+            # 写出尚未写入的结果，续扫时会截断到断点记录的位置
+            if results:
+                self.write_batch_results(results)
+            skip_log.close()
+            self.logger.info(
+                f"扫描已停止，已处理{processed_files}个文件，结果已写入: {self.output_file}，"
+                f"断点已保存到: {self.checkpoint_file}，可使用相同参数断点续扫"
+            )
+            return self.output_file
+        excluded_files += failed_files
         
         # 记录被排除的文件
-        if skipped_files:
-            os.makedirs("output", exist_ok=True)  # 确保output目录存在
-            skip_file = os.path.join("output", f"skipped-{int(time.time())}.log")
-            with open(skip_file, 'w', encoding='utf-8', errors='ignore') as f:
-                f.write("以下文件因被排除而跳过：\n")
-                f.write(f"总计跳过文件数：{len(skipped_files)}\n\n")
-                for file_path, reason in sorted(skipped_files):
-                    f.write(f"{file_path} ({reason})\n")
+        if skip_log.count:
+            skip_file = os.path.join(self.get_output_dir(), f"skipped-{int(time.time())}.log")
+            skip_log.write(skip_file)
             self.logger.info(f"被排除的文件列表已保存到: {skip_file}")
+        else:
+            skip_log.discard()
         
         # 写入最后一批结果
         if results:
@@ -312,6 +786,15 @@ class MD5Calculator:
         
         # 保存record记录
         self.save_final_record()
+        if self.merkle_file:
+            self.logger.info(f"目录Merkle清单已保存到: {self.merkle_file}，共 {merkle.directory_count} 个目录")
+        if fingerprint_writer and fingerprint_writer.manifest_file:
+            self.logger.info(f"指纹清单已保存到: {fingerprint_writer.manifest_file}")
+        
+        # 扫描已完整结束，删除断点
+        if self.checkpoint_file and os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
+        self.checkpoint_file = None
         
         elapsed_time = time.time() - start_time
         final_msg = (
@@ -321,10 +804,29 @@ class MD5Calculator:
             f"总大小: {total_size / (1024 * 1024):.2f}MB，"
             f"耗时: {elapsed_time:.2f}秒"
         )
+        if aggregate_mode == 'unordered':
+            final_msg += f"，顺序无关聚合摘要: {self.aggregate_digest.hexdigest()}"
+        if hash_cache:
+            final_msg += f"，缓存命中{cache_hits}个文件"
+            if cache_mode == 'verify':
+                final_msg += f"，缓存校验不一致{cache_mismatches}个文件"
+        if self.rate_limiter.enabled:
+            final_msg += f"，{self.rate_limiter.stats_message()}"
+        if fingerprint_writer:
+            counts = fingerprint_writer.counts
+            final_msg += (
+                f"，完整计算{counts.get(FINGERPRINT_FULL, 0)}个文件，"
+                f"指纹匹配{counts.get(FINGERPRINT_MATCHED, 0)}个文件（未完整校验，详见指纹清单）"
+            )
         self.logger.info(final_msg)
         return self.output_file
 
     def reset(self):
         self.output_file = None
         self.total_md5 = hashlib.md5()
-        self.current_directory = ""
\ No newline at end of file
+        self.aggregate_digest = AggregateDigest()
+        self.merkle_file = None
+        self.fingerprint_file = None
+        self.checkpoint_file = None
+        self.stop_event.clear()
+        self.current_directory = ""
@@ -0,0 +1,169 @@
+import os
+import hashlib
+
+
+class MerkleBuilder:
+    """
+    流式构建目录级Merkle树。
+    文件结果需按扫描遍历顺序到达（同一目录先文件后子目录、子目录按名称排序的深度优先顺序），
+    这样离开一个目录时即可确定其摘要，内存中只保留当前路径上的目录栈。
+    目录摘要 = MD5(按顺序排列的 "F\t文件名\tMD5" 和 "D\t子目录名\t子目录摘要" 行)。
+    结果按后序写入清单文件，每行格式：
+        类型(R根目录/D目录)\t目录摘要\t直接文件摘要\t子树文件数\t目录路径
+    """
+    def __init__(self, manifest_path_factory):
+        self.manifest_path_factory = manifest_path_factory
+        self.manifest_file = None
+        self._fh = None
+        self._stack = []  # [路径, 目录摘要hasher, 直接文件摘要hasher, 子树文件数]
+        self._root = None
+        self.directory_count = 0
+
+    def _push(self, path):
+        self._stack.append([path, hashlib.md5(), hashlib.md5(), 0])
+
+    def _pop(self):
+        path, hasher, files_hasher, count = self._stack.pop()
+        digest = hasher.hexdigest()
+        kind = 'D' if self._stack else 'R'
+        self._write(f"{kind}\t{digest}\t{files_hasher.hexdigest()}\t{count}\t{path}\n")
+        if self._stack:
+            parent = self._stack[-1]
+            parent[1].update(f"D\t{os.path.basename(path)}\t{digest}\n".encode('utf-8', errors='surrogateescape'))
+            parent[3] += count
+
+    def _write(self, line):
+        if self._fh is None:
+            self.manifest_file = self.manifest_path_factory()
+            self._fh = open(self.manifest_file, 'w', encoding='utf-8', errors='surrogateescape')
+        self._fh.write(line)
+        self.directory_count += 1
+
+    def add_file(self, root, file_path, md5):
+        """加入一个文件结果，root为该文件所属的扫描根目录"""
+        # 根目录末尾的分隔符（如 C:\Windows\）不能产生多余的 "." 目录，同一目录树的根摘要必须相同
+        root = os.path.normpath(root)
+        if root != self._root:
+            self.finish_root()
+            self._root = root
+            self._push(root)
+
+        directory = os.path.normpath(os.path.dirname(file_path))
+        # 离开已经遍历完的目录
+        while len(self._stack) > 1:
+            top = self._stack[-1][0]
+            if directory == top or directory.startswith(os.path.join(top, '')):
+                break
+            self._pop()
+        # 进入新的子目录
+        top = self._stack[-1][0]
+        if directory != top:
+            for name in os.path.relpath(directory, top).split(os.sep):
+                if name in ('', '.'):
+                    continue
+                self._push(os.path.join(self._stack[-1][0], name))
+
+        frame = self._stack[-1]
+        line = f"F\t{os.path.basename(file_path)}\t{md5}\n".encode('utf-8', errors='surrogateescape')
+        frame[1].update(line)
+        frame[2].update(line)
+        frame[3] += 1
+
+    def finish_root(self):
+        """结束当前根目录，写出栈中剩余目录"""
+        while self._stack:
+            self._pop()
+        self._root = None
+
+    def close(self):
+        self.finish_root()
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+    def abandon(self):
+        """放弃未完成的清单（扫描中途停止时），删除已写出的部分内容"""
+        self._stack = []
+        self._root = None
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+            if os.path.exists(self.manifest_file):
+                os.remove(self.manifest_file)
+
+
+def load_merkle_manifest(manifest_file):
+    """
+    读取Merkle清单，返回 [(根目录, {相对路径: (目录摘要, 直接文件摘要, 文件数)})]，
+    使用相对根目录的路径，便于比较不同机器或不同根目录下的扫描结果
+    """
+    roots = []
+    current = {}
+    with open(manifest_file, 'r', encoding='utf-8', errors='surrogateescape') as f:
+        for line in f:
+            parts = line.rstrip('\n').split('\t', 4)
+            if len(parts) != 5:
+                continue
+            kind, digest, files_digest, count, path = parts
+            current[path] = (digest, files_digest, int(count))
+            if kind == 'R':
+                # 根目录在后序遍历中最后写出
+                tree = {os.path.relpath(p, path): v for p, v in current.items()}
+                roots.append((path, tree))
+                current = {}
+    return roots
+
+
+def compare_merkle_manifests(old_file, new_file):
+    """
+    比较两次扫描的Merkle清单，只下降到摘要不同的子树。
+    路径相同的根目录相互对应，其余根目录按清单中的顺序一一对应（例如不同机器上的不同路径）。
+    返回 (差异列表, 比较次数)，差异项为 (旧根目录, 新根目录, 相对路径, 原因)，
+    原因为：目录文件不同、仅旧扫描存在、仅新扫描存在
+    """
+    old_roots = load_merkle_manifest(old_file)
+    new_roots = load_merkle_manifest(new_file)
+    differences = []
+    comparisons = 0
+
+    def children_index(tree):
+        index = {}
+        for rel in tree:
+            if rel != '.':
+                parent = os.path.dirname(rel) or '.'
+                index.setdefault(parent, []).append(rel)
+        return index
+
+    # 先按路径配对根目录，剩余的按顺序配对
+    new_by_path = dict(new_roots)
+    pairs = [((root, tree), (root, new_by_path[root])) for root, tree in old_roots if root in new_by_path]
+    old_rest = [item for item in old_roots if item[0] not in new_by_path]
+    old_paths = {root for root, _ in old_roots}
+    new_rest = [item for item in new_roots if item[0] not in old_paths]
+    for i in range(max(len(old_rest), len(new_rest))):
+        pairs.append((old_rest[i] if i < len(old_rest) else (None, {}),
+                      new_rest[i] if i < len(new_rest) else (None, {})))
+
+    for (old_root, old_tree), (new_root, new_tree) in pairs:
+        old_children = children_index(old_tree)
+        new_children = children_index(new_tree)
+        pending = ['.']
+        while pending:
+            rel = pending.pop()
+            old_entry = old_tree.get(rel)
+            new_entry = new_tree.get(rel)
+            comparisons += 1
+            if old_entry is None:
+                differences.append((old_root, new_root, rel, "仅新扫描存在"))
+                continue
+            if new_entry is None:
+                differences.append((old_root, new_root, rel, "仅旧扫描存在"))
+                continue
+            if old_entry[0] == new_entry[0]:
+                continue
+            if old_entry[1] != new_entry[1]:
+                differences.append((old_root, new_root, rel, "目录文件不同"))
+            pending.extend(set(old_children.get(rel, [])) | set(new_children.get(rel, [])))
+
+    differences.sort(key=lambda d: d[2])
+    return differences, comparisons
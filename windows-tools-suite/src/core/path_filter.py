@@ -0,0 +1,55 @@
+import os
+import re
+
+
+class PathFilter:
+    """
+    预编译的扩展名和排除关键字过滤器，每次扫描构建一次。
+    扩展名按长度分组放入集合，每个文件只需做几次切片和哈希查找，
+    结果与 any(name.lower().endswith(ext.lower()) for ext in extensions) 一致；
+    排除关键字编译为一个正则，一次扫描即可判断路径是否包含任意关键字，
+    命中后再按列表顺序确定第一个命中的关键字，保证排除原因与逐个关键字判断时一致。
+    """
+    def __init__(self, extensions, exclude_keywords, prune_dirs=False):
+        self.match_all = '*' in [ext.strip() for ext in extensions]
+        self.suffixes = {ext.lower() for ext in extensions}
+        # 由长到短依次尝试，空字符串与 str.endswith('') 一样匹配所有文件
+        self.suffix_lengths = sorted({len(ext) for ext in self.suffixes}, reverse=True)
+        # 空关键字与旧版逻辑一致不参与排除；保留原始写法用于排除原因
+        self.keywords = [(keyword.lower(), keyword) for keyword in exclude_keywords if keyword]
+        self.keyword_pattern = None
+        if self.keywords:
+            self.keyword_pattern = re.compile('|'.join(re.escape(lowered) for lowered, _ in self.keywords))
+        self.prune_dirs = prune_dirs and bool(self.keywords)
+
+    def match_extension(self, name):
+        """文件名是否匹配扩展名过滤条件"""
+        if self.match_all:
+            return True
+        name = name.lower()
+        for length in self.suffix_lengths:
+            if (name[-length:] if length else '') in self.suffixes:
+                return True
+        return False
+
+    def match_keyword(self, path):
+        """返回路径中包含的第一个排除关键字（按关键字列表顺序），不包含时返回None"""
+        if self.keyword_pattern is None:
+            return None
+        path = path.lower()
+        if not self.keyword_pattern.search(path):
+            return None
+        for lowered, keyword in self.keywords:
+            if lowered in path:
+                return keyword
+        return None
+
+    def prune_directory(self, dir_path):
+        """
+        目录级剪枝：目录路径已包含排除关键字时，其中所有文件的路径都包含该关键字，
+        整个子树可以直接跳过，不必逐个文件判断。返回命中的关键字，未开启剪枝或未命中时返回None
+        """
+        if not self.prune_dirs:
+            return None
+        # 目录路径末尾加上分隔符，与文件路径中的形式一致（关键字可能包含分隔符）
+        return self.match_keyword(os.path.join(dir_path, ''))
@@ -0,0 +1,168 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    令牌桶：每秒补充 rate 个令牌，最多积累 burst_seconds 秒的令牌，rate<=0 表示不限速。
+    一次取用超过桶中剩余令牌时先记账（令牌数为负）再等待到期，大块读取也能平稳限速；
+    多个线程同时取用时按取用顺序依次排队。
+    """
+    def __init__(self, rate=0, burst_seconds=1.0):
+        self.burst_seconds = burst_seconds
+        self._lock = threading.Lock()
+        self._rate = 0
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self.set_rate(rate)
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def set_rate(self, rate):
+        """运行中修改速率，已积累的令牌不超过新的桶容量"""
+        with self._lock:
+            self._refill()
+            self._rate = max(0, rate or 0)
+            self._tokens = min(self._tokens, self._rate * self.burst_seconds)
+
+    def _refill(self):
+        now = time.monotonic()
+        if self._rate > 0:
+            self._tokens = min(self._tokens + (now - self._last) * self._rate, self._rate * self.burst_seconds)
+        self._last = now
+
+    def discard_surplus(self):
+        """丢弃已积累的令牌（欠账保留），用于突发模式在空闲期结束时重新开始计量"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+    def acquire(self, amount, stop_flag=None):
+        """取用 amount 个令牌，不足时等待；等待期间 stop_flag() 为True时返回False"""
+        with self._lock:
+            if self._rate <= 0:
+                return True
+            self._refill()
+            self._tokens -= amount
+            deadline = time.monotonic() + max(0.0, -self._tokens / self._rate)
+        # 分段等待，以便及时响应停止请求和改为不限速
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._rate <= 0:
+                return True
+            if stop_flag and stop_flag():
+                return False
+            time.sleep(min(remaining, 0.1))
+
+
+class RateLimiter:
+    """
+    后台扫描的I/O限速器：按 MB/秒 限制读取带宽，按 个/秒 限制打开的文件数，0表示不限制。
+    同一个限速器由所有读取线程共享，总速率不随线程数增加；限制值可在扫描过程中随时修改。
+    统计修改限制值以来的实际速率，用于对比实际与设定的吞吐量。
+    也用于文件产生器的写入整形；突发模式下按 active_seconds 秒工作、idle_seconds 秒空闲循环，空闲期间的取用一律等待。
+    """
+    def __init__(self, mb_per_sec=0, files_per_sec=0):
+        self.byte_bucket = TokenBucket()
+        self.file_bucket = TokenBucket()
+        self._lock = threading.Lock()
+        self.active_seconds = 0.0
+        self.idle_seconds = 0.0
+        self.set_limits(mb_per_sec, files_per_sec)
+
+    def set_limits(self, mb_per_sec=0, files_per_sec=0):
+        """修改限制值，0表示不限制；实际速率从此时重新统计"""
+        self.mb_per_sec = max(0.0, float(mb_per_sec or 0))
+        self.files_per_sec = max(0.0, float(files_per_sec or 0))
+        self.byte_bucket.set_rate(self.mb_per_sec * 1024 * 1024)
+        self.file_bucket.set_rate(self.files_per_sec)
+        self.reset_stats()
+
+    def set_burst_profile(self, active_seconds=0, idle_seconds=0):
+        """突发模式：工作 active_seconds 秒后空闲 idle_seconds 秒，任一为0表示不使用；周期从 reset_stats 时开始"""
+        self.active_seconds = max(0.0, float(active_seconds or 0))
+        self.idle_seconds = max(0.0, float(idle_seconds or 0))
+
+    def reset_stats(self):
+        """重新开始统计实际速率，每次扫描开始时调用"""
+        with self._lock:
+            self._start_time = time.monotonic()
+            self._bytes = 0
+            self._files = 0
+            self._sample_time = self._start_time
+            self._sample_bytes = 0
+            self._sample_files = 0
+
+    @property
+    def burst_enabled(self):
+        return self.active_seconds > 0 and self.idle_seconds > 0
+
+    @property
+    def enabled(self):
+        return self.mb_per_sec > 0 or self.files_per_sec > 0 or self.burst_enabled
+
+    def _wait_active(self, stop_flag):
+        """
+        突发模式的空闲期间等待到下一个工作期，返回False表示等待期间收到停止请求。
+        空闲期间积累的令牌在工作期开始时丢弃，工作期内的速率仍是设定值，而不是设定值加上空闲期的积累
+        """
+        waited = False
+        while self.burst_enabled:
+            period = self.active_seconds + self.idle_seconds
+            phase = (time.monotonic() - self._start_time) % period
+            if phase < self.active_seconds:
+                break
+            if stop_flag and stop_flag():
+                return False
+            time.sleep(min(period - phase, 0.1))
+            waited = True
+        if waited:
+            self.byte_bucket.discard_surplus()
+            self.file_bucket.discard_surplus()
+        return True
+
+    def acquire_file(self, stop_flag=None):
+        """开始读取一个文件前调用，返回False表示等待期间收到停止请求"""
+        if not self._wait_active(stop_flag):
+            return False
+        with self._lock:
+            self._files += 1
+        return self.file_bucket.acquire(1, stop_flag)
+
+    def acquire_bytes(self, nbytes, stop_flag=None):
+        """每读取一块数据调用一次，返回False表示等待期间收到停止请求"""
+        if not self._wait_active(stop_flag):
+            return False
+        with self._lock:
+            self._bytes += nbytes
+        return self.byte_bucket.acquire(nbytes, stop_flag)
+
+    def sample(self):
+        """返回上次采样以来这段时间的实际速率 (MB/秒, 个/秒)，用于记录速率随时间的变化"""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = max(now - self._sample_time, 1e-6)
+            mb_rate = (self._bytes - self._sample_bytes) / (1024 * 1024) / elapsed
+            files_rate = (self._files - self._sample_files) / elapsed
+            self._sample_time = now
+            self._sample_bytes = self._bytes
+            self._sample_files = self._files
+        return mb_rate, files_rate
+
+    def achieved(self):
+        """返回修改限制值以来的实际速率 (MB/秒, 个/秒)"""
+        with self._lock:
+            elapsed = max(time.monotonic() - self._start_time, 1e-6)
+            return self._bytes / (1024 * 1024) / elapsed, self._files / elapsed
+
+    def stats_message(self):
+        """实际速率与限制值的对比"""
+        mb_rate, files_rate = self.achieved()
+        mb_limit = f"{self.mb_per_sec:.1f}MB/秒" if self.mb_per_sec > 0 else "不限"
+        files_limit = f"{self.files_per_sec:.0f}个/秒" if self.files_per_sec > 0 else "不限"
+        message = f"限速: 实际 {mb_rate:.1f}MB/秒（限制 {mb_limit}），{files_rate:.0f}个/秒（限制 {files_limit}）"
+        if self.burst_enabled:
+            message += f"，突发模式 工作{self.active_seconds:g}秒/空闲{self.idle_seconds:g}秒"
+        return message
@@ -0,0 +1,156 @@
+import os
+import queue
+import shutil
+import threading
+import time
+from .rate_limiter import RateLimiter
+
+# 删除进度的回调间隔（秒）
+CLEANUP_REPORT_SECONDS = 1.0
+
+
+class RoundCleaner:
+    """
+    后台删除已完成轮次目录的工作线程，删除与下一轮生成同时进行，不再阻塞轮次计时。
+    队列最多积压 max_backlog 个目录（包括正在删除的），积压已满时 submit 等待，避免删除跟不上时占满磁盘；
+    rate_files 为删除速率上限（个/秒，0为不限）。progress_callback(目录, 已删除文件数, 等待删除的目录数, 统计) 约每秒一次，
+    每个目录删除完成时再调用一次，统计中 done 为True，busy_ratio 为删除线程自启动以来忙碌的时间占比；删除失败的文件记录在 errors 中，不影响生成。
+    """
+    def __init__(self, max_backlog=2, rate_files=0, progress_callback=None):
+        self.max_backlog = max(1, int(max_backlog))
+        self.rate_limiter = RateLimiter(0, rate_files)
+        self.progress_callback = progress_callback
+        self.errors = []
+        self.deleted_files = 0
+        self.deleted_dirs = 0
+        self.busy_seconds = 0.0
+        self._started = None
+        self._queue = queue.Queue()
+        # 积压计数包括正在删除的目录，删除完成后才释放；submit 被停止时会在生成线程中直接删除，统计也由这个锁保护
+        self._slots = threading.Semaphore(self.max_backlog)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        # close 等待积压删除完成期间不限速，不改动设定的速率
+        self._draining = False
+
+    @property
+    def pending(self):
+        """等待删除和正在删除的目录数"""
+        return self._pending
+
+    def set_rate_limit(self, files_per_sec=0):
+        self.rate_limiter.set_limits(0, files_per_sec)
+
+    def submit(self, path, stop_flag=None):
+        """
+        加入删除队列，积压已满时等待前面的目录删除完成；等待期间 stop_flag() 为True时放弃等待，
+        改为在当前线程直接删除，返回False
+        """
+        while not self._slots.acquire(timeout=0.1):
+            if stop_flag and stop_flag():
+                self._delete_tree(path)
+                return False
+        with self._lock:
+            self._pending += 1
+        if self._thread is None:
+            if self._started is None:
+                self._started = time.monotonic()
+            self._thread = threading.Thread(target=self._run, name="FileGeneratorCleaner", daemon=True)
+            self._thread.start()
+        self._queue.put(path)
+        return True
+
+    def close(self, wait=True):
+        """不再接受新目录；wait 为True时不再限速，等待积压的目录全部删除"""
+        if self._thread is None:
+            return
+        if wait:
+            self._draining = True
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+            self._thread = None
+            self._draining = False
+
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            if path is None:
+                return
+            try:
+                self._delete_tree(path)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                self._slots.release()
+
+    def _report(self, path, deleted, start, done=False):
+        if not self.progress_callback:
+            return
+        now = time.monotonic()
+        elapsed = max(now - start, 1e-6)
+        # 删除线程忙碌的时间占比，接近100%说明删除跟不上生成
+        busy = self.busy_seconds if done else self.busy_seconds + elapsed
+        self.progress_callback(path, deleted, self._pending, {
+            'done': done,
+            'elapsed': elapsed,
+            'files_per_sec': deleted / elapsed,
+            'busy_ratio': min(1.0, busy / max(now - self._started, 1e-6)) if self._started else 1.0,
+            'total_deleted_files': self.deleted_files,
+            'errors': len(self.errors),
+        })
+
+    def _record_error(self, path, error):
+        with self._lock:
+            self.errors.append((path, str(error)))
+
+    def _delete_tree(self, path):
+        """自底向上逐个删除文件和目录，按限速取用配额并定时报告进度；出错的项目记录后继续"""
+        start = time.monotonic()
+        last_report = start
+        deleted = 0
+        limiter = self.rate_limiter
+        # 等待期间积累的配额作废，每个目录都按设定速率删除
+        limiter.file_bucket.discard_surplus()
+
+        def on_error(error):
+            self._record_error(getattr(error, 'filename', None) or path, error)
+
+        for root, dirs, files in os.walk(path, topdown=False, onerror=on_error):
+            for name in files:
+                if limiter.enabled and not self._draining:
+                    limiter.acquire_file()
+                file_path = os.path.join(root, name)
+                try:
+                    os.remove(file_path)
+                    deleted += 1
+                    with self._lock:
+                        self.deleted_files += 1
+                except OSError as e:
+                    self._record_error(file_path, e)
+                now = time.monotonic()
+                if now - last_report >= CLEANUP_REPORT_SECONDS:
+                    last_report = now
+                    self._report(path, deleted, start)
+            for name in dirs:
+                dir_path = os.path.join(root, name)
+                try:
+                    # 指向目录的符号链接只删除链接本身
+                    if os.path.islink(dir_path):
+                        os.remove(dir_path)
+                    else:
+                        os.rmdir(dir_path)
+                except OSError as e:
+                    self._record_error(dir_path, e)
+        try:
+            os.rmdir(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # 删除过程中又出现的文件，最后整体删除一次
+            shutil.rmtree(path, ignore_errors=True)
+        with self._lock:
+            self.deleted_dirs += 1
+            self.busy_seconds += time.monotonic() - start
+        self._report(path, deleted, start, done=True)
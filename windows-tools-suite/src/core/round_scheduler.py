@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+
+# 兼容轮询式 stop_flag/pause_flag 回调时的检查间隔（秒）
+LEGACY_POLL_SECONDS = 0.1
+# 距计划时刻不到这么久时改为自旋等待，Windows的定时器精度约15.6ms
+SPIN_SECONDS = 0.016 if os.name == 'nt' else 0.002
+
+# 轮次调度模式：名称 -> 显示名称
+SCHEDULE_MODES = {
+    'fixed_delay': '固定间隔（上一轮结束后等待）',
+    'fixed_rate': '固定频率（按开始时间对齐）',
+}
+
+
+class RunControl:
+    """
+    文件产生的暂停/继续/停止控制，基于事件：等待中的线程在收到请求后毫秒级响应，不再按100ms轮询。
+    也兼容调用方传入的轮询式 stop_flag/pause_flag 回调，这时等待按 LEGACY_POLL_SECONDS 分段检查回调。
+    停止后不能恢复，下次生成需要新的 FileGenerator。
+    """
+    def __init__(self):
+        self._stop = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+        self.stop_flag = None
+        self.pause_flag = None
+
+    def attach(self, stop_flag=None, pause_flag=None):
+        self.stop_flag = stop_flag
+        self.pause_flag = pause_flag
+
+    def request_stop(self):
+        self._stop.set()
+        # 唤醒暂停中的线程，让它们看到停止请求
+        self._running.set()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def stop_requested(self):
+        if self._stop.is_set():
+            return True
+        if self.stop_flag and self.stop_flag():
+            self.request_stop()
+            return True
+        return False
+
+    def is_paused(self):
+        return not self._running.is_set() or bool(self.pause_flag and self.pause_flag())
+
+    def wait_while_paused(self):
+        """暂停期间等待继续，返回False表示收到停止请求"""
+        while self.is_paused():
+            if self.stop_requested():
+                return False
+            if not self._running.is_set():
+                self._running.wait(LEGACY_POLL_SECONDS if self.pause_flag or self.stop_flag else None)
+            else:
+                self._stop.wait(LEGACY_POLL_SECONDS)
+        return not self.stop_requested()
+
+    def sleep(self, seconds):
+        """可被停止请求打断的等待，不追求准时，用于文件之间的间隔"""
+        self._stop.wait(seconds)
+
+    def sleep_until(self, deadline):
+        """等待到 deadline（time.monotonic时刻），返回False表示收到停止请求；临近时刻改为自旋，保证准时开始"""
+        while not self.stop_requested():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            if remaining > SPIN_SECONDS:
+                timeout = remaining - SPIN_SECONDS
+                if self.stop_flag:
+                    timeout = min(timeout, LEGACY_POLL_SECONDS)
+                self._stop.wait(timeout)
+            else:
+                time.sleep(0)
+        return False
+
+
+class RoundScheduler:
+    """
+    重复模式的轮次调度。fixed_delay：上一轮结束后等待 interval 秒再开始下一轮（原有方式，开始时间随每轮耗时漂移）；
+    fixed_rate：第N轮在第一轮开始后 (N-1)*interval 秒准时开始，适合按固定周期测试复制的RPO。
+    本轮超时时下一轮立即开始并记录偏差；落后超过一个周期时跳过错过的时刻，不连续补跑，跳过的次数记录在 missed 中。
+    每轮记录计划/实际开始的时间戳（time.time）、偏差和耗时，计时使用 time.monotonic，不受系统时间调整影响。
+    """
+    def __init__(self, mode='fixed_delay', interval=0):
+        if mode not in SCHEDULE_MODES:
+            raise ValueError(f"未知的调度模式: {mode}，可选: {', '.join(SCHEDULE_MODES)}")
+        self.mode = mode
+        self.interval = max(0.0, float(interval or 0))
+        self.history = []
+        self._planned = None
+        self._missed = 0
+        self._current_planned = None
+        self._current_start = None
+        self._last_end = None
+
+    def round_started(self, round_number):
+        """在一轮开始时调用，返回本轮的调度记录"""
+        now = time.monotonic()
+        wall = time.time()
+        planned = now if self._planned is None else self._planned
+        self._current_planned = planned
+        self._current_start = now
+        record = {
+            'round': round_number,
+            'planned_time': wall - (now - planned),
+            'start_time': wall,
+            'slip': now - planned,
+            'missed': self._missed,
+            'duration': None,
+        }
+        self.history.append(record)
+        return record
+
+    def round_finished(self):
+        """在一轮结束（包括被停止）时调用，返回本轮的调度记录"""
+        self._last_end = time.monotonic()
+        record = self.history[-1]
+        record['duration'] = self._last_end - self._current_start
+        return record
+
+    def next_deadline(self):
+        """下一轮的计划开始时刻（time.monotonic）"""
+        if self.mode == 'fixed_delay':
+            planned = self._last_end + self.interval
+            missed = 0
+        else:
+            planned = self._current_planned + self.interval
+            missed = 0
+            late = time.monotonic() - planned
+            if self.interval > 0 and late >= self.interval:
+                missed = int(late // self.interval)
+                planned += missed * self.interval
+        self._planned = planned
+        self._missed = missed
+        return planned
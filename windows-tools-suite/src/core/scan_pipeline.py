@@ -0,0 +1,203 @@
+import queue
+import threading
+import time
+from ..utils.logger import get_logger
+
+
+# 计算阶段因停止请求未完成时返回的结果
+CANCELLED = object()
+
+
+class PipelineAborted(Exception):
+    """流水线被中止时用于结束遍历阶段"""
+
+
+class StageStats:
+    """流水线单个阶段的统计：处理数量、字节数和阻塞等待时间"""
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.bytes = 0
+        self.wait_seconds = 0.0
+        self.start_time = time.time()
+        self._lock = threading.Lock()
+
+    def add(self, count=1, nbytes=0):
+        with self._lock:
+            self.count += count
+            self.bytes += nbytes
+
+    def add_wait(self, seconds):
+        with self._lock:
+            self.wait_seconds += seconds
+
+    def snapshot(self, workers=1):
+        """返回 (数量/秒, MB/秒, 等待时间占比)"""
+        elapsed = max(time.time() - self.start_time, 1e-6)
+        with self._lock:
+            files_rate = self.count / elapsed
+            mb_rate = self.bytes / (1024 * 1024) / elapsed
+            wait_ratio = self.wait_seconds / (elapsed * workers)
+        return files_rate, mb_rate, min(wait_ratio, 1.0)
+
+
+class ScanPipeline:
+    """
+    遍历 -> 计算 -> 写入 三级流水线。
+    walker(emit) 在独立线程中遍历目录，通过 emit(task, nbytes) 把任务放入有界路径队列；
+    hash_workers 个计算线程从路径队列取任务执行 process(task)；
+    写入阶段在调用 run() 的线程中执行，按提交顺序调用 consume(task, result)。
+    同时在途的任务数不超过 max_inflight，避免慢文件导致乱序缓冲无限增长。
+    stop() 或外部传入的 stop_event 请求协作式停止：遍历阶段不再提交新任务，
+    尚未开始的任务以 CANCELLED 返回，写入阶段按顺序写完第一个 CANCELLED 之前的全部结果后结束，
+    之后的结果全部丢弃。run() 返回后 cancelled 表示是否有任务未完成。
+    """
+    _SENTINEL = object()
+
+    def __init__(self, walker, process, consume, hash_workers=1, queue_size=1000, max_inflight=None,
+                 stop_event=None):
+        self.logger = get_logger(__name__)
+        self.walker = walker
+        self.process = process
+        self.consume = consume
+        self.hash_workers = max(1, hash_workers)
+        self.path_queue = queue.Queue(maxsize=queue_size)
+        self.result_queue = queue.Queue()
+        self.inflight = threading.Semaphore(max_inflight or queue_size + self.hash_workers * 4)
+        self.reorder_buffer = {}
+        self.walk_stats = StageStats("遍历")
+        self.hash_stats = StageStats("计算")
+        self.write_stats = StageStats("写入")
+        self.errors = []
+        self.abort_event = threading.Event()
+        self.stop_event = stop_event or threading.Event()
+        self.cancelled = False
+        self.walk_completed = False
+        self._next_seq = 0
+
+    def _emit(self, task, nbytes=0):
+        """遍历阶段提交一个任务，队列已满时阻塞（说明下游阶段较慢）"""
+        wait_start = time.time()
+        while not self.inflight.acquire(timeout=0.5):
+            if self.abort_event.is_set() or self.stop_event.is_set():
+                raise PipelineAborted()
+        if self.abort_event.is_set() or self.stop_event.is_set():
+            self.inflight.release()
+            raise PipelineAborted()
+        self.path_queue.put((self._next_seq, task, nbytes))
+        self.walk_stats.add_wait(time.time() - wait_start)
+        self.walk_stats.add(1, nbytes)
+        self._next_seq += 1
+
+    def _walk_thread(self):
+        try:
+            self.walker(self._emit)
+            self.walk_completed = True
+        except PipelineAborted:
+            pass
+        except Exception as e:
+            self.logger.error(f"遍历阶段出错: {str(e)}")
+            self.errors.append(e)
+        finally:
+            for _ in range(self.hash_workers):
+                self.path_queue.put(self._SENTINEL)
+
+    def _hash_thread(self):
+        while True:
+            wait_start = time.time()
+            item = self.path_queue.get()
+            self.hash_stats.add_wait(time.time() - wait_start)
+            if item is self._SENTINEL:
+                self.result_queue.put(self._SENTINEL)
+                return
+            seq, task, nbytes = item
+            if self.abort_event.is_set() or self.stop_event.is_set():
+                self.result_queue.put((seq, task, CANCELLED))
+                continue
+            try:
+                result = self.process(task)
+            except Exception as e:
+                self.logger.error(f"计算阶段出错: {str(e)}")
+                result = None
+            self.hash_stats.add(1, nbytes)
+            self.result_queue.put((seq, task, result))
+
+    def stop(self):
+        """请求协作式停止"""
+        self.stop_event.set()
+
+    def queue_depths(self):
+        """返回 (路径队列长度, 待写入结果数)"""
+        return self.path_queue.qsize(), self.result_queue.qsize() + len(self.reorder_buffer)
+
+    def stats_message(self):
+        """各阶段吞吐量和队列深度的汇总，用于定位瓶颈阶段"""
+        path_depth, result_depth = self.queue_depths()
+        walk_rate, _, walk_wait = self.walk_stats.snapshot()
+        hash_rate, hash_mb, hash_wait = self.hash_stats.snapshot(self.hash_workers)
+        write_rate, _, write_wait = self.write_stats.snapshot()
+        return (
+            f"遍历 {walk_rate:.0f}个/秒(阻塞{walk_wait:.0%}) 路径队列{path_depth} | "
+            f"计算 {hash_rate:.0f}个/秒 {hash_mb:.1f}MB/秒(空闲{hash_wait:.0%}) 结果队列{result_depth} | "
+            f"写入 {write_rate:.0f}个/秒(空闲{write_wait:.0%})"
+        )
+
+    def run(self):
+        """启动流水线，写入阶段在当前线程执行，全部任务写入后返回"""
+        walker = threading.Thread(target=self._walk_thread, name="scan-walker", daemon=True)
+        hashers = [
+            threading.Thread(target=self._hash_thread, name=f"scan-hasher-{i}", daemon=True)
+            for i in range(self.hash_workers)
+        ]
+        walker.start()
+        for t in hashers:
+            t.start()
+
+        finished_hashers = 0
+        write_seq = 0
+        try:
+            while finished_hashers < self.hash_workers:
+                wait_start = time.time()
+                item = self.result_queue.get()
+                self.write_stats.add_wait(time.time() - wait_start)
+                if item is self._SENTINEL:
+                    finished_hashers += 1
+                    continue
+                if self.abort_event.is_set() or self.cancelled:
+                    self.inflight.release()
+                    continue
+                seq, task, result = item
+                self.reorder_buffer[seq] = (task, result)
+                # 按提交顺序写入，保证输出顺序与遍历顺序一致
+                while write_seq in self.reorder_buffer:
+                    task, result = self.reorder_buffer.pop(write_seq)
+                    write_seq += 1
+                    self.inflight.release()
+                    if result is CANCELLED:
+                        # 停止点：之前的结果已全部写入，之后的结果不再写入
+                        self.cancelled = True
+                        self.stop_event.set()
+                        for _ in self.reorder_buffer:
+                            self.inflight.release()
+                        self.reorder_buffer.clear()
+                        break
+                    self.consume(task, result)
+                    self.write_stats.add(1)
+        except Exception as e:
+            # 写入阶段出错时中止上游阶段，等待所有线程退出后再抛出
+            self.logger.error(f"写入阶段出错: {str(e)}")
+            self.errors.append(e)
+            self.abort_event.set()
+            while finished_hashers < self.hash_workers:
+                if self.result_queue.get() is self._SENTINEL:
+                    finished_hashers += 1
+                else:
+                    self.inflight.release()
+
+        walker.join()
+        for t in hashers:
+            t.join()
+        if not self.walk_completed:
+            self.cancelled = True
+        if self.errors:
+            raise self.errors[0]
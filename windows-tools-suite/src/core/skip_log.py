@@ -0,0 +1,107 @@
+import os
+import threading
+
+
+class SkipLog:
+    """
+    扫描过程中被排除文件的记录，遍历线程和写入线程都会写入，由锁串行化。
+    默认模式在内存中保存全部记录，结束时按路径排序写出（与旧版格式一致）；
+    流式模式下记录按遍历顺序直接追加到临时文件，内存中只保留按原因汇总的计数，
+    内存占用与目录树大小无关。每条记录同时保存扫描根目录序号，用于断点续扫时截取断点之前的部分。
+    """
+    def __init__(self, streaming=False, part_file=None):
+        self.streaming = streaming
+        self.part_file = part_file
+        self.entries = []  # 默认模式：(路径, 原因, 扫描根目录序号)
+        self.counters = {}  # 原因分类 -> 文件数
+        self.count = 0
+        self._fh = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def category(reason):
+        """原因分类：去掉括号中的关键字、时间等细节"""
+        return reason.split('(')[0].strip()
+
+    def _count(self, reason):
+        category = self.category(reason)
+        self.counters[category] = self.counters.get(category, 0) + 1
+        self.count += 1
+
+    def add(self, file_path, reason, root_index):
+        """记录一个被排除的文件"""
+        with self._lock:
+            self._count(reason)
+            if self.streaming:
+                if self._fh is None:
+                    self._fh = open(self.part_file, 'a', encoding='utf-8', errors='surrogateescape')
+                self._fh.write(f"{root_index}\t{reason}\t{file_path}\n")
+            else:
+                self.entries.append((file_path, reason, root_index))
+
+    def snapshot(self, keep):
+        """
+        保存断点时调用：默认模式返回 keep(路径, 根目录序号) 为真的记录列表；
+        流式模式只把临时文件写入磁盘，返回None，续扫时再从临时文件中筛选
+        """
+        with self._lock:
+            if self.streaming:
+                if self._fh:
+                    self._fh.flush()
+                return None
+            entries = list(self.entries)
+        return [item for item in entries if keep(item[0], item[2])]
+
+    def restore(self, entries, keep):
+        """断点续扫时恢复断点之前的记录，entries为snapshot的返回值"""
+        if not self.streaming:
+            for file_path, reason, root_index in entries:
+                self.add(file_path, reason, root_index)
+            return
+        if not os.path.exists(self.part_file):
+            return
+        # 临时文件中断点之后的记录会在续扫时重新产生，逐行筛选，不整体读入内存
+        temp_file = self.part_file + ".tmp"
+        with open(self.part_file, 'r', encoding='utf-8', errors='surrogateescape') as src, \
+                open(temp_file, 'w', encoding='utf-8', errors='surrogateescape') as dst:
+            for line in src:
+                # 程序异常退出时最后一行可能不完整
+                if not line.endswith('\n'):
+                    continue
+                root_index, reason, file_path = line.rstrip('\n').split('\t', 2)
+                if keep(file_path, int(root_index)):
+                    dst.write(line)
+                    self._count(reason)
+        os.replace(temp_file, self.part_file)
+
+    def write(self, skip_file):
+        """写出skipped日志，流式模式额外写出按原因汇总的数量"""
+        self.close()
+        with open(skip_file, 'w', encoding='utf-8', errors='ignore') as f:
+            f.write("以下文件因被排除而跳过：\n")
+            f.write(f"总计跳过文件数：{self.count}\n\n")
+            if not self.streaming:
+                for file_path, reason, _ in sorted(self.entries):
+                    f.write(f"{file_path} ({reason})\n")
+                return
+            for category, count in sorted(self.counters.items()):
+                f.write(f"{category}：{count}\n")
+            f.write("\n")
+            if os.path.exists(self.part_file):
+                with open(self.part_file, 'r', encoding='utf-8', errors='surrogateescape') as src:
+                    for line in src:
+                        _, reason, file_path = line.rstrip('\n').split('\t', 2)
+                        f.write(f"{file_path} ({reason})\n")
+        self.discard()
+
+    def close(self):
+        with self._lock:
+            if self._fh:
+                self._fh.close()
+                self._fh = None
+
+    def discard(self):
+        """删除流式模式的临时文件"""
+        self.close()
+        if self.streaming and self.part_file and os.path.exists(self.part_file):
+            os.remove(self.part_file)
@@ -0,0 +1,201 @@
+import os
+import math
+import random
+
+SIZE_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 * 1024, 'GB': 1024 * 1024 * 1024}
+DISTRIBUTIONS = ('uniform', 'fixed_mix', 'lognormal', 'pareto')
+
+# 内置负载模型。大小可以写成整数字节或带单位的字符串（如 '4KB'）；
+# files_per_dir 为每个目录最多的文件数（0为全部放在一个目录），超过时按 fanout 个子目录一层自动分层，
+# depth 指定固定层数时文件平均分布在最底层目录中
+BUILTIN_PROFILES = {
+    'uniform': {
+        'description': '均匀分布：使用设置的文件大小范围，所有文件在同一目录',
+        'distribution': 'uniform',
+    },
+    'small_files': {
+        'description': '小文件元数据风暴：对数正态分布，中位数4KB，每个目录最多1000个文件',
+        'distribution': 'lognormal', 'median': '4KB', 'sigma': 1.2, 'min': '0B', 'max': '1MB',
+        'files_per_dir': 1000, 'fanout': 16,
+    },
+    'mixed': {
+        'description': '固定比例混合：70% 4KB、20% 64KB、9% 1MB、1% 32MB',
+        'distribution': 'fixed_mix', 'mix': [['4KB', 70], ['64KB', 20], ['1MB', 9], ['32MB', 1]],
+        'files_per_dir': 5000, 'fanout': 16,
+    },
+    'pareto': {
+        'description': '帕累托长尾分布：大多数文件接近16KB，少数文件可达512MB',
+        'distribution': 'pareto', 'alpha': 1.1, 'scale': '16KB', 'max': '512MB',
+        'files_per_dir': 2000, 'fanout': 16,
+    },
+    'deep_tree': {
+        'description': '深层目录树：8层、每层4个子目录，对数正态分布，中位数8KB',
+        'distribution': 'lognormal', 'median': '8KB', 'sigma': 1.0, 'min': '0B', 'max': '4MB',
+        'depth': 8, 'fanout': 4,
+    },
+}
+
+
+def parse_size(value):
+    """把 4096、'4KB'、'1.5 MB' 等形式的大小转换为字节数"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().upper().replace(' ', '')
+    for unit in ('KB', 'MB', 'GB', 'B'):
+        if text.endswith(unit):
+            try:
+                return int(float(text[:-len(unit)]) * SIZE_UNITS[unit])
+            except ValueError:
+                break
+    try:
+        return int(text)
+    except ValueError:
+        raise ValueError(f"无效的文件大小: {value}")
+
+
+def profile_names(custom_profiles=None):
+    """内置和自定义负载模型的名称，自定义的同名模型覆盖内置模型"""
+    names = list(BUILTIN_PROFILES)
+    names += [name for name in (custom_profiles or {}) if name not in BUILTIN_PROFILES]
+    return names
+
+
+def resolve_workload(profile=None, custom_profiles=None, size_min=0, size_max=0):
+    """
+    按名称或定义字典得到负载模型。profile 为None时为 uniform；
+    size_min/size_max（字节）是 uniform 的大小范围，其他分布不使用
+    """
+    if isinstance(profile, WorkloadProfile):
+        return profile
+    if profile is None:
+        profile = 'uniform'
+    if isinstance(profile, dict):
+        spec = dict(profile)
+        name = spec.pop('name', 'custom')
+    else:
+        profiles = dict(BUILTIN_PROFILES)
+        profiles.update(custom_profiles or {})
+        if profile not in profiles:
+            raise ValueError(f"未知的负载模型: {profile}，可选: {', '.join(profile_names(custom_profiles))}")
+        name, spec = profile, profiles[profile]
+    return WorkloadProfile(name, spec, size_min, size_max)
+
+
+class WorkloadProfile:
+    """
+    负载模型：文件大小分布和目录结构。
+    分布：uniform 均匀、fixed_mix 固定比例混合、lognormal 对数正态（median 中位数, sigma）、pareto 帕累托（alpha, scale 最小值）。
+    抽样使用调用方传入的随机数生成器，确定性模式下由文件种子决定；文件编号到目录的映射只由编号决定。
+    """
+    def __init__(self, name, spec, size_min=0, size_max=0):
+        self.name = name
+        self.spec = dict(spec)
+        self.description = self.spec.get('description', '')
+        self.distribution = self.spec.get('distribution', 'uniform')
+        if self.distribution not in DISTRIBUTIONS:
+            raise ValueError(f"负载模型 {name} 的分布无效: {self.distribution}，可选: {', '.join(DISTRIBUTIONS)}")
+        # 只有 uniform 使用设置的大小范围，其他分布由模型自身的 min/max 限定，max 为0表示不限
+        uniform = self.distribution == 'uniform'
+        self.min_bytes = parse_size(self.spec['min']) if 'min' in self.spec else (int(size_min) if uniform else 0)
+        self.max_bytes = parse_size(self.spec['max']) if 'max' in self.spec else (int(size_max) if uniform else 0)
+        if self.distribution == 'uniform' and self.min_bytes > self.max_bytes:
+            raise ValueError(f"负载模型 {name} 的最小文件大小大于最大文件大小")
+        if self.distribution == 'fixed_mix':
+            mix = self.spec.get('mix') or []
+            if not mix:
+                raise ValueError(f"负载模型 {name} 缺少 mix 比例")
+            self.mix_sizes = [parse_size(size) for size, _ in mix]
+            self.mix_weights = [float(weight) for _, weight in mix]
+        elif self.distribution == 'lognormal':
+            self.mu = math.log(max(parse_size(self.spec.get('median', '4KB')), 1))
+            self.sigma = float(self.spec.get('sigma', 1.0))
+        elif self.distribution == 'pareto':
+            self.alpha = float(self.spec.get('alpha', 1.2))
+            self.scale = parse_size(self.spec.get('scale', '16KB'))
+            if self.alpha <= 0:
+                raise ValueError(f"负载模型 {name} 的 alpha 必须大于0")
+        self.files_per_dir = int(self.spec.get('files_per_dir', 0) or 0)
+        self.fanout = max(2, int(self.spec.get('fanout', 16)))
+        depth = self.spec.get('depth')
+        self.depth = None if depth in (None, 'auto') else max(0, int(depth))
+        self._layout = None
+        self._leaf_paths = {}
+
+    def to_dict(self):
+        """可写入数据集清单的完整定义，uniform 的大小范围也一并保存"""
+        spec = {key: value for key, value in self.spec.items() if key != 'description'}
+        spec.setdefault('min', self.min_bytes)
+        spec.setdefault('max', self.max_bytes)
+        spec['name'] = self.name
+        return spec
+
+    def sample_size(self, rng=random):
+        """按分布抽取一个文件大小（字节）"""
+        if self.distribution == 'uniform':
+            return rng.randint(self.min_bytes, self.max_bytes)
+        if self.distribution == 'fixed_mix':
+            return rng.choices(self.mix_sizes, weights=self.mix_weights)[0]
+        if self.distribution == 'lognormal':
+            size = rng.lognormvariate(self.mu, self.sigma)
+        else:
+            size = rng.paretovariate(self.alpha) * self.scale
+        size = max(int(size), self.min_bytes)
+        if self.max_bytes > 0:
+            size = min(size, self.max_bytes)
+        return size
+
+    def layout(self, max_files):
+        """(层数, 最底层目录数)；自动分层时取使每个目录不超过 files_per_dir 个文件的最小层数"""
+        if self._layout and self._layout[0] == max_files:
+            return self._layout[1]
+        if self.depth is not None:
+            depth = self.depth
+        elif self.files_per_dir > 0:
+            leaves_needed = math.ceil(max_files / self.files_per_dir)
+            depth = 0
+            while self.fanout ** depth < leaves_needed:
+                depth += 1
+        else:
+            depth = 0
+        result = (depth, self.fanout ** depth)
+        self._layout = (max_files, result)
+        return result
+
+    def _leaf_of(self, index, max_files, leaves):
+        if self.depth is not None and self.files_per_dir <= 0:
+            return index * leaves // max(max_files, 1)
+        per_dir = self.files_per_dir or math.ceil(max_files / leaves)
+        return (index // per_dir) % leaves
+
+    def _leaf_path(self, leaf, depth):
+        """最底层目录编号对应的相对路径，结果缓存，每个文件不必重新格式化"""
+        key = (leaf, depth)
+        path = self._leaf_paths.get(key)
+        if path is None:
+            width = len(format(self.fanout - 1, 'x'))
+            parts = []
+            for _ in range(depth):
+                leaf, digit = divmod(leaf, self.fanout)
+                parts.append(format(digit, f'0{width}x'))
+            path = self._leaf_paths[key] = os.path.join(*reversed(parts))
+        return path
+
+    def directory_for(self, index, max_files):
+        """第 index 个文件（从0开始）所在的相对目录，平铺时为空字符串"""
+        depth, leaves = self.layout(max_files)
+        if depth == 0:
+            return ''
+        return self._leaf_path(self._leaf_of(index, max_files, leaves), depth)
+
+    def directories(self, max_files):
+        """max_files 个文件用到的所有相对目录（按编号顺序，不重复），用于在一轮开始前一次性创建"""
+        depth, leaves = self.layout(max_files)
+        if depth == 0:
+            return ['']
+        if self.depth is not None and self.files_per_dir <= 0:
+            used = sorted({self._leaf_of(index, max_files, leaves) for index in range(max_files)}) if max_files < leaves \
+                else range(leaves)
+        else:
+            per_dir = self.files_per_dir or math.ceil(max_files / leaves)
+            used = range(min(leaves, math.ceil(max_files / per_dir)))
+        return [self._leaf_path(leaf, depth) for leaf in used]
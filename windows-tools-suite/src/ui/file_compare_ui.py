@@ -3,12 +3,12 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                            QProgressDialog, QCheckBox)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
 from PyQt5.QtGui import QColor, QTextCharFormat, QSyntaxHighlighter
+from ..core.file_compare import compare_files
 from ..utils.logger import get_logger
-from difflib import SequenceMatcher
 import os
 
 class CompareWorker(QThread):
-    """后台工作线程，用于执行文件对比"""
+    """后台工作线程，调用核心逻辑compare_files执行文件对比"""
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
     progress = pyqtSignal(str)
@@ -21,98 +21,7 @@ class CompareWorker(QThread):
     
     def run(self):
         try:
-            self.logger.info(f"开始对比文件: {self.left_file} 和 {self.right_file}")
-            self.progress.emit("正在读取文件...")
-            
-            # 读取文件内容
-            with open(self.left_file, 'r', encoding='utf-8') as f:
-                left_lines = [line.rstrip('\n') for line in f.readlines()]
-            self.logger.info(f"已读取左侧文件，共 {len(left_lines)} 行")
-            
-            with open(self.right_file, 'r', encoding='utf-8') as f:
-                right_lines = [line.rstrip('\n') for line in f.readlines()]
-            self.logger.info(f"已读取右侧文件，共 {len(right_lines)} 行")
-            
-            self.progress.emit("正在对比差异...")
-            
-            # 使用序列匹配器找出相似行
-            matcher = SequenceMatcher(None, left_lines, right_lines)
-            
-            # 准备结果数据
-            aligned_left_lines = []   # 左侧显示的行
-            aligned_right_lines = []  # 右侧显示的行
-            left_diff_types = {}      # 左侧差异类型 {行号: 类型}
-            right_diff_types = {}     # 右侧差异类型 {行号: 类型}
-            
-            left_index = 0
-            right_index = 0
-            
-            # 处理每个匹配块
-            for tag, alo, ahi, blo, bhi in matcher.get_opcodes():
-                self.progress.emit(f"正在处理差异块: {tag}")
-                
-                if tag == 'equal':
-                    # 完全相同的部分
-                    for i in range(alo, ahi):
-                        aligned_left_lines.append(left_lines[i])
-                        aligned_right_lines.append(right_lines[blo + (i - alo)])
-                        left_index = i + 1
-                        right_index = blo + (i - alo) + 1
-                
-                elif tag == 'replace':
-                    # 替换的部分（内容不同）
-                    max_lines = max(ahi - alo, bhi - blo)
-                    for i in range(max_lines):
-                        left_pos = alo + i
-                        right_pos = blo + i
-                        
-                        if left_pos < ahi and right_pos < bhi:
-                            # 两边都有内容，但不同
-                            aligned_left_lines.append(left_lines[left_pos])
-                            aligned_right_lines.append(right_lines[right_pos])
-                            left_diff_types[len(aligned_left_lines)] = "≠"
-                            right_diff_types[len(aligned_right_lines)] = "≠"
-                        elif left_pos < ahi:
-                            # 只有左边有内容
-                            aligned_left_lines.append(left_lines[left_pos])
-                            aligned_right_lines.append("")
-                            left_diff_types[len(aligned_left_lines)] = "-"
-                        else:
-                            # 只有右边有内容
-                            aligned_left_lines.append("")
-                            aligned_right_lines.append(right_lines[right_pos])
-                            right_diff_types[len(aligned_right_lines)] = "+"
-                
-                elif tag == 'delete':
-                    # 删除的部分（左边独有）
-                    for i in range(alo, ahi):
-                        aligned_left_lines.append(left_lines[i])
-                        aligned_right_lines.append("")
-                        left_diff_types[len(aligned_left_lines)] = "-"
-                        left_index = i + 1
-                
-                elif tag == 'insert':
-                    # 插入的部分（右边独有）
-                    for i in range(blo, bhi):
-                        aligned_left_lines.append("")
-                        aligned_right_lines.append(right_lines[i])
-                        right_diff_types[len(aligned_right_lines)] = "+"
-                        right_index = i + 1
-            
-            # 添加换行符
-            aligned_left_lines = [line + "\n" for line in aligned_left_lines]
-            aligned_right_lines = [line + "\n" for line in aligned_right_lines]
-            
-            self.logger.info(f"对比完成，找到 {len(left_diff_types) + len(right_diff_types)} 处差异")
-            
-            # 发送结果
-            result = {
-                'left_lines': aligned_left_lines,
-                'right_lines': aligned_right_lines,
-                'left_diff_types': left_diff_types,
-                'right_diff_types': right_diff_types,
-                'total_lines': len(aligned_left_lines)
-            }
+            result = compare_files(self.left_file, self.right_file, self.progress.emit, self.logger)
             self.finished.emit(result)
             
         except Exception as e:
@@ -1,12 +1,17 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                            QLabel, QFileDialog, QLineEdit, QRadioButton, 
-                           QButtonGroup, QComboBox, QMessageBox, QFrame, QGroupBox, QStyle, QProgressBar, QCheckBox)
+                           QButtonGroup, QComboBox, QMessageBox, QFrame, QGroupBox, QStyle, QProgressBar, QCheckBox,
+                           QSpinBox, QDoubleSpinBox)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 import os
 import sys
 import random
 from ..utils.logger import get_logger
-from src.core.file_generator import FileGenerator
+from src.core.file_generator import (FileGenerator, format_throughput, format_cleanup, format_schedule,
+                                     WRITE_POLICIES, available_write_policies)
+from src.core.round_scheduler import SCHEDULE_MODES
+from src.core.content_engine import CONTENT_MODES, available_content_modes
+from src.core.workload_profile import BUILTIN_PROFILES, profile_names
 from src.utils.common import format_size
 import yaml
 
@@ -23,7 +28,10 @@ class FileGeneratorWorker(QThread):
     wait_finished = pyqtSignal()  # 等待结束信号
     
     def __init__(self, target_dir, file_size_min, file_size_max, 
-                 size_unit, is_loop, max_files, interval, repeat_interval=0, delete_after=False, max_repeat_count=None):
+                 size_unit, is_loop, max_files, interval, repeat_interval=0, delete_after=False, max_repeat_count=None,
+                 content_mode='urandom', seed=None, writers=1, rate_mb=0, rate_files=0, burst_active=0, burst_idle=0,
+                 workload=None, workload_profiles=None, write_policy='buffered', preallocate=False,
+                 cleanup_backlog=2, cleanup_rate_files=0, schedule_mode='fixed_delay'):
         super().__init__()
         self.target_dir = target_dir
         self.file_size_min = file_size_min
@@ -35,6 +43,24 @@ class FileGeneratorWorker(QThread):
         self.repeat_interval = repeat_interval
         self.delete_after = delete_after
         self.max_repeat_count = max_repeat_count  # None表示无限
+        self.content_mode = content_mode
+        self.seed = seed
+        self.writers = writers
+        self.rate_mb = rate_mb
+        self.rate_files = rate_files
+        self.burst_active = burst_active
+        self.burst_idle = burst_idle
+        self.workload = workload
+        self.workload_profiles = workload_profiles
+        self.write_policy = write_policy
+        self.preallocate = preallocate
+        self.cleanup_backlog = cleanup_backlog
+        self.cleanup_rate_files = cleanup_rate_files
+        self.schedule_mode = schedule_mode
+        # 后台删除的最新状态，附在生成进度之后显示
+        self.cleanup_status = ''
+        self.last_message = ''
+        self.generator = None
         self.is_running = True
         self.is_paused = False
         self.was_stopped = False
@@ -63,47 +89,74 @@ class FileGeneratorWorker(QThread):
             self.interval,
             self.repeat_interval,
             self.delete_after,
-            self.max_repeat_count
+            self.max_repeat_count,
+            content_mode=self.content_mode,
+            seed=self.seed,
+            writers=self.writers,
+            rate_mb=self.rate_mb,
+            rate_files=self.rate_files,
+            burst_active=self.burst_active,
+            burst_idle=self.burst_idle,
+            workload=self.workload,
+            workload_profiles=self.workload_profiles,
+            write_policy=self.write_policy,
+            preallocate=self.preallocate,
+            cleanup_backlog=self.cleanup_backlog,
+            cleanup_rate_files=self.cleanup_rate_files,
+            schedule_mode=self.schedule_mode
         )
+        self.generator = generator
+        # 线程启动前就已点击的暂停/停止
+        if self.is_paused:
+            generator.pause()
+        if not self.is_running:
+            generator.request_stop()
         generator.generate_files(
             progress_callback=self._progress_callback,
             finished_callback=self._finished_callback,
-            stop_flag=self._stop_flag,
-            pause_flag=self._pause_flag,
             stopped_callback=self._stopped_callback
         )
 
-    def _stop_flag(self):
-        return not self.is_running
-
-    def _pause_flag(self):
-        return self.is_paused
-
-    def _progress_callback(self, stage, files_dir, files_created, max_files, total_size, round_number):
+    def _progress_callback(self, stage, files_dir, files_created, max_files, total_size, round_number, throughput=None):
         round_info = f"第{round_number}轮："
         if stage == 'start':
             # 如果是重复模式且不是第一轮，说明等待结束，新一轮开始
             if self.is_loop and round_number > 1:
                 self.wait_finished.emit()  # 新一轮开始，等待结束
             msg = f"{round_info}开始{'新一轮' if self.is_loop else ''}文件生成\n文件生成目录：{files_dir}"
+            if self.is_loop:
+                msg += f"\n{format_schedule(stage, throughput)}"
             self.progress.emit(msg)
-        elif stage == 'progress':
+        elif stage in ('progress', 'rate'):
+            # rate 为限速时每秒一次的速率采样，突发模式空闲期间没有文件完成时也能看到实际速率
             percent = int((files_created / max_files) * 100) if max_files else 0
             self.progress_value.emit(percent)
             msg = (f"{round_info}文件生成目录：{files_dir}\n"
                    f"当前{'重复模式，' if self.is_loop else ''}已生成 {files_created} 个文件，共需要 {max_files} 个\n"
-                   f"已生成文件总大小：{format_size(total_size)}\n")
-            self.progress.emit(msg)
+                   f"已生成文件总大小：{format_size(total_size)}\n"
+                   f"{format_throughput(throughput)}\n")
+            self.last_message = msg
+            self.progress.emit(msg + self.cleanup_status)
         elif stage == 'finished':
             msg = (f"{round_info}{'本轮' if self.is_loop else ''}文件生成完成\n"
                    f"文件生成目录：{files_dir}\n"
                    f"共生成了 {files_created} 个文件\n"
-                   f"文件总大小：{format_size(total_size)}")
-            self.progress.emit(msg)
+                   f"文件总大小：{format_size(total_size)}\n"
+                   f"{format_throughput(throughput)}\n"
+                   f"{self.generator.stats_message()}")
+            logger.info(self.generator.stats_message())
+            self.last_message = msg + "\n"
+            self.progress.emit(self.last_message + self.cleanup_status)
+        elif stage == 'cleanup':
+            # 来自后台删除线程，约每秒一次，目录删除完成时再有一次
+            self.cleanup_status = format_cleanup(files_dir, files_created, max_files, throughput)
+            if throughput['done']:
+                logger.info(self.cleanup_status)
+            self.progress.emit(self.last_message + self.cleanup_status)
         elif stage == 'loop_wait':
             self.wait_started.emit()  # 发送等待开始信号
-            if self.repeat_interval > 0:
-                msg = f"{round_info}等待{self.repeat_interval}秒后开始下一轮文件生成..."
+            if throughput['wait_seconds'] > 0:
+                msg = f"{round_info}{format_schedule(stage, throughput)}..."
             else:
                 msg = f"{round_info}准备开始下一轮文件生成..."
             self.progress.emit(msg)
@@ -124,20 +177,27 @@ class FileGeneratorWorker(QThread):
         """停止生成"""
         self.is_running = False
         self.was_stopped = True
+        if self.generator:
+            self.generator.request_stop()
         
     def pause(self):
         """暂停生成"""
         self.is_paused = True
+        if self.generator:
+            self.generator.pause()
         
     def resume(self):
         """恢复生成"""
         self.is_paused = False
+        if self.generator:
+            self.generator.resume()
 
 class FileGeneratorUI(QWidget):
     def __init__(self):
         super().__init__()
         self.worker = None
         self.current_progress = 0  # 添加当前进度记录
+        self.custom_profiles = {}  # filegen_config.yaml 中的自定义负载模型
         logger.info("初始化文件生成器UI")
         self.initUI()
         self.check_config_status()  # 检查配置文件状态
@@ -249,6 +309,16 @@ class FileGeneratorUI(QWidget):
         
         size_layout.addWidget(self.size_max)
         size_layout.addWidget(self.size_unit2)
+        size_layout.addSpacing(20)
+        
+        # 负载模型：文件大小分布和目录分层，只有uniform使用上面的大小范围
+        self.profile_combo = QComboBox()
+        self.profile_combo.setFixedHeight(30)
+        self.profile_combo.setMinimumWidth(120)
+        self.populate_profiles()
+        self.profile_combo.currentIndexChanged.connect(self.on_profile_changed)
+        size_layout.addWidget(QLabel("负载模型:"))
+        size_layout.addWidget(self.profile_combo)
         size_layout.addStretch()
         
         size_group.setLayout(size_layout)
@@ -287,6 +357,12 @@ class FileGeneratorUI(QWidget):
         self.repeat_interval_edit.setFixedWidth(80)
         repeat_interval_layout.addWidget(self.repeat_interval_edit)
         repeat_interval_layout.addWidget(QLabel("秒"))
+        self.schedule_mode_combo = QComboBox()
+        for mode, name in SCHEDULE_MODES.items():
+            self.schedule_mode_combo.addItem(name, mode)
+        self.schedule_mode_combo.setToolTip("固定频率：每轮在第一轮开始后整数倍间隔准时开始，超时的轮次跳过错过的时刻；"
+                                            "每轮计划/实际开始时间记录在目标目录的round_schedule.csv中")
+        repeat_interval_layout.addWidget(self.schedule_mode_combo)
         repeat_interval_layout.addStretch()
         
         self.repeat_interval_group.setLayout(repeat_interval_layout)
@@ -329,6 +405,14 @@ class FileGeneratorUI(QWidget):
         limit_layout.addWidget(QLabel("文件数量上限:"))
         limit_layout.addWidget(self.limit_edit)
         limit_layout.addWidget(QLabel("个"))
+        limit_layout.addSpacing(20)
+        
+        # 多个线程同时写文件，提高存储的I/O队列深度
+        self.writers_edit = QLineEdit("1")
+        self.writers_edit.setFixedWidth(50)
+        limit_layout.addWidget(QLabel("并发写入:"))
+        limit_layout.addWidget(self.writers_edit)
+        limit_layout.addWidget(QLabel("个线程"))
         limit_layout.addStretch()
         
         limit_group.setLayout(limit_layout)
@@ -350,6 +434,44 @@ class FileGeneratorUI(QWidget):
         interval_group.setLayout(interval_layout)
         layout.addWidget(interval_group)
         
+        # 写入整形：目标速率和突发模式，速率在生成过程中可随时修改
+        rate_group = QGroupBox("写入整形")
+        rate_layout = QHBoxLayout()
+        rate_layout.setSpacing(5)
+        self.rate_mb_spin = QDoubleSpinBox()
+        self.rate_mb_spin.setRange(0, 100000)
+        self.rate_mb_spin.setDecimals(1)
+        self.rate_mb_spin.setSpecialValueText("不限")
+        self.rate_mb_spin.setFixedWidth(90)
+        self.rate_files_spin = QSpinBox()
+        self.rate_files_spin.setRange(0, 1000000)
+        self.rate_files_spin.setSpecialValueText("不限")
+        self.rate_files_spin.setFixedWidth(90)
+        self.rate_mb_spin.valueChanged.connect(self.apply_rate_limit)
+        self.rate_files_spin.valueChanged.connect(self.apply_rate_limit)
+        self.burst_active_spin = QDoubleSpinBox()
+        self.burst_active_spin.setRange(0, 86400)
+        self.burst_active_spin.setDecimals(1)
+        self.burst_active_spin.setFixedWidth(70)
+        self.burst_idle_spin = QDoubleSpinBox()
+        self.burst_idle_spin.setRange(0, 86400)
+        self.burst_idle_spin.setDecimals(1)
+        self.burst_idle_spin.setFixedWidth(70)
+        rate_layout.addWidget(QLabel("目标速率:"))
+        rate_layout.addWidget(self.rate_mb_spin)
+        rate_layout.addWidget(QLabel("MB/秒"))
+        rate_layout.addWidget(self.rate_files_spin)
+        rate_layout.addWidget(QLabel("个/秒"))
+        rate_layout.addSpacing(20)
+        rate_layout.addWidget(QLabel("突发模式: 写入"))
+        rate_layout.addWidget(self.burst_active_spin)
+        rate_layout.addWidget(QLabel("秒，空闲"))
+        rate_layout.addWidget(self.burst_idle_spin)
+        rate_layout.addWidget(QLabel("秒（0为不使用）"))
+        rate_layout.addStretch()
+        rate_group.setLayout(rate_layout)
+        layout.addWidget(rate_group)
+        
         
         # 生成后删除选项
         delete_group = QGroupBox("生成选项")
@@ -359,7 +481,50 @@ class FileGeneratorUI(QWidget):
         self.delete_after_generate = QCheckBox("生成后删除文件")
         self.delete_after_generate.setChecked(False)  # 默认不删除
         
+        # 文件内容引擎，os.urandom受限于系统熵源，高速存储上建议选择快速伪随机或AES-CTR
+        self.content_mode_combo = QComboBox()
+        for mode in available_content_modes():
+            self.content_mode_combo.addItem(CONTENT_MODES[mode], mode)
+        self.content_mode_combo.setFixedHeight(30)
+        self.seed_edit = QLineEdit()
+        self.seed_edit.setPlaceholderText("留空为随机")
+        self.seed_edit.setFixedWidth(100)
+        self.seed_edit.setToolTip("确定性模式的种子：相同种子和参数生成完全相同的文件大小、文件名和内容，\n"
+                                  "参数保存在轮次目录的dataset_manifest.json中；系统随机数无法复现")
+        # 写入策略：默认只写入系统缓存，测存储或复制的真实吞吐量需要fsync或绕过缓存
+        self.write_policy_combo = QComboBox()
+        for policy in available_write_policies():
+            self.write_policy_combo.addItem(WRITE_POLICIES[policy], policy)
+        self.write_policy_combo.setFixedHeight(30)
+        self.write_policy_combo.setToolTip("每次写入和fsync的延迟p50/p99显示在进度中，完整分布保存在轮次目录的latency_stats.json中")
+        self.preallocate_check = QCheckBox("预分配空间")
+        # 生成后删除由后台线程进行，不阻塞下一轮；积压已满时下一轮等待
+        self.cleanup_rate_spin = QSpinBox()
+        self.cleanup_rate_spin.setRange(0, 1000000)
+        self.cleanup_rate_spin.setSpecialValueText("不限")
+        self.cleanup_rate_spin.setFixedWidth(80)
+        self.cleanup_rate_spin.setToolTip("后台删除速率上限（个/秒）")
+        self.cleanup_backlog_spin = QSpinBox()
+        self.cleanup_backlog_spin.setRange(1, 100)
+        self.cleanup_backlog_spin.setValue(2)
+        self.cleanup_backlog_spin.setFixedWidth(50)
+        self.cleanup_backlog_spin.setToolTip("最多积压的待删除轮次目录数，删除跟不上时下一轮等待，避免占满磁盘")
+        
         delete_layout.addWidget(self.delete_after_generate)
+        delete_layout.addWidget(QLabel("删除限速:"))
+        delete_layout.addWidget(self.cleanup_rate_spin)
+        delete_layout.addWidget(QLabel("个/秒，积压"))
+        delete_layout.addWidget(self.cleanup_backlog_spin)
+        delete_layout.addWidget(QLabel("轮"))
+        delete_layout.addSpacing(20)
+        delete_layout.addWidget(QLabel("文件内容:"))
+        delete_layout.addWidget(self.content_mode_combo)
+        delete_layout.addWidget(QLabel("种子:"))
+        delete_layout.addWidget(self.seed_edit)
+        delete_layout.addSpacing(20)
+        delete_layout.addWidget(QLabel("写入策略:"))
+        delete_layout.addWidget(self.write_policy_combo)
+        delete_layout.addWidget(self.preallocate_check)
         delete_layout.addStretch()
         
         delete_group.setLayout(delete_layout)
@@ -524,6 +689,8 @@ class FileGeneratorUI(QWidget):
         self.repeat_count_group.setVisible(is_repeat)
         # 单次模式下禁用"生成后删除文件"选项
         self.delete_after_generate.setEnabled(is_repeat)
+        self.cleanup_rate_spin.setEnabled(is_repeat)
+        self.cleanup_backlog_spin.setEnabled(is_repeat)
 
     def check_config_status(self):
         """检查配置文件状态并更新按钮"""
@@ -558,8 +725,18 @@ class FileGeneratorUI(QWidget):
                         else:
                             self.single_mode.setChecked(True)
                         self.limit_edit.setText(str(config.get('max_files', '1000')))
+                        self.writers_edit.setText(str(config.get('writers', '1')))
+                        self.rate_mb_spin.setValue(float(config.get('rate_limit_mbps', 0) or 0))
+                        self.rate_files_spin.setValue(int(config.get('rate_limit_files', 0) or 0))
+                        self.burst_active_spin.setValue(float(config.get('burst_active', 0) or 0))
+                        self.burst_idle_spin.setValue(float(config.get('burst_idle', 0) or 0))
+                        self.custom_profiles = config.get('workload_profiles') or {}
+                        self.populate_profiles(config.get('workload_profile', 'uniform'))
                         self.interval_edit.setText(str(config.get('interval', '0.01')))
                         self.repeat_interval_edit.setText(str(config.get('repeat_interval', '0')))
+                        index = self.schedule_mode_combo.findData(config.get('schedule_mode', 'fixed_delay'))
+                        if index >= 0:
+                            self.schedule_mode_combo.setCurrentIndex(index)
                         repeat_count = config.get('repeat_count', '无限')
                         # 如果配置中的值不在下拉列表中，则设置为当前文本
                         index = self.repeat_count_combo.findText(repeat_count)
@@ -568,6 +745,16 @@ class FileGeneratorUI(QWidget):
                         else:
                             self.repeat_count_combo.setCurrentText(repeat_count)
                         self.delete_after_generate.setChecked(config.get('delete_after', False))
+                        self.cleanup_rate_spin.setValue(int(config.get('cleanup_rate_files', 0) or 0))
+                        self.cleanup_backlog_spin.setValue(int(config.get('cleanup_backlog', 2) or 2))
+                        index = self.content_mode_combo.findData(config.get('content_mode', 'urandom'))
+                        if index >= 0:
+                            self.content_mode_combo.setCurrentIndex(index)
+                        self.seed_edit.setText(str(config.get('seed', '')))
+                        index = self.write_policy_combo.findData(config.get('write_policy', 'buffered'))
+                        if index >= 0:
+                            self.write_policy_combo.setCurrentIndex(index)
+                        self.preallocate_check.setChecked(bool(config.get('preallocate', False)))
                         # 更新模式显示状态
                         self.on_mode_changed()
                         logger.info(f"配置文件加载成功：{config}")
@@ -637,6 +824,22 @@ class FileGeneratorUI(QWidget):
             self.update_error_status(error_msg)
             return False
             
+        if self.seed_edit.text().strip() and self.content_mode_combo.currentData() == 'urandom':
+            error_msg = "系统随机数无法按种子复现，请选择其他文件内容或清空种子"
+            logger.warning(error_msg)
+            self.update_error_status(error_msg)
+            return False
+            
+        try:
+            writers = int(self.writers_edit.text())
+            if writers <= 0:
+                raise ValueError
+        except ValueError:
+            error_msg = "请输入有效的并发写入线程数"
+            logger.warning(error_msg)
+            self.update_error_status(error_msg)
+            return False
+            
         try:
             interval = float(self.interval_edit.text())
             if interval < 0:
@@ -764,7 +967,21 @@ class FileGeneratorUI(QWidget):
                 interval=float(self.interval_edit.text()),
                 repeat_interval=repeat_interval,
                 delete_after=self.delete_after_generate.isChecked(),
-                max_repeat_count=max_repeat_count
+                max_repeat_count=max_repeat_count,
+                content_mode=self.content_mode_combo.currentData(),
+                seed=self.seed_edit.text().strip() or None,
+                writers=int(self.writers_edit.text()),
+                rate_mb=self.rate_mb_spin.value(),
+                rate_files=self.rate_files_spin.value(),
+                burst_active=self.burst_active_spin.value(),
+                burst_idle=self.burst_idle_spin.value(),
+                workload=self.profile_combo.currentData(),
+                workload_profiles=self.custom_profiles,
+                write_policy=self.write_policy_combo.currentData(),
+                preallocate=self.preallocate_check.isChecked(),
+                cleanup_backlog=self.cleanup_backlog_spin.value(),
+                cleanup_rate_files=self.cleanup_rate_spin.value(),
+                schedule_mode=self.schedule_mode_combo.currentData()
             )
             
             # 连接信号
@@ -829,7 +1046,7 @@ class FileGeneratorUI(QWidget):
         logger.debug(f"进度更新: {message}")
         self.setWindowTitle('本地文件产生器')
         # 按钮状态控制
-        if "等待" in message and "后开始下一轮" in message or ("开始" in message and "文件生成目录" in message):
+        if "开始" in message and "文件生成目录" in message:
             self.set_running_state()
         # 根据消息类型设置不同的样式
         if "错误" in message or "已存在" in message:
@@ -851,7 +1068,11 @@ class FileGeneratorUI(QWidget):
         self.progress_bar.setValue(value)
     
     def on_wait_started(self):
-        """等待开始时的处理，禁用所有输入"""
+        """等待开始时的处理：重复模式每轮结束都会发送finished，这里恢复运行状态，等待期间可以暂停和停止；禁用所有输入"""
+        if self.worker and self.worker.is_paused:
+            self.set_paused_state()
+        else:
+            self.set_running_state()
         self.disable_inputs(True)
     
     def on_wait_finished(self):
@@ -940,11 +1161,53 @@ class FileGeneratorUI(QWidget):
         self.single_mode.setEnabled(not disabled)
         self.loop_mode.setEnabled(not disabled)
         self.limit_edit.setEnabled(not disabled)
+        self.writers_edit.setEnabled(not disabled)
+        # 目标速率可在生成过程中修改，突发周期不可
+        self.burst_active_spin.setEnabled(not disabled)
+        self.burst_idle_spin.setEnabled(not disabled)
+        self.profile_combo.setEnabled(not disabled)
+        if not disabled:
+            self.on_profile_changed()
         self.interval_edit.setEnabled(not disabled)
         # 重复间隔和重复次数只有在重复模式下才显示，所以只需要检查是否禁用
         self.repeat_interval_edit.setEnabled(not disabled)
+        self.schedule_mode_combo.setEnabled(not disabled)
         self.repeat_count_combo.setEnabled(not disabled)
         self.delete_after_generate.setEnabled(not disabled)
+        self.cleanup_rate_spin.setEnabled(not disabled)
+        self.cleanup_backlog_spin.setEnabled(not disabled)
+        self.content_mode_combo.setEnabled(not disabled)
+        self.seed_edit.setEnabled(not disabled)
+        self.write_policy_combo.setEnabled(not disabled)
+        self.preallocate_check.setEnabled(not disabled)
+
+    def populate_profiles(self, selected=None):
+        """填充内置和自定义负载模型，鼠标悬停显示说明"""
+        selected = selected or self.profile_combo.currentData() or 'uniform'
+        self.profile_combo.blockSignals(True)
+        self.profile_combo.clear()
+        for name in profile_names(self.custom_profiles):
+            spec = self.custom_profiles.get(name) or BUILTIN_PROFILES.get(name, {})
+            self.profile_combo.addItem(name, name)
+            self.profile_combo.setItemData(self.profile_combo.count() - 1, spec.get('description', name), Qt.ToolTipRole)
+        index = self.profile_combo.findData(selected)
+        self.profile_combo.setCurrentIndex(index if index >= 0 else 0)
+        self.profile_combo.blockSignals(False)
+        self.on_profile_changed()
+
+    def on_profile_changed(self):
+        """非uniform模型的文件大小由模型决定，禁用大小范围输入"""
+        name = self.profile_combo.currentData() or 'uniform'
+        spec = self.custom_profiles.get(name) or BUILTIN_PROFILES.get(name, {})
+        uses_range = spec.get('distribution', 'uniform') == 'uniform'
+        for widget in (self.size_min, self.size_max, self.size_unit, self.size_unit2):
+            widget.setEnabled(uses_range)
+        self.profile_combo.setToolTip(spec.get('description', ''))
+
+    def apply_rate_limit(self):
+        """生成过程中修改目标速率，立即生效"""
+        if self.worker and self.worker.isRunning() and self.worker.generator:
+            self.worker.generator.set_rate_limit(self.rate_mb_spin.value(), self.rate_files_spin.value())
 
     def save_config(self):
         if not self.dir_edit.text():
@@ -959,11 +1222,26 @@ class FileGeneratorUI(QWidget):
             'file_size_max_unit': self.size_unit2.currentText(),
             'mode': '重复' if self.loop_mode.isChecked() else '单次',
             'max_files': self.limit_edit.text(),
+            'writers': self.writers_edit.text(),
+            'rate_limit_mbps': self.rate_mb_spin.value(),
+            'rate_limit_files': self.rate_files_spin.value(),
+            'burst_active': self.burst_active_spin.value(),
+            'burst_idle': self.burst_idle_spin.value(),
             'interval': self.interval_edit.text(),
             'repeat_interval': self.repeat_interval_edit.text() if self.loop_mode.isChecked() else '0',
+            'schedule_mode': self.schedule_mode_combo.currentData(),
             'repeat_count': self.repeat_count_combo.currentText() if self.loop_mode.isChecked() else '无限',
             'delete_after': self.delete_after_generate.isChecked(),
+            'cleanup_rate_files': self.cleanup_rate_spin.value(),
+            'cleanup_backlog': self.cleanup_backlog_spin.value(),
+            'content_mode': self.content_mode_combo.currentData(),
+            'seed': self.seed_edit.text().strip(),
+            'write_policy': self.write_policy_combo.currentData(),
+            'preallocate': self.preallocate_check.isChecked(),
+            'workload_profile': self.profile_combo.currentData(),
         }
+        if self.custom_profiles:
+            config['workload_profiles'] = self.custom_profiles
         # 创建配置目录
         program_data = os.environ.get('ProgramData', r'C:\ProgramData')
         config_dir = os.path.join(program_data, "InfoCoreTestTools")
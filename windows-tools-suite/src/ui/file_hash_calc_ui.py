@@ -4,11 +4,11 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
                              QTableWidget, QTableWidgetItem, QHeaderView, 
                              QWidget)
 from PyQt5.QtGui import QIcon, QPixmap
-import hashlib
 import os
 import pathlib
 import time
 from src.utils.logger import get_logger
+from src.core.hash_engine import HashEngine
 from PyQt5.QtCore import QThread, pyqtSignal, Qt
 
 logger = get_logger(__name__)
@@ -24,27 +24,17 @@ class HashCalcWorker(QThread):
         self._is_running = True
     def run(self):
         try:
-            file_size = os.path.getsize(self.file_path)
-            hashes = {}
-            hash_objs = {}
-            if 'md5' in self.algos: hash_objs['md5'] = hashlib.md5()
-            if 'sha1' in self.algos: hash_objs['sha1'] = hashlib.sha1()
-            if 'sha256' in self.algos: hash_objs['sha256'] = hashlib.sha256()
-            if 'sha512' in self.algos: hash_objs['sha512'] = hashlib.sha512()
-            read_size = 0
-            with open(self.file_path, 'rb') as f:
-                while self._is_running:
-                    chunk = f.read(1024*1024)
-                    if not chunk:
-                        break
-                    for h in hash_objs.values():
-                        h.update(chunk)
-                    read_size += len(chunk)
-                    percent = int(read_size * 100 / file_size) if file_size else 100
-                    self.progress.emit(percent)
-            for k, h in hash_objs.items():
-                hashes[k] = h.hexdigest()
-            self.result.emit(hashes, self.file_path)
+            algorithms = [name for name in ('md5', 'sha1', 'sha256', 'sha512') if name in self.algos]
+            engine = HashEngine(algorithms)
+            hashes = engine.hash_file(
+                self.file_path,
+                stop_flag=lambda: not self._is_running,
+                progress_callback=lambda read_size, file_size: self.progress.emit(
+                    int(read_size * 100 / file_size) if file_size else 100)
+            )
+            # 被停止时不输出不完整的结果
+            if hashes is not None:
+                self.result.emit(hashes, self.file_path)
         except Exception as e:
             self.error.emit(str(e))
     def stop(self):
@@ -1,10 +1,11 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                           QLabel, QFileDialog, QLineEdit, QFrame, QGroupBox, QProgressBar, QMessageBox)
+                           QLabel, QFileDialog, QLineEdit, QFrame, QGroupBox, QProgressBar, QMessageBox,
+                           QSpinBox, QDoubleSpinBox)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 import os
-import hashlib
+from ..core.file_verifier import FileVerifier
+from ..core.rate_limiter import RateLimiter
 from ..utils.logger import get_logger
-from datetime import datetime
 import sys
 import yaml
 
@@ -12,112 +13,41 @@ import yaml
 logger = get_logger(__name__)
 
 class FileVerifyWorker(QThread):
-    """文件校验工作线程"""
+    """文件校验工作线程，调用核心逻辑类FileVerifier"""
     progress = pyqtSignal(str)  # 进度信号
     finished = pyqtSignal()     # 完成信号
     progress_value = pyqtSignal(int)  # 进度值信号
     stats_update = pyqtSignal(int, int, int)  # 统计信息信号：总数、成功数、失败数
     
-    def __init__(self, target_dir):
+    def __init__(self, target_dir, rate_limiter=None):
         super().__init__()
         self.target_dir = target_dir
+        # 限速器由界面持有，校验过程中修改限制值立即生效
+        self.verifier = FileVerifier(target_dir, rate_limiter)
+        self.rate_limiter = self.verifier.rate_limiter
         self.reset()
         
     def reset(self):
         """重置所有状态"""
         self.is_running = True
         self.is_paused = False
-        self.total_files = 0
-        self.checked_files = 0
-        self.success_files = 0
-        self.error_files = []
-        
-    def calculate_md5(self, file_path):
-        """计算文件的MD5值"""
-        hasher = hashlib.md5()
-        with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b''):
-                hasher.update(chunk)
-        return hasher.hexdigest()
+        self.verifier.reset()
         
-    def run(self):
-        logger.info(f"开始校验目录: {self.target_dir}")
+    def _stats_callback(self, checked_files, total_files, success_files, failed_files):
+        self.progress_value.emit(int((checked_files / total_files) * 100))
+        self.stats_update.emit(total_files, success_files, failed_files)
         
+    def run(self):
         try:
-            # 统计.md5file文件总数
-            for root, _, files in os.walk(self.target_dir):
-                for file in files:
-                    if file.endswith('.md5file'):
-                        self.total_files += 1
-            
-            if self.total_files == 0:
-                logger.info("所选目录中无可校验的.md5file文件")
-                self.progress.emit("所选目录中无可校验的.md5file文件")
-                return
-            
-            logger.info(f"找到 {self.total_files} 个.md5file文件，开始校验...")
-            self.progress.emit(f"找到 {self.total_files} 个.md5file文件，开始校验...")
-            
-            # 创建output目录（在exe所在目录下）
+            # 结果写入exe所在目录下的output目录
             base_dir = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.path.dirname(os.path.abspath(__file__))
-            output_dir = os.path.join(base_dir, 'output')
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # 生成输出文件名
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_file = os.path.join(output_dir, f'verify_result_{timestamp}.txt')
-            
-            # 遍历目录进行校验
-            for root, _, files in os.walk(self.target_dir):
-                for file in files:
-                    if not self.is_running:
-                        break
-                        
-                    if self.is_paused:
-                        while self.is_paused and self.is_running:
-                            self.msleep(100)
-                            
-                    if file.endswith('.md5file'):
-                        file_path = os.path.join(root, file)
-                        # 兼容 编号.md5.md5file、md5.编号.md5file 和 md5.md5file
-                        parts = file.split('.')
-                        if len(parts) == 3 and parts[2] == 'md5file':
-                            # 形如 编号.md5.md5file 或 md5.编号.md5file
-                            if parts[0].isdigit():
-                                expected_md5 = parts[1]
-                            else:
-                                expected_md5 = parts[0]
-                        else:
-                            expected_md5 = file[:-8]  # 兼容老格式
-                        actual_md5 = self.calculate_md5(file_path)
-                        
-                        self.checked_files += 1
-                        progress = int((self.checked_files / self.total_files) * 100)
-                        self.progress_value.emit(progress)
-                        
-                        if expected_md5 != actual_md5:
-                            error_info = f"文件: {file_path} 实际MD5: {actual_md5}\n"
-                            self.error_files.append(error_info)
-                            self.progress.emit(f"发现不一致文件: {file_path}")
-                        else:
-                            self.success_files += 1
-                            
-                        # 发送统计信息更新
-                        self.stats_update.emit(self.total_files, self.success_files, len(self.error_files))
-            
-            # 写入结果
-            if self.error_files:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(f"校验时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write(f"目标目录: {self.target_dir}\n")
-                    f.write(f"共检查 {self.checked_files} 个文件，发现 {len(self.error_files)} 个不一致文件\n\n")
-                    f.write("不一致文件列表:\n")
-                    f.writelines(self.error_files)
-                    
-                self.progress.emit(f"校验完成，发现 {len(self.error_files)} 个不一致文件，结果已保存到: {output_file}")
-            else:
-                self.progress.emit(f"校验完成，所有文件MD5值一致")
-                
+            self.verifier.verify(
+                os.path.join(base_dir, 'output'),
+                message_callback=self.progress.emit,
+                stats_callback=self._stats_callback,
+                stop_flag=lambda: not self.is_running,
+                pause_flag=lambda: self.is_paused
+            )
         except Exception as e:
             self.progress.emit(f"校验过程出错: {str(e)}")
         finally:
@@ -139,6 +69,7 @@ class FileVerifyUI(QWidget):
     def __init__(self):
         super().__init__()
         self.worker = None
+        self.rate_limiter = RateLimiter()  # 读取限速，校验过程中修改立即生效
         logger.info("初始化文件校验器UI")
         self.initUI()
         self.check_config_status()  # 检查配置文件状态
@@ -209,6 +140,29 @@ class FileVerifyUI(QWidget):
         dir_group.setLayout(dir_layout)
         layout.addWidget(dir_group)
         
+        # 读取限速组，作为后台负载运行时限制读取带宽和文件数
+        rate_group = QGroupBox("读取限速")
+        rate_layout = QHBoxLayout()
+        rate_layout.setSpacing(5)
+        self.rate_mb_spin = QDoubleSpinBox()
+        self.rate_mb_spin.setRange(0, 100000)
+        self.rate_mb_spin.setDecimals(1)
+        self.rate_mb_spin.setSpecialValueText("不限")
+        self.rate_mb_spin.setFixedWidth(100)
+        self.rate_files_spin = QSpinBox()
+        self.rate_files_spin.setRange(0, 1000000)
+        self.rate_files_spin.setSpecialValueText("不限")
+        self.rate_files_spin.setFixedWidth(100)
+        self.rate_mb_spin.valueChanged.connect(self.apply_rate_limit)
+        self.rate_files_spin.valueChanged.connect(self.apply_rate_limit)
+        rate_layout.addWidget(self.rate_mb_spin)
+        rate_layout.addWidget(QLabel("MB/秒"))
+        rate_layout.addWidget(self.rate_files_spin)
+        rate_layout.addWidget(QLabel("个/秒（0为不限）"))
+        rate_layout.addStretch()
+        rate_group.setLayout(rate_layout)
+        layout.addWidget(rate_group)
+        
         # 操作按钮组
         btn_group = QGroupBox("操作")
         btn_layout = QHBoxLayout()
@@ -470,7 +424,7 @@ class FileVerifyUI(QWidget):
             self.failed_label.setText("失败: 0")
             self.status_label.setText("正在准备校验...")
             
-            self.worker = FileVerifyWorker(self.dir_edit.text())
+            self.worker = FileVerifyWorker(self.dir_edit.text(), self.rate_limiter)
             self.worker.progress.connect(self.update_progress)
             self.worker.progress_value.connect(self.update_progress_bar)
             self.worker.finished.connect(self.verify_finished)
@@ -509,6 +463,15 @@ class FileVerifyUI(QWidget):
             self.dir_edit.setEnabled(True)
             self.status_label.setText("已停止校验")
             
+    def apply_rate_limit(self):
+        """读取限速修改后立即生效，包括正在进行的校验"""
+        self.rate_limiter.set_limits(self.rate_mb_spin.value(), self.rate_files_spin.value())
+        
+    def set_rate_limit(self, mb_per_sec=0, files_per_sec=0):
+        """由自动执行配置设置读取限速"""
+        self.rate_mb_spin.setValue(float(mb_per_sec or 0))
+        self.rate_files_spin.setValue(int(files_per_sec or 0))
+        
     def update_progress(self, message):
         """更新进度信息"""
         self.status_label.setText(message)
@@ -551,6 +514,7 @@ class FileVerifyUI(QWidget):
                     config = yaml.safe_load(f)
                     if config:
                         self.dir_edit.setText(config.get('target_dir', ''))
+                        self.set_rate_limit(config.get('rate_limit_mbps', 0), config.get('rate_limit_files', 0))
                         logger.info(f"配置文件加载成功：{config}")
             except Exception as e:
                 logger.error(f"加载配置文件失败: {str(e)}")
@@ -574,6 +538,8 @@ class FileVerifyUI(QWidget):
         
         config = {
             'target_dir': self.dir_edit.text(),
+            'rate_limit_mbps': self.rate_mb_spin.value(),
+            'rate_limit_files': self.rate_files_spin.value(),
         }
         
         # 创建配置目录
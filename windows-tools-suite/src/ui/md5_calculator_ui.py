@@ -1,10 +1,14 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                              QLabel, QLineEdit, QListWidget, QFileDialog, QMessageBox,
-                             QProgressBar, QGroupBox, QMenu, QFrame, QComboBox)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+                             QProgressBar, QGroupBox, QMenu, QFrame, QComboBox, QSpinBox, QCheckBox,
+                             QDoubleSpinBox)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
 from ..core.md5_calculator import MD5Calculator
+from ..core.merkle_manifest import compare_merkle_manifests
 from ..utils.logger import get_logger
 import traceback  # 添加 traceback 模块
+import os
+import time
 
 class MD5CalculatorWorker(QThread):
     """后台工作线程，用于执行MD5计算"""
@@ -12,8 +16,13 @@ class MD5CalculatorWorker(QThread):
     progress_count = pyqtSignal(int, int, str)  # 当前处理数, 总数, 状态信息
     finished = pyqtSignal()  # 移除 dict 参数
     error = pyqtSignal(str)
+    stopped = pyqtSignal()  # 请求停止后线程退出时发送
+    # 请求停止后等待计算器保存断点的最长时间（毫秒），超时后强制终止线程
+    stop_timeout_ms = 30000
     
-    def __init__(self, calculator, directories, extensions, exclude_hours=24, exclude_keywords=[], time_type='modified'):
+    def __init__(self, calculator, directories, extensions, exclude_hours=24, exclude_keywords=[], time_type='modified', cache_mode='off',
+                 aggregate_mode='ordered', resume=False, streaming=False, prune_dirs=False, fingerprint=False,
+                 fingerprint_reference=None):
         super().__init__()
         self.calculator = calculator  # 使用传入的calculator实例
         self.directories = directories
@@ -21,6 +30,13 @@ class MD5CalculatorWorker(QThread):
         self.exclude_hours = exclude_hours
         self.exclude_keywords = exclude_keywords
         self.time_type = time_type
+        self.cache_mode = cache_mode
+        self.aggregate_mode = aggregate_mode
+        self.resume = resume
+        self.streaming = streaming
+        self.prune_dirs = prune_dirs
+        self.fingerprint = fingerprint
+        self.fingerprint_reference = fingerprint_reference
         self.logger = get_logger(__name__)
         # 设置进度回调
         self.calculator.set_progress_callback(self.update_progress)
@@ -32,6 +48,13 @@ class MD5CalculatorWorker(QThread):
             self.progress_count.emit(current, total, message)
     
     def run(self):
+        try:
+            self._run()
+        finally:
+            if not self.is_running:
+                self.stopped.emit()
+
+    def _run(self):
         try:
             if not self.is_running:
                 self.logger.info("计算被用户终止")
@@ -55,7 +78,14 @@ class MD5CalculatorWorker(QThread):
                 self.extensions, 
                 self.exclude_hours, 
                 self.exclude_keywords,
-                self.time_type
+                self.time_type,
+                self.cache_mode,
+                self.aggregate_mode,
+                self.resume,
+                self.streaming,
+                self.prune_dirs,
+                self.fingerprint,
+                self.fingerprint_reference
             )
             
             if self.is_running:  # 只在运行状态下发送完成信号
@@ -67,11 +97,18 @@ class MD5CalculatorWorker(QThread):
             self.logger.error(error_msg)
             self.error.emit(str(e))
     
-    def terminate(self):
-        """停止处理"""
+    def request_stop(self):
+        """请求停止，不等待：计算器保存断点后线程退出并发送 stopped 信号"""
         self.is_running = False
         self.logger.info("正在终止计算线程...")
-        super().terminate()
+        self.calculator.request_stop()
+
+    def force_terminate(self):
+        """请求停止后超过 stop_timeout_ms 仍未退出时强制终止线程，断点可能没有保存"""
+        if self.isRunning():
+            self.logger.warning("计算线程未能及时停止，强制终止")
+            self.terminate()
+            self.wait()
 
 class MD5CalculatorUI(QWidget):
     def __init__(self):
@@ -90,6 +127,11 @@ class MD5CalculatorUI(QWidget):
             r"eli63x64.sys",r"dtrampo.dll",
         ]
         self.worker = None  # 添加worker属性
+        # 停止请求超时后强制终止线程，停止过程中不阻塞界面
+        self.stop_timer = QTimer(self)
+        self.stop_timer.setSingleShot(True)
+        self.stop_timer.timeout.connect(self.force_stop)
+        self.close_after_stop = False
         self.setMinimumWidth(800)  # 设置最小宽度
         self.setMinimumHeight(600)  # 设置最小高度
         self.init_ui()
@@ -267,8 +309,133 @@ class MD5CalculatorUI(QWidget):
         self.exclude_input.setText(",".join(self.default_exclude_keywords))
         exclude_layout.addWidget(exclude_label)
         exclude_layout.addWidget(self.exclude_input)
+        
+        # 目录路径包含关键字时跳过整个子目录
+        self.prune_dirs_checkbox = QCheckBox("按目录排除")
+        self.prune_dirs_checkbox.setToolTip("子目录路径包含排除关键字时跳过整个子目录，skipped日志中只记录该目录")
+        exclude_layout.addWidget(self.prune_dirs_checkbox)
         settings_layout.addLayout(exclude_layout)
         
+        # 并发线程数设置（单独一行）
+        workers_layout = QHBoxLayout()
+        workers_label = QLabel("并发线程:")
+        workers_label.setFixedWidth(80)
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 64)
+        self.workers_spin.setValue(self.calculator.max_workers)
+        self.workers_spin.setFixedWidth(80)
+        self.workers_spin.setStyleSheet("""
+            QSpinBox {
+                border: 1px solid #cccccc;
+                border-radius: 4px;
+                padding: 5px;
+                background-color: white;
+            }
+        """)
+        workers_layout.addWidget(workers_label)
+        workers_layout.addWidget(self.workers_spin)
+        workers_layout.addWidget(QLabel("个（同时计算MD5的文件数）"))
+        
+        # 目录分布在多个磁盘上时每个磁盘使用独立的线程组，可按磁盘单独设置线程数
+        self.device_parallel_checkbox = QCheckBox("多磁盘并行")
+        self.device_parallel_checkbox.setChecked(self.calculator.device_parallel)
+        self.device_parallel_checkbox.setToolTip("目录位于不同磁盘时各磁盘同时扫描，结果按目录顺序合并，与逐个目录扫描一致")
+        workers_layout.addWidget(self.device_parallel_checkbox)
+        self.device_workers_input = QLineEdit()
+        self.device_workers_input.setPlaceholderText("按磁盘设置线程数，如 C:\\=2, D:\\=8（未设置的磁盘使用并发线程数）")
+        self.device_workers_input.setStyleSheet("""
+            QLineEdit {
+                border: 1px solid #cccccc;
+                border-radius: 4px;
+                padding: 5px;
+                background-color: white;
+            }
+        """)
+        workers_layout.addWidget(self.device_workers_input)
+        settings_layout.addLayout(workers_layout)
+        
+        # 读取限速设置（单独一行），扫描过程中修改立即生效
+        rate_layout = QHBoxLayout()
+        rate_label = QLabel("读取限速:")
+        rate_label.setFixedWidth(80)
+        self.rate_mb_spin = QDoubleSpinBox()
+        self.rate_mb_spin.setRange(0, 100000)
+        self.rate_mb_spin.setDecimals(1)
+        self.rate_mb_spin.setSpecialValueText("不限")
+        self.rate_mb_spin.setFixedWidth(100)
+        self.rate_files_spin = QSpinBox()
+        self.rate_files_spin.setRange(0, 1000000)
+        self.rate_files_spin.setSpecialValueText("不限")
+        self.rate_files_spin.setFixedWidth(100)
+        self.rate_mb_spin.valueChanged.connect(self.apply_rate_limit)
+        self.rate_files_spin.valueChanged.connect(self.apply_rate_limit)
+        rate_layout.addWidget(rate_label)
+        rate_layout.addWidget(self.rate_mb_spin)
+        rate_layout.addWidget(QLabel("MB/秒"))
+        rate_layout.addWidget(self.rate_files_spin)
+        rate_layout.addWidget(QLabel("个/秒（0为不限，作为后台负载运行时使用）"))
+        rate_layout.addStretch()
+        settings_layout.addLayout(rate_layout)
+        
+        # 增量哈希缓存设置（单独一行）
+        cache_layout = QHBoxLayout()
+        cache_label = QLabel("哈希缓存:")
+        cache_label.setFixedWidth(80)
+        self.cache_mode_combo = QComboBox()
+        self.cache_mode_combo.addItems(["不使用缓存", "信任缓存", "校验缓存"])
+        self.cache_mode_combo.setToolTip("信任缓存：大小、修改时间和文件ID未变化的文件直接使用上次结果\n"
+                                         "校验缓存：全部重新计算，并报告元数据未变但内容变化的文件")
+        self.cache_mode_combo.setStyleSheet("""
+            QComboBox {
+                border: 1px solid #cccccc;
+                border-radius: 4px;
+                padding: 5px;
+                background-color: white;
+                min-width: 100px;
+            }
+        """)
+        cache_layout.addWidget(cache_label)
+        cache_layout.addWidget(self.cache_mode_combo)
+        
+        # 总MD5计算模式
+        cache_layout.addWidget(QLabel("总MD5:"))
+        self.aggregate_mode_combo = QComboBox()
+        self.aggregate_mode_combo.addItems(["顺序相关(兼容)", "顺序无关"])
+        self.aggregate_mode_combo.setToolTip("顺序无关：总值与遍历和计算顺序无关，多台机器或多个目录的结果可以合并比较")
+        self.aggregate_mode_combo.setStyleSheet(self.cache_mode_combo.styleSheet())
+        cache_layout.addWidget(self.aggregate_mode_combo)
+        
+        # 断点续扫
+        self.resume_checkbox = QCheckBox("断点续扫")
+        self.resume_checkbox.setToolTip("从参数相同的最近一次未完成扫描的断点处继续，结果与不中断的扫描一致")
+        cache_layout.addWidget(self.resume_checkbox)
+        
+        # 低内存模式
+        self.streaming_checkbox = QCheckBox("低内存模式")
+        self.streaming_checkbox.setToolTip("被排除的文件直接写入磁盘，只保留按原因汇总的计数，适用于千万级文件的目录\n"
+                                           "skipped日志按遍历顺序输出，不再按路径排序")
+        cache_layout.addWidget(self.streaming_checkbox)
+        cache_layout.addStretch()
+        settings_layout.addLayout(cache_layout)
+        
+        # 快速指纹设置（单独一行）
+        fingerprint_layout = QHBoxLayout()
+        fingerprint_label = QLabel("快速指纹:")
+        fingerprint_label.setFixedWidth(80)
+        self.fingerprint_checkbox = QCheckBox("启用")
+        self.fingerprint_checkbox.setToolTip("大小、修改时间和文件开头/中间/结尾采样都与参考指纹清单一致的文件直接沿用清单中的MD5，\n"
+                                             "其余文件完整计算；指纹清单中标明每个文件是完整计算(full)还是指纹匹配(matched)")
+        self.fingerprint_ref_input = QLineEdit()
+        self.fingerprint_ref_input.setPlaceholderText("参考指纹清单，留空使用output目录中最新的fingerprint-N.log")
+        self.fingerprint_ref_input.setStyleSheet(self.exclude_input.styleSheet())
+        fingerprint_ref_btn = QPushButton("选择")
+        fingerprint_ref_btn.clicked.connect(self.select_fingerprint_reference)
+        fingerprint_layout.addWidget(fingerprint_label)
+        fingerprint_layout.addWidget(self.fingerprint_checkbox)
+        fingerprint_layout.addWidget(self.fingerprint_ref_input)
+        fingerprint_layout.addWidget(fingerprint_ref_btn)
+        settings_layout.addLayout(fingerprint_layout)
+        
         settings_group.setLayout(settings_layout)
         layout.addWidget(settings_group)
         
@@ -337,8 +504,28 @@ class MD5CalculatorUI(QWidget):
         self.stop_btn.clicked.connect(self.stop_calculation)
         self.stop_btn.setEnabled(False)
         
+        # 对比两次扫描结果按钮
+        self.compare_btn = QPushButton("对比扫描结果")
+        self.compare_btn.setFixedWidth(100)
+        self.compare_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #f0f0f0;
+                border: 1px solid #cccccc;
+                border-radius: 4px;
+                padding: 5px;
+            }
+            QPushButton:hover {
+                background-color: #e0e0e0;
+            }
+            QPushButton:pressed {
+                background-color: #d0d0d0;
+            }
+        """)
+        self.compare_btn.clicked.connect(self.compare_scan_results)
+        
         btn_layout.addWidget(self.calc_btn)
         btn_layout.addWidget(self.stop_btn)
+        btn_layout.addWidget(self.compare_btn)
         btn_layout.addStretch()
         
         btn_group.setLayout(btn_layout)
@@ -426,12 +613,54 @@ class MD5CalculatorUI(QWidget):
         # 获取排除关键字
         exclude_keywords = [k.strip() for k in self.exclude_input.text().split(",") if k.strip()]
         
+        # 设置并发线程数
+        self.calculator.set_max_workers(self.workers_spin.value())
+        
+        # 按磁盘设置线程数，格式：路径=线程数，多个用逗号分隔
+        device_workers = {}
+        for item in self.device_workers_input.text().split(","):
+            if not item.strip():
+                continue
+            path, _, workers = item.rpartition("=")
+            if not path.strip() or not workers.strip().isdigit() or int(workers) < 1:
+                QMessageBox.warning(self, "警告", f"磁盘线程数格式错误: {item.strip()}，应为 路径=线程数")
+                return
+            device_workers[path.strip()] = int(workers)
+        self.calculator.device_parallel = self.device_parallel_checkbox.isChecked()
+        self.calculator.set_device_workers(device_workers)
+        
+        # 获取哈希缓存模式
+        cache_mode_map = {
+            "不使用缓存": "off",
+            "信任缓存": "trust",
+            "校验缓存": "verify"
+        }
+        cache_mode = cache_mode_map[self.cache_mode_combo.currentText()]
+        aggregate_mode = 'unordered' if self.aggregate_mode_combo.currentText() == "顺序无关" else 'ordered'
+        
+        streaming = self.streaming_checkbox.isChecked()
+        prune_dirs = self.prune_dirs_checkbox.isChecked()
+        fingerprint = self.fingerprint_checkbox.isChecked()
+        fingerprint_reference = self.fingerprint_ref_input.text().strip() or None
+        
+        # 断点续扫：没有参数一致的断点时提示并重新开始
+        resume = self.resume_checkbox.isChecked()
+        if resume:
+            params = self.calculator.checkpoint_params(directories, extensions, exclude_hours, exclude_keywords, time_type,
+                                                       cache_mode, aggregate_mode, streaming, prune_dirs, fingerprint,
+                                                       fingerprint_reference)
+            if self.calculator.find_checkpoint(params) is None:
+                QMessageBox.information(self, "提示", "没有找到参数一致的未完成扫描，将重新开始扫描")
+                resume = False
+        
         # 创建工作线程
-        self.worker = MD5CalculatorWorker(self.calculator, directories, extensions, exclude_hours, exclude_keywords, time_type)
+        self.worker = MD5CalculatorWorker(self.calculator, directories, extensions, exclude_hours, exclude_keywords, time_type, cache_mode,
+                                          aggregate_mode, resume, streaming, prune_dirs, fingerprint, fingerprint_reference)
         self.worker.progress.connect(self.update_status)
         self.worker.progress_count.connect(self.update_progress)
         self.worker.finished.connect(self.calculation_finished)  # 不再传递参数
         self.worker.error.connect(self.calculation_error)
+        self.worker.stopped.connect(self.calculation_stopped)
         
         # 禁用相关按钮
         self.calc_btn.setEnabled(False)
@@ -442,14 +671,35 @@ class MD5CalculatorUI(QWidget):
         self.worker.start()
     
     def stop_calculation(self):
-        """停止计算"""
-        if hasattr(self, 'worker') and self.worker.isRunning():
-            self.worker.terminate()
-            self.worker.wait()
-            self.calc_btn.setEnabled(True)
-            self.add_btn.setEnabled(True)
+        """请求停止计算，线程保存断点后退出时由 calculation_stopped 恢复界面"""
+        if self.worker and self.worker.isRunning():
             self.stop_btn.setEnabled(False)
+            self.status_label.setText("正在停止，等待保存断点...")
+            self.worker.request_stop()
+            self.stop_timer.start(self.worker.stop_timeout_ms)
+
+    def force_stop(self):
+        """停止请求超时，强制终止线程"""
+        if self.worker and self.worker.isRunning():
+            self.worker.force_terminate()
+            self.calculation_stopped()
+
+    def calculation_stopped(self):
+        # 强制终止后排队中的 stopped 信号可能再到达一次
+        if not self.stop_timer.isActive() and self.calc_btn.isEnabled():
+            return
+        self.stop_timer.stop()
+        self.calc_btn.setEnabled(True)
+        self.add_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        if self.calculator.checkpoint_file:
+            self.status_label.setText(f"计算已停止，断点已保存，勾选“断点续扫”后可继续: {self.calculator.checkpoint_file}")
+        else:
             self.status_label.setText("计算已停止")
+        self.logger.info("计算线程已终止")
+        if self.close_after_stop:
+            self.close_after_stop = False
+            self.close()
     
     def update_status(self, message):
         self.status_label.setText(message)
@@ -497,6 +747,54 @@ class MD5CalculatorUI(QWidget):
         self.add_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
 
+    def apply_rate_limit(self):
+        """读取限速修改后立即生效，包括正在进行的扫描"""
+        self.calculator.set_rate_limit(self.rate_mb_spin.value(), self.rate_files_spin.value())
+    
+    def set_rate_limit(self, mb_per_sec=0, files_per_sec=0):
+        """由自动执行配置设置读取限速"""
+        self.rate_mb_spin.setValue(float(mb_per_sec or 0))
+        self.rate_files_spin.setValue(int(files_per_sec or 0))
+    
+    def select_fingerprint_reference(self):
+        """选择快速指纹模式的参考指纹清单"""
+        output_dir = self.calculator.get_output_dir()
+        manifest_file, _ = QFileDialog.getOpenFileName(self, "选择参考指纹清单", output_dir, "指纹清单 (fingerprint-*.log)")
+        if manifest_file:
+            self.fingerprint_ref_input.setText(manifest_file)
+    
+    def compare_scan_results(self):
+        """选择两次扫描的Merkle清单，只对比摘要不同的子目录"""
+        output_dir = self.calculator.get_output_dir()
+        old_file, _ = QFileDialog.getOpenFileName(self, "选择旧的Merkle清单", output_dir, "Merkle清单 (merkle-*.log)")
+        if not old_file:
+            return
+        new_file, _ = QFileDialog.getOpenFileName(self, "选择新的Merkle清单", output_dir, "Merkle清单 (merkle-*.log)")
+        if not new_file:
+            return
+        try:
+            differences, comparisons = compare_merkle_manifests(old_file, new_file)
+            self.logger.info(f"Merkle清单对比完成: {old_file} <-> {new_file}，比较 {comparisons} 个目录，差异 {len(differences)} 个")
+            if not differences:
+                QMessageBox.information(self, "对比结果", f"两次扫描结果一致（比较了 {comparisons} 个目录摘要）")
+                return
+            diff_file = os.path.join(output_dir, f"merkle-diff-{int(time.time())}.log")
+            lines = []
+            for old_root, new_root, rel_path, reason in differences:
+                lines.append(f"{os.path.join(old_root or new_root, rel_path)}\t{reason}\n")
+            with open(diff_file, 'w', encoding='utf-8', errors='ignore') as f:
+                f.write(f"旧清单: {old_file}\n新清单: {new_file}\n")
+                f.write(f"比较目录数: {comparisons}，差异目录数: {len(differences)}\n\n")
+                f.writelines(lines)
+            preview = "".join(lines[:20])
+            more = f"\n……共 {len(differences)} 项" if len(differences) > 20 else ""
+            QMessageBox.information(self, "对比结果",
+                                    f"比较了 {comparisons} 个目录摘要，发现 {len(differences)} 个差异目录：\n"
+                                    f"{preview}{more}\n详细结果已保存到 {diff_file}")
+        except Exception as e:
+            self.logger.error(f"对比Merkle清单失败: {str(e)}\n调用栈信息:\n{traceback.format_exc()}")
+            QMessageBox.critical(self, "错误", f"对比Merkle清单失败：\n{str(e)}")
+    
     def show_context_menu(self, position):
         """显示右键菜单"""
         menu = QMenu()
@@ -521,8 +819,10 @@ class MD5CalculatorUI(QWidget):
 
     def closeEvent(self, event):
         """窗口关闭事件处理"""
-        if hasattr(self, 'worker') and self.worker and self.worker.isRunning():
-            self.worker.terminate()
-            self.worker.wait()  # 等待线程完全终止
-            self.logger.info("计算线程已终止")
+        if self.worker and self.worker.isRunning():
+            # 先请求停止，线程退出后再关闭窗口
+            self.close_after_stop = True
+            self.stop_calculation()
+            event.ignore()
+            return
         event.accept() 
\ No newline at end of file
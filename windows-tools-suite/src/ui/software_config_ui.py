@@ -3,7 +3,8 @@ import os
 import winreg
 import yaml
 import platform
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QGroupBox, QPushButton, QMessageBox, QCheckBox, QHBoxLayout, QLabel
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QGroupBox, QPushButton, QMessageBox, QCheckBox, QHBoxLayout, QLabel,
+                             QSpinBox, QDoubleSpinBox)
 from PyQt5.QtCore import QTimer, QThread, pyqtSignal
 from smb.SMBConnection import SMBConnection
 from src.utils.logger import get_logger
@@ -399,6 +400,23 @@ class SoftwareConfigDialog(QDialog):
         self.emergency_only_cb = QCheckBox("仅在本地应急时自动执行")
         auto_exec_layout.addWidget(self.emergency_only_cb)
         
+        # 系统盘计算和文件校验的读取限速，运行期间修改配置文件后5秒内生效
+        rate_layout = QHBoxLayout()
+        rate_layout.addWidget(QLabel("读取限速:"))
+        self.scan_rate_mb_spin = QDoubleSpinBox()
+        self.scan_rate_mb_spin.setRange(0, 100000)
+        self.scan_rate_mb_spin.setDecimals(1)
+        self.scan_rate_mb_spin.setSpecialValueText("不限")
+        rate_layout.addWidget(self.scan_rate_mb_spin)
+        rate_layout.addWidget(QLabel("MB/秒"))
+        self.scan_rate_files_spin = QSpinBox()
+        self.scan_rate_files_spin.setRange(0, 1000000)
+        self.scan_rate_files_spin.setSpecialValueText("不限")
+        rate_layout.addWidget(self.scan_rate_files_spin)
+        rate_layout.addWidget(QLabel("个/秒"))
+        rate_layout.addStretch()
+        auto_exec_layout.addLayout(rate_layout)
+        
         # 保存配置按钮
         save_auto_config_btn = QPushButton("保存自动执行配置")
         save_auto_config_btn.clicked.connect(self.save_auto_exec_config)
@@ -477,6 +495,8 @@ class SoftwareConfigDialog(QDialog):
                         self.auto_filegen_cb.setChecked(config.get('auto_filegen', False))
                         self.auto_fileverify_cb.setChecked(config.get('auto_fileverify', False))
                         self.emergency_only_cb.setChecked(config.get('emergency_only', False))
+                        self.scan_rate_mb_spin.setValue(float(config.get('scan_rate_limit_mbps', 0) or 0))
+                        self.scan_rate_files_spin.setValue(int(config.get('scan_rate_limit_files', 0) or 0))
             except Exception as e:
                 print(f"加载自动执行配置失败: {str(e)}")
 
@@ -506,6 +526,8 @@ class SoftwareConfigDialog(QDialog):
             'auto_filegen': self.auto_filegen_cb.isChecked(),
             'auto_fileverify': self.auto_fileverify_cb.isChecked(),
             'emergency_only': self.emergency_only_cb.isChecked(),
+            'scan_rate_limit_mbps': self.scan_rate_mb_spin.value(),
+            'scan_rate_limit_files': self.scan_rate_files_spin.value(),
         }
         
         try: